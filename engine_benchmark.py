@@ -0,0 +1,172 @@
+# Workload benchmark of every container engine through their common mapping protocol
+# (collections.abc.MutableMapping, plus add and discard as in a set):
+# - open_addressing: HashTable (double hashing)
+# - chaining: HashTableSeparateChaining
+# - cuckoo: CuckooHashTable
+# - red_black_tree: RedBlackTree(duplicates=MAP)
+# Each run preloads `size` keys drawn from a universe of 2 * size keys, then replays `operations` operations:
+# a read (key in table) with probability read_ratio, otherwise a write (table[key] = key) or a delete
+# (table.discard(key)) with equal odds. The keys of the operations are uniform over the universe, sequential
+# (0, 1, 2, ... wrapping around) or Zipf distributed (the key of rank r has weight 1 / r^skew; ranks are
+# shuffled over the universe so that the hot keys are spread).
+# Every run prints the operations per second, the latency percentiles of the operations (each one timed on
+# its own, with the garbage collector paused) and the peak memory of the engine, measured by tracemalloc in a
+# second replay of the same workload (tracemalloc slows down every allocation, so the first replay is timed
+# without it).
+#
+# Usage (from the root of the repository):
+#        python -m engine_benchmark --sizes 10000 100000
+#        python -m engine_benchmark --engines chaining cuckoo --distributions zipf --zipf-skews 0.8 1.2 --read-ratios 0.5 0.95
+#        python -m engine_benchmark --format json --output results.json
+
+import argparse
+import csv
+import gc
+import itertools
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# The engines are scripts living next to their own helper modules
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(HERE, 'hash_table'), os.path.join(HERE, 'red_black_tree')]
+
+from hash_table_cuckoo import CuckooHashTable  # noqa: E402
+from hash_table_open_addressing import HashTable  # noqa: E402
+from hash_table_separate_chaining import HashTableSeparateChaining  # noqa: E402
+from red_black_tree import MAP, RedBlackTree  # noqa: E402
+
+ENGINES = {
+    'open_addressing': lambda: HashTable(11),
+    'chaining': HashTableSeparateChaining,
+    'cuckoo': CuckooHashTable,
+    'red_black_tree': lambda: RedBlackTree(duplicates=MAP),
+}
+DISTRIBUTIONS = ['uniform', 'sequential', 'zipf']
+PERCENTILES = [('p50', 0.5), ('p99', 0.99), ('p999', 0.999)]
+READ, WRITE, DELETE = 0, 1, 2
+
+FIELDS = ['engine', 'distribution', 'zipf_skew', 'size', 'operations', 'read_ratio', 'ops_per_second',
+          'peak_memory_bytes', 'p50_ns', 'p99_ns', 'p999_ns', 'max_ns']
+
+
+def workload(distribution, size, operations, read_ratio, zipf_skew, rng):
+    """ Returns the keys to preload and the list of (operation, key) to replay """
+    universe = 2 * size
+    preload = rng.sample(range(universe), size)
+    if distribution == 'uniform':
+        keys = [rng.randrange(universe) for _ in range(operations)]
+    elif distribution == 'sequential':
+        keys = [i % universe for i in range(operations)]
+    elif distribution == 'zipf':
+        ranked = rng.sample(range(universe), universe)
+        weights = itertools.accumulate(1 / rank ** zipf_skew for rank in range(1, universe + 1))
+        keys = rng.choices(ranked, cum_weights=list(weights), k=operations)
+    else:
+        raise ValueError(f"unknown distribution: {distribution}")
+    codes = []
+    for _ in range(operations):
+        r = rng.random()
+        codes.append(READ if r < read_ratio else WRITE if r < read_ratio + (1 - read_ratio) / 2 else DELETE)
+    return preload, list(zip(codes, keys))
+
+
+def replay(table, operations, timings=None):
+    """ Runs the operations on the table, appending the nanoseconds taken by each one to timings if given """
+    clock = time.perf_counter_ns
+    for code, key in operations:
+        start = clock()
+        if code == READ:
+            key in table
+        elif code == WRITE:
+            table[key] = key
+        else:
+            table.discard(key)
+        if timings is not None:
+            timings.append(clock() - start)
+
+
+def run_one(engine, distribution, size, operations, read_ratio, zipf_skew, seed):
+    """ Replays one workload on a fresh table of the engine and returns its row """
+    rng = random.Random(f'{seed}-{distribution}-{size}-{read_ratio}-{zipf_skew}')
+    preload, ops = workload(distribution, size, operations, read_ratio, zipf_skew, rng)
+    row = {'engine': engine, 'distribution': distribution,
+           'zipf_skew': zipf_skew if distribution == 'zipf' else '', 'size': size, 'operations': operations,
+           'read_ratio': read_ratio}
+
+    table = ENGINES[engine]()
+    table.update(zip(preload, preload))
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        replay(table, ops, timings)
+        elapsed = time.perf_counter() - start
+    finally:
+        if gc_enabled:
+            gc.enable()
+    row['ops_per_second'] = round(operations / elapsed)
+    timings.sort()
+    for name, q in PERCENTILES:
+        row[f'{name}_ns'] = timings[min(len(timings) - 1, int(q * len(timings)))]
+    row['max_ns'] = timings[-1]
+    del table, timings
+
+    # Peak of the memory allocated while building the table and replaying the workload
+    tracemalloc.start()
+    try:
+        table = ENGINES[engine]()
+        table.update(zip(preload, preload))
+        replay(table, ops)
+        row['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return row
+
+
+def write_rows(rows, fmt, output):
+    """ Writes the rows as CSV or as a JSON list """
+    if fmt == 'json':
+        json.dump([{field: row[field] for field in FIELDS} for row in rows], output, indent=2)
+        output.write('\n')
+        return
+    writer = csv.DictWriter(output, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Workload benchmark of the container engines')
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000])
+    parser.add_argument('--operations', type=int, default=100000)
+    parser.add_argument('--read-ratios', type=float, nargs='+', default=[0.9])
+    parser.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS, default=['uniform', 'zipf'])
+    parser.add_argument('--zipf-skews', type=float, nargs='+', default=[1.0], help='exponents of the zipf keys')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', choices=['csv', 'json'], default='csv')
+    parser.add_argument('--output', help='output file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    rows = []
+    for size in args.sizes:
+        for read_ratio in args.read_ratios:
+            for distribution in args.distributions:
+                skews = args.zipf_skews if distribution == 'zipf' else [None]
+                for zipf_skew in skews:
+                    for engine in args.engines:
+                        rows.append(run_one(engine, distribution, size, args.operations, read_ratio, zipf_skew,
+                                            args.seed))
+    if args.output:
+        with open(args.output, 'w', newline='') as output:
+            write_rows(rows, args.format, output)
+    else:
+        write_rows(rows, args.format, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
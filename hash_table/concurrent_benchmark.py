@@ -0,0 +1,80 @@
+# Throughput benchmark of the concurrent hash table.
+# Every thread runs a random mix of insert/find/remove on the whole key space, against:
+# - striped: ConcurrentHashTable (lock striping, lock-free reads)
+# - global: HashTableSeparateChaining behind a single lock
+# The correctness of the striped table under concurrent writes is checked by concurrent_check.py.
+#
+# Usage: python concurrent_benchmark.py --threads 1 2 4 8 --operations 100000
+
+import argparse
+import random
+import threading
+import time
+
+from concurrent_hash_table import ConcurrentHashTable
+from hash_table_separate_chaining import HashTableSeparateChaining
+
+
+class GlobalLockHashTable:
+    """ Baseline: the chaining table with one lock around every operation """
+    def __init__(self):
+        self.table = HashTableSeparateChaining(64)
+        self.lock = threading.Lock()
+
+    def insert(self, key, value=None):
+        with self.lock:
+            self.table.insert(key, value)
+
+    def find(self, key):
+        with self.lock:
+            return self.table.find(key)
+
+    def remove(self, key):
+        with self.lock:
+            return self.table.remove(key)
+
+
+def worker(table, thread_id, operations, key_range, read_ratio, seed):
+    """ Runs the operations: finds with probability read_ratio, inserts and removes otherwise """
+    rng = random.Random(f'{seed}-{thread_id}')
+    for _ in range(operations):
+        key = rng.randrange(key_range)
+        r = rng.random()
+        if r < read_ratio:
+            table.find(key)
+        elif r < read_ratio + (1 - read_ratio) / 2:
+            table.insert(key, thread_id)
+        else:
+            table.remove(key)
+
+
+def run(kind, threads, operations, key_range, read_ratio, seed):
+    """ Runs the workload with the given number of threads; returns the operations per second """
+    table = ConcurrentHashTable() if kind == 'striped' else GlobalLockHashTable()
+    workers = [threading.Thread(target=worker, args=(table, i, operations, key_range, read_ratio, seed))
+               for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return threads * operations / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Throughput of the concurrent hash table')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--operations', type=int, default=50000, help='operations per thread')
+    parser.add_argument('--key-range', type=int, default=100000)
+    parser.add_argument('--read-ratio', type=float, default=0.8)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print('table,threads,ops_per_second')
+    for threads in args.threads:
+        for kind in ('striped', 'global'):
+            throughput = run(kind, threads, args.operations, args.key_range, args.read_ratio, args.seed)
+            print(f'{kind},{threads},{throughput:.0f}')
+
+if __name__ == '__main__':
+    main()
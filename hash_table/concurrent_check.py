@@ -0,0 +1,114 @@
+# Randomized stress check of ConcurrentHashTable. Each seed runs two workloads with several threads:
+# - mixed: every thread runs a random mix of insert/find/remove on its own keys (thread_id + k * threads,
+#   so the final content is known exactly) plus finds on the whole key space, and checks what remove returns
+# - colliding: a table with seed=0 and a fixed number of buckets, where every key is 1 + j * size, so that all
+#   the keys of all the threads go to bucket 1 and every write rewrites the same chain
+# After each run the table is validated (every key in its bucket, once, and len() equal to the keys actually
+# stored) and its content compared with the keys the threads left in it.
+# The thread switch interval is lowered during the check so that threads interleave inside the operations.
+# Exits with status 1 if any check fails.
+#
+# Usage: python concurrent_check.py --threads 4 --operations 2000 --seeds 20
+
+import argparse
+import random
+import sys
+import threading
+
+from concurrent_hash_table import ConcurrentHashTable
+
+
+def mixed_worker(table, thread_id, threads, operations, key_range, seed, owned, errors):
+    """ Random mix of operations; the writes only touch the keys of the thread, recorded in owned """
+    rng = random.Random(f'{seed}-{thread_id}')
+    try:
+        for _ in range(operations):
+            key = rng.randrange(key_range)
+            r = rng.random()
+            if r < 0.5:
+                table.find(key)
+                continue
+            key = key - key % threads + thread_id
+            if r < 0.75:
+                table.insert(key, thread_id)
+                owned[key] = thread_id
+            else:
+                removed = table.remove(key)
+                if removed != (key in owned):
+                    errors.append(f'thread {thread_id}: remove({key}) returned {removed}')
+                owned.pop(key, None)
+    except Exception as error:  # Reported by the main thread
+        errors.append(f'thread {thread_id}: {error!r}')
+
+
+def colliding_worker(table, thread_id, threads, operations, seed, owned, errors):
+    """ Inserts keys sharing bucket 1 (those with j = thread_id mod threads) and removes a quarter of them """
+    rng = random.Random(f'{seed}-{thread_id}')
+    try:
+        for j in range(thread_id, operations * threads, threads):
+            key = 1 + j * table.size
+            table.insert(key, thread_id)
+            owned[key] = thread_id
+            if rng.random() < 0.25:
+                table.remove(key)
+                del owned[key]
+    except Exception as error:
+        errors.append(f'thread {thread_id}: {error!r}')
+
+
+def check(workload, threads, operations, seed):
+    """ Runs the workload once and returns the list of errors found """
+    if workload == 'mixed':
+        table = ConcurrentHashTable(stripes=4)
+        target, args = mixed_worker, (operations, 10 * operations, seed)
+    else:
+        table = ConcurrentHashTable(size=9, stripes=4, max_load_factor=float('inf'), seed=0)
+        target, args = colliding_worker, (operations, seed)
+    owned = [{} for _ in range(threads)]
+    errors = []
+    workers = [threading.Thread(target=target, args=(table, i, threads) + args + (owned[i], errors))
+               for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    expected = {}
+    for keys in owned:
+        expected.update(keys)
+    try:
+        table.validate()
+    except ValueError as error:
+        errors.append(str(error))
+    stored = dict(table.items())
+    if len(table) != len(expected) or stored != expected:
+        errors.append(f'len() is {len(table)}, {len(stored)} keys stored, {len(expected)} expected')
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Randomized stress check of the concurrent hash table')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--operations', type=int, default=2000, help='operations per thread')
+    parser.add_argument('--seeds', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    failed = 0
+    try:
+        for seed in range(args.seeds):
+            for workload in ('mixed', 'colliding'):
+                errors = check(workload, args.threads, args.operations, seed)
+                for error in errors[:5]:
+                    print(f'{workload}, seed {seed}: {error}')
+                failed += bool(errors)
+    finally:
+        sys.setswitchinterval(interval)
+    print(f'{2 * args.seeds - failed} of {2 * args.seeds} runs passed')
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
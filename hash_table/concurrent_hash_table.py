@@ -0,0 +1,210 @@
+# Thread-safe separate chaining hash table with lock striping.
+# Writers lock only the stripe of their bucket, so operations on different stripes do not contend.
+# The number of buckets is always a multiple of the number of stripes, so bucket i belongs to stripe
+# i % stripes whatever the size of the table: two keys sharing a bucket always share its lock.
+# Chains are immutable tuples replaced as a whole, so readers never lock: a find works on the
+# chain it read, which is always a complete, consistent version of the bucket.
+
+import threading
+
+from hash_functions import prehash, random_seed, seeded_hash
+
+
+class ConcurrentHashTable:
+    def __init__(self, size=64, stripes=16, max_load_factor=1.0, hash_function=None, seed=None):
+        """
+        Initializes the table with `size` buckets (rounded up to a multiple of `stripes`) and `stripes` locks;
+        writes to bucket i are protected by the lock i % stripes, which is also h(k) % stripes for every key
+        of the bucket, so it can be taken before reading the bucket list.
+        Growing (to 2m buckets, when the load factor goes above `max_load_factor`) takes every stripe lock,
+        builds the new bucket list and publishes it with a single assignment.
+        Keys are hashed as in HashTableSeparateChaining: mixed with a random seed by default, unmixed with seed=0.
+        """
+        self.stripes = stripes
+        self.max_load_factor = max_load_factor
+        self.hash_function = hash_function
+        self.seed = random_seed() if seed is None else seed
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        # Number of keys per stripe, each updated under its own lock
+        self._counts = [0] * stripes
+        # Each bucket is None or a tuple of (key, value) pairs
+        self._table = [None] * (max(1, -(-size // stripes)) * stripes)
+
+    def key_hash(self, key):
+        """Integer the bucket and the stripe are computed from, mixed with the seed unless it is 0."""
+        h = self.hash_function(key) if self.hash_function else prehash(key)
+        if self.seed:
+            return seeded_hash(h, self.seed)
+        return h
+
+    @property
+    def size(self):
+        """Number of buckets of the current table."""
+        return len(self._table)
+
+    @property
+    def load_factor(self):
+        """Number of stored keys per bucket."""
+        return len(self) / len(self._table)
+
+    def _chain(self, key):
+        """Returns the current chain of the key without locking: a snapshot of its bucket."""
+        table = self._table
+        return table[self.key_hash(key) % len(table)]
+
+    def find(self, key):
+        """Find a key in the hash table."""
+        chain = self._chain(key)
+        if chain is not None:
+            for chain_key, _ in chain:
+                if chain_key == key:
+                    return True
+        return False
+
+    def get(self, key, default=None):
+        """Returns the value of the key, or default if it is not in the table."""
+        chain = self._chain(key)
+        if chain is not None:
+            for chain_key, value in chain:
+                if chain_key == key:
+                    return value
+        return default
+
+    def insert(self, key, value=None):
+        """Insert a key into the hash table, or replace its value if it is already present."""
+        h = self.key_hash(key)
+        # Stripe of the key's bucket, at the current size and at any size the table grows to
+        stripe = h % self.stripes
+        with self._locks[stripe]:
+            # The table cannot be replaced while a stripe lock is held
+            table = self._table
+            index = h % len(table)
+            chain = table[index]
+            if chain is None:
+                table[index] = ((key, value),)
+            else:
+                for position, (chain_key, _) in enumerate(chain):
+                    if chain_key == key:
+                        table[index] = chain[:position] + ((key, value),) + chain[position + 1:]
+                        return
+                table[index] = chain + ((key, value),)
+            self._counts[stripe] += 1
+        if len(self) > self.max_load_factor * len(self._table):
+            self._grow()
+
+    def remove(self, key):
+        """Remove a key from the hash table. Returns True if the key was found."""
+        h = self.key_hash(key)
+        # Stripe of the key's bucket, at the current size and at any size the table grows to
+        stripe = h % self.stripes
+        with self._locks[stripe]:
+            table = self._table
+            index = h % len(table)
+            chain = table[index]
+            if chain is None:
+                return False
+            for position, (chain_key, _) in enumerate(chain):
+                if chain_key == key:
+                    table[index] = chain[:position] + chain[position + 1:] or None
+                    self._counts[stripe] -= 1
+                    return True
+            return False
+
+    def _grow(self):
+        """Rehashes into 2m buckets while holding every stripe lock (always taken in the same order)."""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            old_table = self._table
+            # Another thread may have grown the table while this one waited for the locks
+            if sum(self._counts) <= self.max_load_factor * len(old_table):
+                return
+            # Doubling keeps the size a multiple of the stripes
+            new_size = 2 * len(old_table)
+            new_table = [None] * new_size
+            for chain in old_table:
+                if chain is None:
+                    continue
+                for key, value in chain:
+                    index = self.key_hash(key) % new_size
+                    new_chain = new_table[index]
+                    new_table[index] = ((key, value),) if new_chain is None else new_chain + ((key, value),)
+            # Readers holding the old list keep a consistent view of the table before the resize
+            self._table = new_table
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+    def validate(self):
+        """
+        Checks that every key is in its bucket, once, and that the key counts of the stripes add up to the
+        keys actually stored; meant for a table no thread is writing to.
+        Raises ValueError on the first violation; returns the number of keys otherwise.
+        """
+        table = self._table
+        if len(table) % self.stripes:
+            raise ValueError(f"{len(table)} buckets is not a multiple of {self.stripes} stripes")
+        counts = [0] * self.stripes
+        seen = set()
+        for index, chain in enumerate(table):
+            for key, _ in chain or ():
+                if self.key_hash(key) % len(table) != index:
+                    raise ValueError(f"key {key!r} is in bucket {index}, not in its own")
+                if key in seen:
+                    raise ValueError(f"key {key!r} is stored twice")
+                seen.add(key)
+                counts[index % self.stripes] += 1
+        if counts != self._counts:
+            raise ValueError(f"the stripes count {sum(self._counts)} keys, {len(seen)} are stored")
+        return len(seen)
+
+    def items(self):
+        """Yields the (key, value) pairs of a snapshot of the bucket list, chain by chain."""
+        for chain in self._table:
+            if chain is not None:
+                yield from chain
+
+    def __len__(self):
+        return sum(self._counts)
+
+    def __iter__(self):
+        for key, _ in self.items():
+            yield key
+
+    def __contains__(self, key):
+        return self.find(key)
+
+    def __getitem__(self, key):
+        chain = self._chain(key)
+        if chain is not None:
+            for chain_key, value in chain:
+                if chain_key == key:
+                    return value
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self.insert(key, value)
+
+    def __delitem__(self, key):
+        if not self.remove(key):
+            raise KeyError(key)
+
+
+if __name__ == '__main__':
+    # Four threads insert disjoint ranges of keys and then remove the odd ones
+    table = ConcurrentHashTable(size=9, stripes=4)
+
+    def worker(start):
+        for key in range(start, start + 1000):
+            table[key] = key * key
+        for key in range(start + 1, start + 1000, 2):
+            del table[key]
+
+    threads = [threading.Thread(target=worker, args=(i * 1000,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print('Keys:', table.validate(), '- buckets:', table.size)
+    print('Find 2000:', table.find(2000), '- value:', table[2000])
+    print('Find 2001:', table.find(2001))
@@ -0,0 +1,41 @@
+# Hash functions shared by the hash tables.
+# The tables reduce an integer "key hash" modulo their size. The key hash of an int is the int itself,
+# and any other hashable key uses Python's hash(); a table then mixes it with its seed, a secret 64-bit value
+# drawn with random_seed() for every table by default, so that keys chosen to collide (e.g. multiples of the
+# table size) are spread over the whole table. seed=0 turns the mix off (h'(k) = k, as in the exercises),
+# and any other explicit seed gives reproducible positions.
+
+import os
+
+MASK64 = (1 << 64) - 1
+
+
+def random_seed():
+    """ Returns a random 64-bit seed from the operating system """
+    return int.from_bytes(os.urandom(8), 'little')
+
+
+def prehash(key):
+    """ Returns the integer the key is hashed from: the key itself for ints, hash(key) otherwise """
+    if type(key) is int:
+        return key
+    return hash(key)
+
+
+def mix64(x):
+    """
+    SplitMix64 finalizer: a bijective mix of the 64 bits of x where every input bit
+    affects every output bit, so nearby or evenly spaced inputs end up far apart.
+    """
+    x &= MASK64
+    x ^= x >> 30
+    x = (x * 0xBF58476D1CE4E5B9) & MASK64
+    x ^= x >> 27
+    x = (x * 0x94D049BB133111EB) & MASK64
+    x ^= x >> 31
+    return x
+
+
+def seeded_hash(h, seed):
+    """ Mixes the integer h with the seed; the result is a non-negative 64-bit integer """
+    return mix64(h ^ seed)
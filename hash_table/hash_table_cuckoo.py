@@ -0,0 +1,303 @@
+# Cuckoo hashing: every key has one candidate bucket in each of `hash_count` sub-tables (one hash function
+# per sub-table), and is always stored in one of them or in a small stash. A lookup therefore reads at most
+# hash_count * bucket_size slots plus the stash, whatever the load, instead of following a probe sequence or a
+# chain of unbounded length.
+# An insert that finds its candidate buckets full evicts one of their keys, which moves to one of its own
+# other buckets, possibly evicting another key, and so on. When this random walk does not end after
+# `max_loop` evictions, the key left without a slot goes to the stash; when the stash is full too, the table
+# is rehashed with new hash functions (and grows after repeated failures).
+
+import random
+from collections.abc import MutableMapping
+
+from hash_functions import prehash, random_seed, seeded_hash
+from mapping_views import StorageItemsView, StorageValuesView
+
+
+class CuckooHashTable(MutableMapping):
+    def __init__(self, size=16, hash_count=2, bucket_size=1, stash_size=4, max_loop=100, max_load_factor=None,
+                 hash_function=None, seed=None):
+        """
+        Initializes the table with `size` buckets of `bucket_size` slots in each of the `hash_count` sub-tables.
+        The table doubles its buckets when (keys / slots) goes above `max_load_factor`; the default is the load
+        a random walk still fills reliably: 0.45 with 2 hash functions and 1 slot per bucket, 0.85 with more
+        hash functions, 0.9 with 4-way buckets.
+        Keys are hashed with `hash_function` (default: the int itself, hash() for other keys), then mixed once
+        with a 64-bit seed; the halves a and b of the mix give the bucket (a + i * b) % size in sub-table i
+        (Kirsch-Mitzenmacher), so a lookup costs one mix whatever the number of hash functions.
+        The seed of the mix, redrawn by every rehash, and the evictions come from a generator seeded with `seed`:
+        a random seed by default, against collision flooding (see hash_functions.random_seed); pass a fixed seed
+        such as 0 for reproducible runs.
+        """
+        if hash_count < 2:
+            raise ValueError("cuckoo hashing needs at least 2 hash functions")
+        if max_load_factor is None:
+            max_load_factor = 0.9 if bucket_size > 1 else 0.85 if hash_count > 2 else 0.45
+        self.hash_count = hash_count
+        self.bucket_size = bucket_size
+        self.stash_size = stash_size
+        self.max_loop = max_loop
+        self.max_load_factor = max_load_factor
+        self.hash_function = hash_function
+        self._random = random.Random(random_seed() if seed is None else seed)
+        # Number of times the table was rebuilt with new hash functions, growing or not
+        self.rehashes = 0
+        self._clear(size)
+        self.count = 0
+
+    def _clear(self, size):
+        """Empties the table, giving each sub-table size buckets and drawing new hash functions."""
+        self.size = size
+        total = self.hash_count * size * self.bucket_size
+        self.slots = [None] * total
+        self.slot_values = [None] * total
+        # (key, value) pairs that found no slot
+        self.stash = []
+        self.hash_seed = self._random.getrandbits(64)
+        # First slot of each sub-table
+        self._tables = [table * size * self.bucket_size for table in range(self.hash_count)]
+
+    @property
+    def slot_count(self):
+        """Number of slots of the sub-tables, without the stash."""
+        return len(self.slots)
+
+    @property
+    def load_factor(self):
+        """Fraction of the slots holding a key (stashed keys included)."""
+        return self.count / self.slot_count
+
+    @property
+    def max_probes(self):
+        """Largest number of slots a lookup compares: every candidate slot plus the stash."""
+        return self.hash_count * self.bucket_size + self.stash_size
+
+    def key_hash(self, key):
+        """Integer the candidate buckets are computed from."""
+        return self.hash_function(key) if self.hash_function else prehash(key)
+
+    def _buckets(self, key):
+        """Returns the first slot of each candidate bucket of the key, one per sub-table."""
+        mixed = seeded_hash(self.key_hash(key), self.hash_seed)
+        low, high = mixed & 0xFFFFFFFF, mixed >> 32
+        size = self.size
+        bucket_size = self.bucket_size
+        return [table + (low + i * high) % size * bucket_size for i, table in enumerate(self._tables)]
+
+    def search(self, key):
+        """
+        Returns the slot index of the key, or None if it is not in the table.
+        A stashed key has the index slot_count + its position in the stash.
+        """
+        keys = self.slots
+        mixed = seeded_hash(self.key_hash(key), self.hash_seed)
+        low, high = mixed & 0xFFFFFFFF, mixed >> 32
+        size = self.size
+        bucket_size = self.bucket_size
+        # Same buckets as _buckets, without building the list
+        for table in self._tables:
+            start = table + low % size * bucket_size
+            for index in range(start, start + bucket_size):
+                slot = keys[index]
+                if slot is not None and slot == key:
+                    return index
+            low += high
+        for position, (stashed, _) in enumerate(self.stash):
+            if stashed == key:
+                return len(keys) + position
+        return None
+
+    def insert(self, key, value=None):
+        """Insert a key into the hash table, or replace its value if it is already present."""
+        index = self.search(key)
+        if index is not None:
+            if index < len(self.slots):
+                self.slot_values[index] = value
+            else:
+                self.stash[index - len(self.slots)] = (key, value)
+            return
+        if self.count + 1 > self.max_load_factor * self.slot_count:
+            self._rehash(2 * self.size, list(self._items()))
+        if self._place(key, value) is None:
+            self.count += 1
+        else:
+            # Neither the walk nor the stash found room: new hash functions for every key
+            self._rehash(self.size, list(self._items()) + [(key, value)])
+
+    def _place(self, key, value):
+        """
+        Stores a key known to be absent, evicting keys along a random walk of at most max_loop steps,
+        then in the stash. Returns None if every key found a place, otherwise the (key, value) pair given,
+        after moving the evicted keys back: a failed placement leaves the table unchanged.
+        """
+        keys, values = self.slots, self.slot_values
+        bucket_size = self.bucket_size
+        previous = None
+        # Slots written by the walk, in order
+        path = []
+        for _ in range(self.max_loop):
+            buckets = self._buckets(key)
+            for start in buckets:
+                for index in range(start, start + bucket_size):
+                    if keys[index] is None:
+                        keys[index] = key
+                        values[index] = value
+                        return None
+            # Every candidate slot is taken: evict a resident, not from the bucket the key was just evicted from
+            start = self._random.choice([start for start in buckets if start != previous] or buckets)
+            index = start + self._random.randrange(bucket_size)
+            keys[index], key = key, keys[index]
+            values[index], value = value, values[index]
+            path.append(index)
+            previous = start
+        if len(self.stash) < self.stash_size:
+            self.stash.append((key, value))
+            return None
+        for index in reversed(path):
+            keys[index], key = key, keys[index]
+            values[index], value = value, values[index]
+        return key, value
+
+    def _rehash(self, size, items):
+        """
+        Rebuilds the table with size buckets per sub-table and new hash functions until every item fits,
+        doubling the size after every 3 failed attempts.
+        Raises OverflowError, leaving the table as it was, if the items still do not fit after 9 attempts,
+        which only happens when too many keys have the same key hash.
+        """
+        state = self.size, self.slots, self.slot_values, self.stash, self.hash_seed, self._tables
+        for attempt in range(1, 10):
+            self.rehashes += 1
+            self._clear(size)
+            if all(self._place(key, value) is None for key, value in items):
+                self.count = len(items)
+                return
+            if attempt % 3 == 0:
+                size *= 2
+        self.size, self.slots, self.slot_values, self.stash, self.hash_seed, self._tables = state
+        raise OverflowError(f"no cuckoo placement found for {len(items)} keys, even with {size // 2} buckets")
+
+    def delete(self, key):
+        """Remove a key from the hash table. Returns True if the key was found."""
+        index = self.search(key)
+        if index is None:
+            return False
+        self.count -= 1
+        if index >= len(self.slots):
+            del self.stash[index - len(self.slots)]
+            return True
+        self.slots[index] = None
+        self.slot_values[index] = None
+        # The freed slot may be a candidate slot of a stashed key
+        for stashed, stashed_value in list(self.stash):
+            for start in self._buckets(stashed):
+                free = next((i for i in range(start, start + self.bucket_size) if self.slots[i] is None), None)
+                if free is not None:
+                    self.slots[free] = stashed
+                    self.slot_values[free] = stashed_value
+                    self.stash.remove((stashed, stashed_value))
+                    break
+        return True
+
+    def find(self, key):
+        """Find a key in the hash table."""
+        return self.search(key) is not None
+
+    def get(self, key, default=None):
+        """Returns the value of the key, or default if it is not in the table."""
+        index = self.search(key)
+        if index is None:
+            return default
+        return self._value(index)
+
+    def _value(self, index):
+        """Value at a slot index returned by search."""
+        if index < len(self.slots):
+            return self.slot_values[index]
+        return self.stash[index - len(self.slots)][1]
+
+    def _items(self):
+        # The (key, value) pairs stored in the table, in slot order, then the stashed ones
+        for key, value in zip(self.slots, self.slot_values):
+            if key is not None:
+                yield key, value
+        yield from self.stash
+
+    def items(self):
+        """View of the (key, value) pairs stored in the table, in slot order, then the stashed ones."""
+        return StorageItemsView(self)
+
+    def values(self):
+        """View of the values stored in the table, in the order of items()."""
+        return StorageValuesView(self)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for key, _ in self._items():
+            yield key
+
+    def __contains__(self, key):
+        return self.search(key) is not None
+
+    def __getitem__(self, key):
+        index = self.search(key)
+        if index is None:
+            raise KeyError(key)
+        return self._value(index)
+
+    def __setitem__(self, key, value):
+        self.insert(key, value)
+
+    def __delitem__(self, key):
+        if not self.delete(key):
+            raise KeyError(key)
+
+    def add(self, key):
+        """Inserts the key (with the value None) if it is not in the table yet, as set.add."""
+        if self.search(key) is None:
+            self.insert(key)
+
+    def discard(self, key):
+        """Removes the key if it is in the table, as set.discard."""
+        self.delete(key)
+
+    def clear(self):
+        """Removes every key, keeping the number of buckets."""
+        self._clear(self.size)
+        self.count = 0
+
+    def display(self):
+        """Displays every sub-table bucket by bucket, then the stash."""
+        bucket_size = self.bucket_size
+        for table in range(self.hash_count):
+            print(f'Table {table}:')
+            for bucket in range(self.size):
+                start = (table * self.size + bucket) * bucket_size
+                print(f'  {bucket}:', ' '.join(str(key) for key in self.slots[start:start + bucket_size]))
+        print('Stash:', [key for key, _ in self.stash])
+
+
+if __name__ == '__main__':
+    keys = [10, 22, 31, 4, 15, 28, 17, 88, 59]
+
+    # Two hash functions, one slot per bucket; seed=0 places the keys the same way on every run
+    print('Cuckoo hashing (2 tables of 11 buckets):')
+    table = CuckooHashTable(11, seed=0)
+    for key in keys:
+        table.insert(key)
+    table.display()
+    print('Search 88:', table.search(88))
+    table.delete(88)
+    print('Search 88 after deleting it:', table.search(88))
+    print(f'Load factor: {table.load_factor:.2f}, at most {table.max_probes} slots read per lookup')
+    print("\n")
+
+    # 4-way buckets fill to a much higher load before growing
+    print('Bucketized cuckoo hashing (2 tables of 2 buckets of 4 slots):')
+    bucketized = CuckooHashTable(2, bucket_size=4, seed=0)
+    for key in keys:
+        bucketized[key] = key * key
+    bucketized.display()
+    print('bucketized[59] =', bucketized[59], '- rehashes:', bucketized.rehashes)
@@ -4,76 +4,885 @@
 # using open addressing with the auxiliary hash function h'(k) = k. Illustrate the result of inserting these keys using linear probing, using quadratic probing with
 # c1 = 1 and c2 = 3, and using double hashing with h1(k) = k and h2(k) = 1 + (k mod (m - 1)).
 
+from array import array
+from collections.abc import MutableMapping
+
+from binary_format import numbers, read_file, write_file
+from hash_functions import MASK64, prehash, random_seed, seeded_hash
+from mapping_views import StorageItemsView, StorageValuesView
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: the bulk operations fall back to per-key probing
+    np = None
+
+LINEAR = 'linear'
+QUADRATIC = 'quadratic'
+DOUBLE_HASHING = 'double_hashing'
+ROBIN_HOOD = 'robin_hood'
+HOPSCOTCH = 'hopscotch'
+
+
+class _Deleted:
+    """ Marker type of the tombstone left in a slot after a deletion """
+    def __repr__(self):
+        return 'DELETED'
+
+
+# Tombstone: a deleted slot keeps the probe sequences of the other keys unbroken
+DELETED = _Deleted()
+
+
+class ArrayStorage:
+    """ 
+    Compact slot storage for integer keys: the keys live in an array('q') (8 bytes per slot)
+    and the slot states in a bytearray (1 byte per slot) instead of a list of boxed ints.
+    Reading or writing a slot uses the same values as the list backend (None, DELETED or the key),
+    so the probing code works unchanged against either backend. 
+    """
+    EMPTY = 0
+    OCCUPIED = 1
+    REMOVED = 2
 
-class HashTable:
     def __init__(self, size):
-        """ Initializes the hash table with a fixed size and fills it with None """
+        self.keys = array('q', bytes(8 * size))
+        self.states = bytearray(size)
+
+    @classmethod
+    def from_buffers(cls, keys, states):
+        """ 
+        Storage over existing key and state buffers (arrays, or read-only memoryviews of a mapped file,
+        in which case writing a slot raises TypeError). 
+        """
+        storage = cls.__new__(cls)
+        storage.keys = keys
+        storage.states = states
+        return storage
+
+    def __len__(self):
+        return len(self.states)
+
+    def __getitem__(self, index):
+        state = self.states[index]
+        if state == self.OCCUPIED:
+            return self.keys[index]
+        return None if state == self.EMPTY else DELETED
+
+    def __setitem__(self, index, key):
+        if key is None:
+            self.states[index] = self.EMPTY
+        elif key is DELETED:
+            self.states[index] = self.REMOVED
+        else:
+            self.keys[index] = key
+            self.states[index] = self.OCCUPIED
+
+    def __iter__(self):
+        for index in range(len(self.states)):
+            yield self[index]
+
+    def nbytes(self):
+        """ Memory used by the slot buffers, in bytes """
+        return self.keys.itemsize * len(self.keys) + len(self.states)
+
+
+def is_prime(n):
+    """ Returns True if n is a prime number """
+    if n < 2:
+        return False
+    if n % 2 == 0:
+        return n == 2
+    d = 3
+    while d * d <= n:
+        if n % d == 0:
+            return False
+        d += 2
+    return True
+
+
+def next_prime(n):
+    """ Returns the smallest prime greater than or equal to n """
+    while not is_prime(n):
+        n += 1
+    return n
+
+
+def next_power_of_two(n):
+    """ Returns the smallest power of two greater than or equal to n """
+    return 1 << max(0, n - 1).bit_length()
+
+
+# First bytes of the files written by HashTable.save
+_MAGIC = b'HTOPEN\x00\x01'
+
+
+class HashTable(MutableMapping):
+    def __init__(self, size, max_load_factor=0.75, capacity='prime', tombstone_ratio=0.25, storage='list',
+                 neighborhood=32, hash_function=None, seed=None, value_type=None):
+        """ 
+        Initializes the hash table with a fixed size and fills it with None.
+        With storage='array' the slots are kept in an ArrayStorage (64-bit integer keys only),
+        which takes 9 bytes per slot instead of a list pointer plus an int object.
+        When (keys + tombstones) / size goes above `max_load_factor` the table is rebuilt,
+        growing to the next prime (or power of two, with capacity='power_of_two') above twice its size.
+        Deletions leave tombstones, which are purged once they take more than `tombstone_ratio` of the slots.
+        `neighborhood` (at most 64) is the number of slots, starting at its home slot, where hopscotch hashing keeps a key.
+        Keys are hashed with `hash_function` (default: the int itself, hash() for other keys), then mixed
+        with `seed` against collision flooding: a random seed of the table by default (see
+        hash_functions.random_seed); seed=0 leaves the key hash unmixed, as in the exercises.
+        Each key has a value; with storage='array', `value_type` is the array typecode of the values
+        (e.g. 'q' or 'd'), otherwise they are kept in a list.
+        """
+        if capacity not in ('prime', 'power_of_two'):
+            raise ValueError("capacity must be 'prime' or 'power_of_two'")
+        if storage not in ('list', 'array'):
+            raise ValueError("storage must be 'list' or 'array'")
+        if not 1 <= neighborhood <= 64:
+            raise ValueError("neighborhood must be between 1 and 64")
+        self.storage = storage
+        self.max_load_factor = max_load_factor
+        self.capacity = capacity
+        self.tombstone_ratio = tombstone_ratio
+        self.neighborhood = neighborhood
+        self.hash_function = hash_function
+        self.seed = random_seed() if seed is None else seed
+        self.value_type = value_type if storage == 'array' else None
+        # Probing strategy used by the keys currently stored in the table
+        self.method = None
+        self.c1 = None
+        self.c2 = None
+        self._clear(size)
+
+    def _clear(self, size):
+        """ Empties the table, giving it size slots """
         self.size = size
-        self.table = [None] * size
+        self.table = self._new_table(size)
+        if self.value_type:
+            self.slot_values = array(self.value_type, bytes(array(self.value_type).itemsize * size))
+        else:
+            self.slot_values = [None] * size
+        # Hopscotch hashing: bit i of hop_info[j] is set when slot j + i holds a key whose home slot is j
+        self.hop_info = array('Q', bytes(8 * size)) if self.method == HOPSCOTCH else None
+        self.count = 0
+        self.tombstones = 0
     
+    def _new_table(self, size):
+        """ Allocates size empty slots in the configured storage backend """
+        if self.storage == 'array':
+            return ArrayStorage(size)
+        return [None] * size
+
+    def _put(self, index, key, value):
+        """ Stores the key and its value in a slot """
+        self.table[index] = key
+        self.slot_values[index] = 0 if value is None and self.value_type else value
+
+    def _move(self, source, target):
+        """ Moves the key and the value of the source slot into the (empty) target slot """
+        self.table[target] = self.table[source]
+        self.slot_values[target] = self.slot_values[source]
+        self._erase(source, None)
+
+    def _erase(self, index, marker):
+        """ Empties a slot, leaving the marker (None or DELETED) in it """
+        self.table[index] = marker
+        self.slot_values[index] = 0 if self.value_type else None
+
+    @property
+    def load_factor(self):
+        """ Fraction of the slots holding a key """
+        return self.count / self.size
+
+    def key_hash(self, k):
+        """ 
+        Integer the table positions are computed from: hash_function(k) (by default k itself for an int),
+        mixed with the seed unless it is 0. 
+        """
+        h = self.hash_function(k) if self.hash_function else prehash(k)
+        if self.seed:
+            return seeded_hash(h, self.seed)
+        return h
+
     def hash_default(self, k):
         """ 
         Primary hash function that determines the base position where the key should be inserted.
-        Returns the calculated index as k % table size. 
+        Returns the calculated index as h(k) % table size, where h is key_hash. 
         """
-        return k % self.size
+        return self.key_hash(k) % self.size
     
     def hash_alternative(self, k):
         """ 
         Secondary hash function used for double hashing. 
-        Returns an offset based on 1 + (k % (m - 1)), ensuring a larger jump 
+        Returns an offset based on 1 + (h(k) % (m - 1)), ensuring a larger jump 
         and helping to better distribute the elements. 
         """
-        return 1 + (k % (self.size - 1))
+        return 1 + (self.key_hash(k) % (self.size - 1))
+
+    def _use_method(self, method, c1=None, c2=None):
+        """ 
+        Checks that the operation uses the same probing strategy as the stored keys,
+        since a key can only be found again by following the sequence it was inserted with. 
+        An empty table adopts the strategy of the operation.
+        """
+        if (method, c1, c2) == (self.method, self.c1, self.c2):
+            return
+        if self.count:
+            raise ValueError(f"table holds keys inserted with {self.method} probing, not {method}")
+        self.method, self.c1, self.c2 = method, c1, c2
+        self._clear(self.size)
+
+    def _probe_sequence(self, key):
+        """ 
+        Yields the slots visited for the key with the table's probing strategy.
+        The sequence is bounded by the table size so a full table can never loop forever. 
+        """
+        index = self.hash_default(key)
+        size = self.size
+        if self.method in (LINEAR, ROBIN_HOOD, HOPSCOTCH):
+            # Robin Hood and hopscotch hashing place the keys along the linear probe sequence
+            for i in range(size):
+                yield (index + i) % size
+        elif self.method == QUADRATIC:
+            c1, c2 = self.c1, self.c2
+            for i in range(size):
+                # int() allows fractional constants such as c1 = c2 = 1/2 (triangular numbers)
+                yield int(index + c1 * i + c2 * i**2) % size
+        else:
+            step = self.hash_alternative(key)
+            if self.capacity == 'power_of_two':
+                step |= 1  # An odd step is coprime with a power of two, so every slot is visited
+            for i in range(size):
+                yield (index + i * step) % size
+
+    def _insert(self, key, value=None):
+        """ 
+        Stores the key and its value with the table's strategy (replacing the value of a present key),
+        growing the table past the max load factor.
+        Raises OverflowError if no free slot can be found and the table cannot grow. 
+        """
+        if self.method == ROBIN_HOOD:
+            inserted = self._insert_robin_hood(key, value)
+        elif self.method == HOPSCOTCH:
+            inserted = self._insert_hopscotch(key, value)
+        else:
+            inserted = self._insert_probing(key, value)
+        if inserted is None:
+            if self.max_load_factor >= 1:
+                raise OverflowError(f"no free slot for key {key} after {self.size} probes")
+            # The probe sequence does not cover every slot (e.g. quadratic probing): grow and retry
+            self._grow()
+            self._insert(key, value)
+            return
+        if not inserted:
+            return  # The key was already present: only its value changed
+        self.count += 1
+        if self.count + self.tombstones > self.max_load_factor * self.size:
+            self._resize()
+
+    def _insert_probing(self, key, value):
+        """ 
+        Stores the key in the first empty slot (or reusable tombstone) of its probe sequence.
+        Returns True if it was stored, False if it was already present and None if no free slot was found. 
+        """
+        first_deleted = None
+        for index in self._probe_sequence(key):
+            slot = self.table[index]
+            if slot is None:
+                break
+            if slot is DELETED:
+                if first_deleted is None:
+                    first_deleted = index
+            elif slot == key:
+                self._put(index, key, value)
+                return False
+        else:
+            if first_deleted is None:
+                return None
+        if first_deleted is not None:
+            index = first_deleted
+            self.tombstones -= 1
+        self._put(index, key, value)
+        return True
+
+    def _insert_robin_hood(self, key, value):
+        """ 
+        Robin Hood hashing: linear probing where a key takes the slot of any resident that is closer
+        to its own home slot, and the evicted resident continues the probe. Keeping the distances
+        to home even bounds the longest probe sequences at high load factors. 
+        """
+        if self.count >= self.size:
+            return None
+        size = self.size
+        table = self.table
+        index = self.hash_default(key)
+        distance = 0
+        while True:
+            slot = table[index]
+            if slot is None:
+                self._put(index, key, value)
+                return True
+            if slot == key:
+                self._put(index, key, value)
+                return False
+            slot_distance = (index - self.hash_default(slot)) % size
+            if slot_distance < distance:
+                # The resident is richer (closer to home): swap and keep probing for it
+                slot_value = self.slot_values[index]
+                self._put(index, key, value)
+                key, value, distance = slot, slot_value, slot_distance
+            index = (index + 1) % size
+            distance += 1
+
+    def _insert_hopscotch(self, key, value):
+        """ 
+        Hopscotch hashing: every key is kept within `neighborhood` slots of its home slot.
+        The first empty slot found by linear probing is moved back towards the home slot by
+        displacing keys that stay inside their own neighborhood. 
+        """
+        index = self._search_hopscotch(key)
+        if index is not None:
+            self._put(index, key, value)
+            return False
+        size = self.size
+        table = self.table
+        hop_info = self.hop_info
+        neighborhood = min(self.neighborhood, size)
+        home = self.hash_default(key)
+        for distance in range(size):
+            free = (home + distance) % size
+            if table[free] is None:
+                break
+        else:
+            return None
+        while distance >= neighborhood:
+            # Look, from the farthest bucket, for a key before the free slot that can move into it
+            for back in range(neighborhood - 1, 0, -1):
+                bucket = (free - back) % size
+                bits = hop_info[bucket]
+                offset = (bits & -bits).bit_length() - 1
+                if bits and offset < back:
+                    moved = (bucket + offset) % size
+                    self._move(moved, free)
+                    hop_info[bucket] ^= (1 << offset) | (1 << back)
+                    free = moved
+                    distance -= back - offset
+                    break
+            else:
+                return None  # No key can be displaced: the table must grow
+        self._put(free, key, value)
+        hop_info[home] |= 1 << distance
+        return True
+
+    def _search(self, key):
+        """ Returns the slot index of the key, or None if it is not in the table """
+        if self.method == ROBIN_HOOD:
+            return self._search_robin_hood(key)
+        if self.method == HOPSCOTCH:
+            return self._search_hopscotch(key)
+        for index in self._probe_sequence(key):
+            slot = self.table[index]
+            if slot is None:
+                return None
+            if slot is not DELETED and slot == key:
+                return index
+        return None
+
+    def _search_robin_hood(self, key):
+        """ Linear search that stops at the first resident closer to its home than the key would be """
+        size = self.size
+        table = self.table
+        index = self.hash_default(key)
+        for distance in range(size):
+            slot = table[index]
+            if slot is None:
+                return None
+            if slot == key:
+                return index
+            if (index - self.hash_default(slot)) % size < distance:
+                return None
+            index = (index + 1) % size
+        return None
+
+    def _search_hopscotch(self, key):
+        """ Checks only the slots of the home neighborhood that hold keys of this home slot """
+        home = self.hash_default(key)
+        bits = self.hop_info[home]
+        while bits:
+            lowest = bits & -bits
+            index = (home + lowest.bit_length() - 1) % self.size
+            if self.table[index] == key:
+                return index
+            bits ^= lowest
+        return None
+
+    def _delete(self, key):
+        """ 
+        Removes the key and purges the tombstones when there are too many.
+        Returns True if the key was found. 
+        """
+        index = self._search(key)
+        if index is None:
+            return False
+        self.count -= 1
+        if self.method == ROBIN_HOOD:
+            self._shift_backward(index)
+        elif self.method == HOPSCOTCH:
+            home = self.hash_default(key)
+            self.hop_info[home] &= ~(1 << ((index - home) % self.size))
+            self._erase(index, None)
+        else:
+            self._erase(index, DELETED)
+            self.tombstones += 1
+            if self.tombstones > self.tombstone_ratio * self.size:
+                self._rehash(self.size)
+        return True
+
+    def _shift_backward(self, index):
+        """ 
+        Robin Hood deletion without tombstones: the following keys that are not in their
+        home slot are moved back by one until an empty slot or a key at home is reached. 
+        """
+        size = self.size
+        table = self.table
+        next_index = (index + 1) % size
+        while True:
+            slot = table[next_index]
+            if slot is None or self.hash_default(slot) == next_index:
+                break
+            self._move(next_index, index)
+            index = next_index
+            next_index = (next_index + 1) % size
+        self._erase(index, None)
+
+    def _resize(self):
+        """ 
+        Grows the table when the keys alone fill more than half of the allowed load,
+        otherwise just rebuilds it in place to drop the tombstones. 
+        """
+        if self.count > self.max_load_factor * self.size / 2:
+            self._grow()
+        else:
+            self._rehash(self.size)
+
+    def _grown_size(self, size):
+        """ Returns the next prime or power of two above twice the size """
+        if self.capacity == 'prime':
+            return next_prime(2 * size + 1)
+        return next_power_of_two(2 * size)
+
+    def _grow(self):
+        """ Rehashes into the next prime or power of two above twice the current size """
+        self._rehash(self._grown_size(self.size))
+
+    def _reserve(self, extra):
+        """ 
+        Rehashes ahead of a batch so that `extra` more keys fit without crossing the max load factor,
+        growing by the same steps as one key at a time. 
+        """
+        if self.max_load_factor >= 1 or self.count + self.tombstones + extra <= self.max_load_factor * self.size:
+            return
+        size = self.size
+        while self.count + extra > self.max_load_factor * size:
+            size = self._grown_size(size)
+        self._rehash(size)
+
+    def _rehash(self, new_size):
+        """ Reinserts every live key into a new table of new_size slots, dropping the tombstones """
+        items = list(self._items())
+        self._clear(new_size)
+        for key, value in items:
+            self._insert(key, value)
     
-    def insert_linear(self, key):
+    def insert_linear(self, key, value=None):
         """ 
         Insertion using linear probing. 
         If a collision occurs, the next available position is searched sequentially (i + 1). 
         """
-        index = self.hash_default(key)
-        i = 0
-        while self.table[(index + i) % self.size] is not None:
-            i += 1  # Increments to check the next position
-        self.table[(index + i) % self.size] = key
+        self._use_method(LINEAR)
+        self._insert(key, value)
     
-    def insert_quadratic(self, key, c1, c2):
+    def insert_quadratic(self, key, c1, c2, value=None):
         """ 
         Insertion using quadratic probing. 
         If a collision occurs, the offset grows quadratically (c1 * i + c2 * i²). 
         """
-        index = self.hash_default(key)
-        i = 0
-        while self.table[(index + c1 * i + c2 * i**2) % self.size] is not None:
-            i += 1  # Increments to try a new position
-        self.table[(index + c1 * i + c2 * i**2) % self.size] = key
+        self._use_method(QUADRATIC, c1, c2)
+        self._insert(key, value)
     
-    def insert_double_hashing(self, key):
+    def insert_double_hashing(self, key, value=None):
         """ 
         Insertion using double hashing. 
         If a collision occurs, a new offset is calculated using a second hash function. 
         """
-        index = self.hash_default(key)
-        step = self.hash_alternative(key)
-        i = 0
-        while self.table[(index + i * step) % self.size] is not None:
-            i += 1  # Increments to test a new position
-        self.table[(index + i * step) % self.size] = key
+        self._use_method(DOUBLE_HASHING)
+        self._insert(key, value)
+
+    def search_linear(self, key):
+        """ Returns the index where the key was stored with linear probing, or None """
+        self._use_method(LINEAR)
+        return self._search(key)
+
+    def search_quadratic(self, key, c1, c2):
+        """ Returns the index where the key was stored with quadratic probing, or None """
+        self._use_method(QUADRATIC, c1, c2)
+        return self._search(key)
+
+    def search_double_hashing(self, key):
+        """ Returns the index where the key was stored with double hashing, or None """
+        self._use_method(DOUBLE_HASHING)
+        return self._search(key)
+
+    def delete_linear(self, key):
+        """ Deletes a key stored with linear probing, leaving a tombstone in its slot """
+        self._use_method(LINEAR)
+        self._delete(key)
+
+    def delete_quadratic(self, key, c1, c2):
+        """ Deletes a key stored with quadratic probing, leaving a tombstone in its slot """
+        self._use_method(QUADRATIC, c1, c2)
+        self._delete(key)
+
+    def delete_double_hashing(self, key):
+        """ Deletes a key stored with double hashing, leaving a tombstone in its slot """
+        self._use_method(DOUBLE_HASHING)
+        self._delete(key)
     
+    def insert_robin_hood(self, key, value=None):
+        """ 
+        Insertion using Robin Hood hashing. 
+        Linear probing where the key takes the slot of a resident that is closer to its home slot. 
+        """
+        self._use_method(ROBIN_HOOD)
+        self._insert(key, value)
+
+    def insert_hopscotch(self, key, value=None):
+        """ 
+        Insertion using hopscotch hashing. 
+        The key is stored within `neighborhood` slots of its home slot, moving other keys if needed. 
+        """
+        self._use_method(HOPSCOTCH)
+        self._insert(key, value)
+
+    def search_robin_hood(self, key):
+        """ Returns the index where the key was stored with Robin Hood hashing, or None """
+        self._use_method(ROBIN_HOOD)
+        return self._search(key)
+
+    def search_hopscotch(self, key):
+        """ Returns the index where the key was stored with hopscotch hashing, or None """
+        self._use_method(HOPSCOTCH)
+        return self._search(key)
+
+    def delete_robin_hood(self, key):
+        """ Deletes a key stored with Robin Hood hashing, shifting the following keys back """
+        self._use_method(ROBIN_HOOD)
+        self._delete(key)
+
+    def delete_hopscotch(self, key):
+        """ Deletes a key stored with hopscotch hashing """
+        self._use_method(HOPSCOTCH)
+        self._delete(key)
+
+    def insert_many(self, keys, method=DOUBLE_HASHING, c1=None, c2=None):
+        """ 
+        Inserts a batch of keys with the given probing strategy.
+        With NumPy and storage='array', the home slots of the whole batch are hashed at once and every key
+        whose home slot is empty (and not claimed by another key of the batch) is written in one scatter;
+        only the collided remainder is probed key by key. Hopscotch hashing is always inserted key by key,
+        since its keys need their neighborhood bits, and so is a table with a custom hash_function. 
+        """
+        self._use_method(method, c1, c2)
+        if np is None or self.storage != 'array' or method == HOPSCOTCH or self.hash_function is not None:
+            for key in keys:
+                self._insert(key)
+            return
+        keys = np.unique(np.asarray(keys, dtype=np.int64))
+        self._reserve(len(keys))
+        states = np.frombuffer(self.table.states, dtype=np.uint8)
+        slots = np.frombuffer(self.table.keys, dtype=np.int64)
+        home = self._home_slots(keys)
+        # An empty home slot means the key is not in the table yet
+        direct = np.zeros(len(keys), dtype=bool)
+        direct[np.unique(home, return_index=True)[1]] = True
+        direct &= states[home] == ArrayStorage.EMPTY
+        slots[home[direct]] = keys[direct]
+        states[home[direct]] = ArrayStorage.OCCUPIED
+        self.count += int(np.count_nonzero(direct))
+        del states, slots  # Release the views on the table buffers
+        for key in keys[~direct].tolist():
+            self._insert(key)
+
+    def _home_slots(self, keys):
+        """ hash_default of a NumPy int64 array of keys, with the same (optionally seeded) hashing """
+        if not self.seed:
+            return keys % self.size
+        # SplitMix64 on uint64, whose arithmetic wraps modulo 2^64 like hash_functions.mix64
+        x = keys.astype(np.uint64) ^ np.uint64(self.seed & MASK64)
+        x ^= x >> np.uint64(30)
+        x *= np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(27)
+        x *= np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+        return (x % np.uint64(self.size)).astype(np.int64)
+
+    def contains_many(self, keys):
+        """ 
+        Returns a boolean mask telling which of the keys are in the table
+        (a NumPy array when NumPy is installed, a list otherwise).
+        Keys found in, or ruled out by, their home slot are resolved vectorized; the rest are probed one by one. 
+        """
+        if np is None:
+            return [self.count > 0 and self._search(key) is not None for key in keys]
+        # With hopscotch hashing an empty home slot does not rule a key out
+        if self.storage != 'array' or self.method == HOPSCOTCH or self.hash_function is not None:
+            keys = list(keys)
+            return np.fromiter((self.count > 0 and self._search(key) is not None for key in keys),
+                               dtype=bool, count=len(keys))
+        keys = np.asarray(keys, dtype=np.int64)
+        if self.count == 0:
+            return np.zeros(len(keys), dtype=bool)
+        states = np.frombuffer(self.table.states, dtype=np.uint8)
+        slots = np.frombuffer(self.table.keys, dtype=np.int64)
+        home = self._home_slots(keys)
+        home_states = states[home]
+        found = (home_states == ArrayStorage.OCCUPIED) & (slots[home] == keys)
+        collided = np.flatnonzero(~found & (home_states != ArrayStorage.EMPTY))
+        del states, slots
+        for i in collided.tolist():
+            found[i] = self._search(int(keys[i])) is not None
+        return found
+
+    def probe_length(self, key):
+        """ 
+        Returns the number of slots a search for the key visits,
+        counting the empty slot that ends an unsuccessful search. 
+        """
+        if self.method == HOPSCOTCH:
+            # Only the neighborhood slots flagged for the home slot are compared
+            home = self.hash_default(key)
+            bits = self.hop_info[home]
+            index = self._search_hopscotch(key)
+            if index is None:
+                return max(1, bin(bits).count('1'))
+            return bin(bits & ((2 << ((index - home) % self.size)) - 1)).count('1')
+        probes = 0
+        for distance, index in enumerate(self._probe_sequence(key)):
+            probes += 1
+            slot = self.table[index]
+            if slot is None or (slot is not DELETED and slot == key):
+                break
+            if self.method == ROBIN_HOOD and (index - self.hash_default(slot)) % self.size < distance:
+                break
+        return probes
+
+    def probe_stats(self, absent_keys=None):
+        """ 
+        Measures the probe sequences of the current contents of the table:
+        - probe_histogram: {probes needed to find a key: number of keys}
+        - max_probe / avg_successful: longest and average successful search cost
+        - avg_unsuccessful: average cost of searching each of absent_keys (by default, as many absent keys
+          as slots: the ints above the largest stored key when the keys are ints, so that every home slot is
+          tried once without a seed, tuples otherwise; pass them when hash_function cannot hash those)
+        - primary clusters: runs of consecutive non-empty slots
+        - secondary clusters: groups of keys sharing the same home slot, hence the same probe sequence 
+        """
+        keys = [slot for slot in self.table if slot is not None and slot is not DELETED]
+        histogram = {}
+        homes = {}
+        for key in keys:
+            probes = self.probe_length(key)
+            histogram[probes] = histogram.get(probes, 0) + 1
+            home = self.hash_default(key)
+            homes[home] = homes.get(home, 0) + 1
+
+        if absent_keys is None:
+            if all(type(key) is int for key in keys):
+                start = max(keys) + 1 if keys else 0
+                absent_keys = range(start, start + self.size)
+            else:
+                stored = set(keys)
+                absent_keys = [key for key in (('absent', i) for i in range(self.size)) if key not in stored]
+        unsuccessful = [self.probe_length(key) for key in absent_keys] if self.method else [1]
+
+        # Runs of non-empty slots, joining the run that wraps around the end of the table
+        runs = []
+        run = 0
+        for slot in self.table:
+            if slot is None:
+                if run:
+                    runs.append(run)
+                run = 0
+            else:
+                run += 1
+        if run:
+            if runs and self.table[0] is not None:
+                runs[0] += run
+            else:
+                runs.append(run)
+
+        groups = list(homes.values())
+        return {
+            'keys': len(keys),
+            'size': self.size,
+            'load_factor': self.load_factor,
+            'probe_histogram': dict(sorted(histogram.items())),
+            'max_probe': max(histogram, default=0),
+            'avg_successful': sum(p * n for p, n in histogram.items()) / len(keys) if keys else 0.0,
+            'avg_unsuccessful': sum(unsuccessful) / len(unsuccessful) if unsuccessful else 0.0,
+            'primary_clusters': len(runs),
+            'primary_cluster_max': max(runs, default=0),
+            'primary_cluster_mean': sum(runs) / len(runs) if runs else 0.0,
+            'secondary_cluster_max': max(groups, default=0),
+            'secondary_cluster_mean': sum(groups) / len(groups) if groups else 0.0,
+        }
+
+    def _items(self):
+        # The (key, value) pairs stored in the table, in slot order
+        for index, key in enumerate(self.table):
+            if key is not None and key is not DELETED:
+                yield key, self.slot_values[index]
+
+    def items(self):
+        """ View of the (key, value) pairs stored in the table, in slot order """
+        return StorageItemsView(self)
+
+    def values(self):
+        """ View of the values stored in the table, in slot order (slot_values holds the value of every slot) """
+        return StorageValuesView(self)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for key, _ in self._items():
+            yield key
+
+    def __contains__(self, key):
+        return self._search(key) is not None
+
+    def __getitem__(self, key):
+        index = self._search(key)
+        if index is None:
+            raise KeyError(key)
+        return self.slot_values[index]
+
+    def __setitem__(self, key, value):
+        """ Inserts or updates the key with the table's strategy (double hashing for an empty table) """
+        if self.method is None:
+            self._use_method(DOUBLE_HASHING)
+        self._insert(key, value)
+
+    def __delitem__(self, key):
+        if not self._delete(key):
+            raise KeyError(key)
+
+    def add(self, key):
+        """ Inserts the key (with the value None) if it is not in the table yet, as set.add """
+        if self._search(key) is None:
+            self[key] = None
+
+    def discard(self, key):
+        """ Removes the key if it is in the table, as set.discard """
+        self._delete(key)
+
+    def clear(self):
+        """ Removes every key, keeping the size and the probing strategy of the table """
+        self._clear(self.size)
+
+    def get(self, key, default=None):
+        """ Returns the value of the key, or default if it is not in the table """
+        index = self._search(key)
+        if index is None:
+            return default
+        return self.slot_values[index]
+
+    def save(self, path):
+        """ 
+        Writes the table to a binary file, slot by slot: the key array and the state bytes of the slots
+        (as in ArrayStorage), the values and the hopscotch bits, so that load needs no rehashing.
+        Int keys and int or float values are stored as 64-bit arrays, other keys and values as pickles.
+        The hash_function is not stored: pass it again to load. 
+        """
+        occupied = ArrayStorage.OCCUPIED
+        if self.storage == 'array':
+            keys, states = self.table.keys, self.table.states
+        else:
+            states = bytearray(ArrayStorage.EMPTY if slot is None else
+                               ArrayStorage.REMOVED if slot is DELETED else occupied for slot in self.table)
+            slots = [slot if state == occupied else None for slot, state in zip(self.table, states)]
+            keys = numbers(0 if slot is None else slot for slot in slots)
+            if keys is None:
+                keys = slots
+        sections = {'keys': keys, 'states': states}
+        if self.value_type:
+            sections['values'] = self.slot_values
+        elif any(value is not None for value in self.slot_values):
+            # Empty slots hold 0 in an array of values, so that they can be served from a mapped file
+            values = numbers(value if state == occupied else 0 for value, state in zip(self.slot_values, states))
+            if values is None:
+                values = [value if state == occupied else None for value, state in zip(self.slot_values, states)]
+            sections['values'] = values
+        if self.hop_info is not None:
+            sections['hop_info'] = self.hop_info
+        header = {name: getattr(self, name) for name in (
+            'size', 'max_load_factor', 'capacity', 'tombstone_ratio', 'storage', 'neighborhood', 'seed',
+            'value_type', 'method', 'c1', 'c2', 'count', 'tombstones')}
+        write_file(path, _MAGIC, header, sections)
+
+    @classmethod
+    def load(cls, path, mmap=False, hash_function=None):
+        """ 
+        Reads a table written by save; hash_function must be the one the table was saved with.
+        With mmap=True the slots and the numeric values are not copied: they stay in the memory-mapped file,
+        so loading takes constant time and the searches read the pages they reach. Such a table is read-only
+        (writing to it raises TypeError) and needs int keys, otherwise ValueError is raised.
+        Keys and values that are not numbers are read with pickle.loads, which can run arbitrary code:
+        only load files from a trusted source. 
+        """
+        header, sections = read_file(path, _MAGIC, mmap)
+        table = cls(1, header['max_load_factor'], header['capacity'], header['tombstone_ratio'], header['storage'],
+                    header['neighborhood'], hash_function, header['seed'], header['value_type'])
+        table.method, table.c1, table.c2 = header['method'], header['c1'], header['c2']
+        table.size, table.count, table.tombstones = header['size'], header['count'], header['tombstones']
+        keys, states = sections['keys'], sections['states']
+        values = sections.get('values')
+        if mmap:
+            if isinstance(keys, list):
+                raise ValueError("only tables of int keys can be memory-mapped")
+            table.storage = 'array'
+        if table.storage == 'array':
+            table.table = ArrayStorage.from_buffers(keys, states)
+        else:
+            table.table = [key if state == ArrayStorage.OCCUPIED else
+                           None if state == ArrayStorage.EMPTY else DELETED for key, state in zip(keys, states)]
+        if values is None:
+            table.slot_values = [None] * table.size
+        elif not mmap and not table.value_type:
+            table.slot_values = [value if state == ArrayStorage.OCCUPIED else None for value, state in zip(values, states)]
+        else:
+            table.slot_values = values
+        table.hop_info = sections.get('hop_info')
+        return table
+
     def display(self):
         """ Displays the hash table showing the index and the stored value """
         for i, key in enumerate(self.table):
-            print(f'Index {i}: {key}')
+            value = self.slot_values[i]
+            if value is None or key is None or key is DELETED:
+                print(f'Index {i}: {key}')
+            else:
+                print(f'Index {i}: {key} -> {value}')
 
 
 if __name__ == '__main__':
     # Definition of the table size and set of keys
+    # A max load factor of 1 keeps the table at m = 11, and seed=0 hashes with h'(k) = k, as in the exercise
     table_size = 11
     keys = [10, 22, 31, 4, 15, 28, 17, 88, 59]
 
     # Insertion using linear probing
     print("Linear Probing:")
-    linear_table = HashTable(table_size)
+    linear_table = HashTable(table_size, max_load_factor=1.0, seed=0)
     for key in keys:
         linear_table.insert_linear(key)
     linear_table.display()
@@ -81,7 +890,7 @@ if __name__ == '__main__':
 
     # Insertion using quadratic probing
     print("Quadratic Probing:")
-    quadratic_table = HashTable(table_size)
+    quadratic_table = HashTable(table_size, max_load_factor=1.0, seed=0)
     for key in keys:
         quadratic_table.insert_quadratic(key, 1, 3)
     quadratic_table.display()
@@ -89,7 +898,50 @@ if __name__ == '__main__':
 
     # Insertion using double hashing
     print("Double Hashing:")
-    double_hash_table = HashTable(table_size)
+    double_hash_table = HashTable(table_size, max_load_factor=1.0, seed=0)
     for key in keys:
         double_hash_table.insert_double_hashing(key)
     double_hash_table.display()
+    print("\n")
+
+    # Search and deletion using double hashing
+    print("Search 88:", double_hash_table.search_double_hashing(88))
+    double_hash_table.delete_double_hashing(88)
+    print("Search 88 after deleting it:", double_hash_table.search_double_hashing(88))
+    print("Search 59:", double_hash_table.search_double_hashing(59))
+    print("\n")
+
+    # Insertion using Robin Hood hashing
+    print("Robin Hood Hashing:")
+    robin_hood_table = HashTable(table_size, max_load_factor=1.0, seed=0)
+    for key in keys:
+        robin_hood_table.insert_robin_hood(key)
+    robin_hood_table.display()
+    print("\n")
+
+    # Insertion using hopscotch hashing with a neighborhood of 4 slots
+    print("Hopscotch Hashing:")
+    hopscotch_table = HashTable(table_size, max_load_factor=1.0, neighborhood=4, seed=0)
+    for key in keys:
+        hopscotch_table.insert_hopscotch(key)
+    hopscotch_table.display()
+    print("\n")
+
+    # Map with string keys, hashed with the random seed of the table
+    print("Map with string keys:")
+    words = HashTable(table_size)
+    for word in ['red', 'black', 'tree', 'hash', 'table']:
+        words[word] = len(word)
+    print("words['tree'] =", words['tree'])
+    del words['hash']
+    print("words.get('hash') =", words.get('hash'))
+    print(dict(words.items()))
+    print("\n")
+
+    # Binary file, loaded back or memory-mapped
+    import os
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(), 'table.hto')
+    double_hash_table.save(path)
+    print("Search 59 in the loaded table:", HashTable.load(path).search_double_hashing(59))
+    print("Search 59 in the mapped table:", HashTable.load(path, mmap=True).search_double_hashing(59))
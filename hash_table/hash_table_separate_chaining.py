@@ -1,43 +1,186 @@
-# Q.1: Implement search, insertion, and deletion algorithms in a hash table 
-# with collision handling using the separate chaining method. 
+# Q.1: Implement search, insertion, and deletion algorithms in a hash table
+# with collision handling using the separate chaining method.
 # Demonstrate what happens when we insert the keys (5, 28, 19, 15, 20, 33, 12, 17, 10).
 # Assume that the table has a size of 9 and the hash function is h(k) = k mod 9.
 
-class HashTableSeparateChaining:
+import gc
+from array import array
+from collections.abc import MutableMapping
+
+from binary_format import numbers, read_file, write_file
+from hash_functions import prehash, random_seed, seeded_hash
+from mapping_views import StorageItemsView, StorageValuesView
+
+# First bytes of the files written by HashTableSeparateChaining.save and CompactChainingTable.save
+_MAGIC = b'HTCHAIN\x01'
+
+
+class HashTableSeparateChaining(MutableMapping):
     class Node:
-        def __init__(self, key):
+        # No per-node __dict__: a node takes 64 bytes instead of about 100
+        __slots__ = ('key', 'value', 'next')
+
+        def __init__(self, key, value=None):
             self.key = key
+            self.value = value
             self.next = None
-    
-    def __init__(self, size=9):
+
+    def __init__(self, size=9, max_load_factor=1.0, min_load_factor=0.25, rehash_step=4,
+                 hash_function=None, seed=None):
+        """
+        Initializes the hash table with `size` buckets.
+        The table grows when the load factor goes above `max_load_factor` and shrinks
+        (never below the initial size) when it goes below `min_load_factor`.
+        Resizing is incremental: each operation migrates `rehash_step` buckets
+        from the old table to the new one, so no single call rebuilds the whole table.
+        Keys are hashed with `hash_function` (default: the int itself, hash() for other keys), then mixed
+        with `seed` against collision flooding: a random seed of the table by default (see
+        hash_functions.random_seed); seed=0 leaves the key hash unmixed, as in the exercises.
+        """
+        if min_load_factor >= max_load_factor:
+            raise ValueError("min_load_factor must be smaller than max_load_factor")
         self.size = size
         self.table = [None] * size
-    
+        self.count = 0
+        self.max_load_factor = max_load_factor
+        self.min_load_factor = min_load_factor
+        self.rehash_step = max(1, rehash_step)
+        self._initial_size = size
+        self.hash_function = hash_function
+        self.seed = random_seed() if seed is None else seed
+        # State of an in-progress incremental rehash
+        self._old_table = None
+        self._old_size = 0
+        self._migrate_index = 0
+
+    def key_hash(self, key):
+        """Integer the bucket is computed from, mixed with the seed unless it is 0."""
+        h = self.hash_function(key) if self.hash_function else prehash(key)
+        if self.seed:
+            return seeded_hash(h, self.seed)
+        return h
+
     def hash(self, key):
         """Hash function to calculate the index of the key."""
-        return key % self.size
-    
-    def insert(self, key):
-        """Insert a key into the hash table."""
+        return self.key_hash(key) % self.size
+
+    @property
+    def load_factor(self):
+        """Number of stored keys per bucket."""
+        return self.count / self.size
+
+    @property
+    def bucket_count(self):
+        """Number of buckets of the (new) table."""
+        return self.size
+
+    @property
+    def longest_chain(self):
+        """Length of the longest chain, counting both tables during a rehash. O(n)."""
+        longest = 0
+        tables = [self.table]
+        if self._old_table is not None:
+            tables.append(self._old_table[self._migrate_index:])
+        for table in tables:
+            for curr_node in table:
+                length = 0
+                while curr_node is not None:
+                    length += 1
+                    curr_node = curr_node.next
+                longest = max(longest, length)
+        return longest
+
+    @property
+    def rehashing(self):
+        """True while buckets are still being moved from the old table."""
+        return self._old_table is not None
+
+    def _start_resize(self, new_size):
+        """Allocates the new table and starts moving buckets into it."""
+        if self._old_table is not None:
+            self._finish_rehash()
+        self._old_table = self.table
+        self._old_size = self.size
+        self._migrate_index = 0
+        self.size = new_size
+        self.table = [None] * new_size
+
+    def _rehash_step(self, buckets=None):
+        """Moves the next `buckets` buckets of the old table into the new table."""
+        if self._old_table is None:
+            return
+        end = min(self._old_size, self._migrate_index + (buckets or self.rehash_step))
+        for i in range(self._migrate_index, end):
+            curr_node = self._old_table[i]
+            # Relink the existing nodes at the head of their new bucket
+            while curr_node is not None:
+                next_node = curr_node.next
+                index = self.hash(curr_node.key)
+                curr_node.next = self.table[index]
+                self.table[index] = curr_node
+                curr_node = next_node
+            self._old_table[i] = None
+        self._migrate_index = end
+        if end == self._old_size:
+            self._old_table = None
+            self._old_size = 0
+            self._migrate_index = 0
+
+    def _finish_rehash(self):
+        """Moves all the remaining buckets of the old table."""
+        if self._old_table is not None:
+            self._rehash_step(self._old_size)
+
+    def _old_bucket(self, key):
+        """Returns the old-table bucket index of the key, or None if it was already migrated."""
+        if self._old_table is None:
+            return None
+        index = self.key_hash(key) % self._old_size
+        if index < self._migrate_index:
+            return None
+        return index
+
+    def _resize_if_needed(self):
+        """Starts growing or shrinking the table when the load factor leaves its bounds."""
+        if self.load_factor > self.max_load_factor:
+            self._start_resize(self.size * 2 + 1)
+        elif self.size > self._initial_size and self.load_factor < self.min_load_factor:
+            self._start_resize(max(self._initial_size, self.size // 2))
+
+    def insert(self, key, value=None):
+        """Insert a key into the hash table, or replace its value if it is already present."""
+        self._rehash_step()
+        # During a rehash the key may still live in the old table
+        old_index = self._old_bucket(key)
+        if old_index is not None:
+            curr_node = self._old_table[old_index]
+            while curr_node is not None:
+                if curr_node.key == key:
+                    curr_node.value = value
+                    return
+                curr_node = curr_node.next
         index = self.hash(key)
         if self.table[index] is None:
-            self.table[index] = self.Node(key)
+            self.table[index] = self.Node(key, value)
         else:
             curr_node = self.table[index]
             # Traverse the linked list to find the last node
             while curr_node.next is not None:
                 # If the key is already present
                 if curr_node.key == key:
+                    curr_node.value = value
                     return
                 curr_node = curr_node.next
             if curr_node.key == key:
+                curr_node.value = value
                 return
-            curr_node.next = self.Node(key)
+            curr_node.next = self.Node(key, value)
+        self.count += 1
+        self._resize_if_needed()
 
-    def remove(self, key):
-        """Remove a key from the hash table."""
-        index = self.hash(key)
-        curr_node = self.table[index]
+    def _remove_from(self, table, index, key):
+        """Unlinks the key from the chain table[index]. Returns True if it was found."""
+        curr_node = table[index]
         prev_node = None
         # Traverse the linked list to find the key
         while curr_node is not None:
@@ -45,37 +188,365 @@ class HashTableSeparateChaining:
             if curr_node.key == key:
                 # If the previous node is None, it means the key is the first node
                 if prev_node is None:
-                    self.table[index] = curr_node.next
+                    table[index] = curr_node.next
                 else:
                     prev_node.next = curr_node.next
-                return
+                return True
             # Move to the next node
             prev_node = curr_node
             curr_node = curr_node.next
+        return False
+
+    def remove(self, key):
+        """Remove a key from the hash table. Returns True if the key was found."""
+        self._rehash_step()
+        old_index = self._old_bucket(key)
+        removed = old_index is not None and self._remove_from(self._old_table, old_index, key)
+        if not removed:
+            removed = self._remove_from(self.table, self.hash(key), key)
+        if removed:
+            self.count -= 1
+            self._resize_if_needed()
+        return removed
 
     def print_table(self):
         """Print the hash table."""
+        self._finish_rehash()
         for i in range(self.size):
             print(f'{i}:', end=' ')
             curr_node = self.table[i]
             while curr_node is not None:
-                print(curr_node.key, end=' -> ' if curr_node.next is not None else '')
+                entry = curr_node.key if curr_node.value is None else f'{curr_node.key}:{curr_node.value}'
+                print(entry, end=' -> ' if curr_node.next is not None else '')
                 curr_node = curr_node.next
             print()
-    
-    def find(self, key):
-        """Find a key in the hash table."""
+
+    def _find_node(self, key):
+        """Returns the node holding the key, or None."""
+        self._rehash_step()
+        old_index = self._old_bucket(key)
+        if old_index is not None:
+            curr_node = self._old_table[old_index]
+            while curr_node is not None:
+                if curr_node.key == key:
+                    return curr_node
+                curr_node = curr_node.next
         index = self.hash(key)
         curr_node = self.table[index]
         while curr_node is not None:
             if curr_node.key == key:
-                return True
+                return curr_node
             curr_node = curr_node.next
-        return False
+        return None
+
+    def find(self, key):
+        """Find a key in the hash table."""
+        return self._find_node(key) is not None
+
+    def get(self, key, default=None):
+        """Returns the value of the key, or default if it is not in the table."""
+        node = self._find_node(key)
+        return default if node is None else node.value
+
+    def _items(self):
+        # The (key, value) pairs stored in the table, in both tables during a rehash
+        tables = [self.table]
+        if self._old_table is not None:
+            tables.append(self._old_table[self._migrate_index:])
+        for table in tables:
+            for curr_node in table:
+                while curr_node is not None:
+                    yield curr_node.key, curr_node.value
+                    curr_node = curr_node.next
+
+    def items(self):
+        """View of the (key, value) pairs stored in the table."""
+        return StorageItemsView(self)
+
+    def values(self):
+        """View of the values stored in the table."""
+        return StorageValuesView(self)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for key, _ in self._items():
+            yield key
+
+    def __contains__(self, key):
+        return self.find(key)
+
+    def __getitem__(self, key):
+        node = self._find_node(key)
+        if node is None:
+            raise KeyError(key)
+        return node.value
+
+    def __setitem__(self, key, value):
+        self.insert(key, value)
+
+    def __delitem__(self, key):
+        if not self.remove(key):
+            raise KeyError(key)
+
+    def add(self, key):
+        """Inserts the key (with the value None) if it is not in the table yet, as set.add."""
+        if not self.find(key):
+            self.insert(key)
+
+    def discard(self, key):
+        """Removes the key if it is in the table, as set.discard."""
+        self.remove(key)
+
+    def clear(self):
+        """Removes every key and goes back to the initial number of buckets."""
+        self.size = self._initial_size
+        self.table = [None] * self.size
+        self.count = 0
+        self._old_table = None
+        self._old_size = 0
+        self._migrate_index = 0
+
+    def probe_stats(self, absent_keys=None):
+        """
+        Measures the chains of the current contents of the table, with the same fields as
+        HashTable.probe_stats: a "probe" is a node visited (the empty bucket counts as one probe).
+        avg_unsuccessful averages the searches of absent_keys, or of one key per bucket by default.
+        Chains play the role of the secondary clusters; there is no primary clustering.
+        """
+        self._finish_rehash()
+        histogram = {}
+        lengths = []
+        for curr_node in self.table:
+            length = 0
+            while curr_node is not None:
+                length += 1
+                histogram[length] = histogram.get(length, 0) + 1
+                curr_node = curr_node.next
+            lengths.append(length)
+        chains = [length for length in lengths if length]
+        if absent_keys is None:
+            unsuccessful = [max(length, 1) for length in lengths]
+        else:
+            unsuccessful = [max(lengths[self.hash(key)], 1) for key in absent_keys]
+        return {
+            'keys': self.count,
+            'size': self.size,
+            'load_factor': self.load_factor,
+            'probe_histogram': dict(sorted(histogram.items())),
+            'max_probe': max(histogram, default=0),
+            'avg_successful': sum(p * n for p, n in histogram.items()) / self.count if self.count else 0.0,
+            'avg_unsuccessful': sum(unsuccessful) / len(unsuccessful) if unsuccessful else 0.0,
+            'primary_clusters': 0,
+            'primary_cluster_max': 0,
+            'primary_cluster_mean': 0.0,
+            'secondary_cluster_max': max(chains, default=0),
+            'secondary_cluster_mean': sum(chains) / len(chains) if chains else 0.0,
+        }
+
+    def compact(self):
+        """Returns a read-only CompactChainingTable copy of the table, for read-mostly workloads."""
+        self._finish_rehash()
+        return CompactChainingTable(self)
+
+    def save(self, path):
+        """Writes the table to a binary file, in the CSR layout of CompactChainingTable."""
+        self.compact().save(path)
+
+    @classmethod
+    def load(cls, path, mmap=False, hash_function=None):
+        """
+        Reads a table written by save; hash_function must be the one the table was saved with.
+        The chains are relinked bucket by bucket from the file, without hashing any key.
+        With mmap=True, returns instead a read-only CompactChainingTable served from the memory-mapped file.
+        Keys and values that are not numbers are read with pickle.loads: only load files from a trusted source.
+        """
+        compact = CompactChainingTable.load(path, mmap, hash_function)
+        if mmap:
+            return compact
+        table = cls(compact.size, compact.max_load_factor, compact.min_load_factor, compact.rehash_step,
+                    hash_function, compact.seed)
+        table._initial_size = compact.initial_size
+        keys = compact.keys.tolist() if isinstance(compact.keys, array) else compact.keys
+        values = compact.values
+        offsets = compact.offsets
+        Node = cls.Node
+        # The nodes hold no cycles: the garbage collector would only rescan them while they are created
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for i in range(compact.size):
+                next_node = None
+                for j in range(offsets[i + 1] - 1, offsets[i] - 1, -1):
+                    node = Node(keys[j], None if values is None else values[j])
+                    node.next = next_node
+                    next_node = node
+                table.table[i] = next_node
+        finally:
+            if enabled:
+                gc.enable()
+        table.count = compact.count
+        return table
+
+
+class CompactChainingTable:
+    """
+    Read-only separate chaining table with all the chains stored contiguously (CSR layout):
+    the keys of bucket i are keys[offsets[i]:offsets[i + 1]], with their values at the same positions.
+    Integer keys are kept in an array('q') and the values list is dropped when every value is None,
+    so an entry takes 8 to 16 bytes plus its share of the offsets instead of a 64-byte node, and
+    find scans a chain with a single C-level index() call instead of following next pointers.
+    """
+    # Same bucket computation as the table it was built from
+    key_hash = HashTableSeparateChaining.key_hash
+    hash = HashTableSeparateChaining.hash
+
+    def __init__(self, table):
+        self.size = table.size
+        self.hash_function = table.hash_function
+        self.seed = table.seed
+        keys = []
+        values = []
+        offsets = array('q', [0])
+        for curr_node in table.table:
+            while curr_node is not None:
+                keys.append(curr_node.key)
+                values.append(curr_node.value)
+                curr_node = curr_node.next
+            offsets.append(len(keys))
+        self.offsets = offsets
+        try:
+            self.keys = array('q', keys) if all(type(key) is int for key in keys) else keys
+        except OverflowError:
+            self.keys = keys  # Integers too large for 64 bits
+        self.values = None if all(value is None for value in values) else values
+        self.count = len(keys)
+        self.max_load_factor = table.max_load_factor
+        self.min_load_factor = table.min_load_factor
+        self.rehash_step = table.rehash_step
+        self.initial_size = table._initial_size
+
+    def _index(self, key):
+        """Returns the position of the key in the flat key array, or None."""
+        bucket = self.hash(key)
+        start, end = self.offsets[bucket], self.offsets[bucket + 1]
+        try:
+            if isinstance(self.keys, memoryview):
+                # A memoryview has no index(): the chain is copied out, which is short
+                return start + self.keys[start:end].tolist().index(key)
+            return self.keys.index(key, start, end)
+        except (ValueError, TypeError):
+            return None
+
+    def save(self, path):
+        """
+        Writes the table to a binary file: the offsets, the keys and the values, as 64-bit arrays when
+        the keys are ints and the values ints or floats, as pickles otherwise.
+        The hash_function is not stored: pass it again to load.
+        """
+        sections = {'offsets': self.offsets, 'keys': self.keys}
+        if self.values is not None:
+            values = numbers(self.values)
+            sections['values'] = self.values if values is None else values
+        header = {name: getattr(self, name) for name in (
+            'size', 'seed', 'count', 'max_load_factor', 'min_load_factor', 'rehash_step', 'initial_size')}
+        write_file(path, _MAGIC, header, sections)
+
+    @classmethod
+    def load(cls, path, mmap=False, hash_function=None):
+        """
+        Reads a table written by save; hash_function must be the one the table was saved with.
+        With mmap=True the offsets and the numeric keys and values stay in the memory-mapped file, so loading
+        takes constant time and a find only reads the pages of its chain.
+        Keys and values that are not numbers are read with pickle.loads, which can run arbitrary code:
+        only load files from a trusted source.
+        """
+        header, sections = read_file(path, _MAGIC, mmap)
+        table = cls.__new__(cls)
+        for name, value in header.items():
+            if name not in ('byteorder', 'sections'):
+                setattr(table, name, value)
+        table.hash_function = hash_function
+        table.offsets = sections['offsets']
+        table.keys = sections['keys']
+        table.values = sections.get('values')
+        if isinstance(table.values, array):
+            table.values = table.values.tolist()
+        return table
+
+    @property
+    def load_factor(self):
+        """Number of stored keys per bucket."""
+        return self.count / self.size
+
+    @property
+    def bucket_count(self):
+        """Number of buckets."""
+        return self.size
+
+    @property
+    def longest_chain(self):
+        """Length of the longest chain."""
+        offsets = self.offsets
+        return max((offsets[i + 1] - offsets[i] for i in range(self.size)), default=0)
+
+    def find(self, key):
+        """Find a key in the hash table."""
+        return self._index(key) is not None
+
+    def get(self, key, default=None):
+        """Returns the value of the key, or default if it is not in the table."""
+        index = self._index(key)
+        if index is None:
+            return default
+        return None if self.values is None else self.values[index]
+
+    def items(self):
+        """Yields the (key, value) pairs stored in the table, bucket by bucket."""
+        if self.values is None:
+            for key in self.keys:
+                yield key, None
+        else:
+            yield from zip(self.keys, self.values)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __contains__(self, key):
+        return self._index(key) is not None
+
+    def __getitem__(self, key):
+        index = self._index(key)
+        if index is None:
+            raise KeyError(key)
+        return None if self.values is None else self.values[index]
+
+    def thaw(self):
+        """Returns a mutable HashTableSeparateChaining holding the same entries."""
+        table = HashTableSeparateChaining(self.size, self.max_load_factor, self.min_load_factor,
+                                          self.rehash_step, self.hash_function, self.seed)
+        for key, value in self.items():
+            table.insert(key, value)
+        return table
+
+    def print_table(self):
+        """Print the hash table."""
+        values = self.values
+        for i in range(self.size):
+            entries = []
+            for j in range(self.offsets[i], self.offsets[i + 1]):
+                value = None if values is None else values[j]
+                entries.append(str(self.keys[j]) if value is None else f'{self.keys[j]}:{value}')
+            print(f'{i}: ' + ' -> '.join(entries))
 
 
 if __name__ == '__main__':
-    ht = HashTableSeparateChaining()
+    # seed=0 hashes with h'(k) = k, as in the exercise
+    ht = HashTableSeparateChaining(seed=0)
     keys = [5, 28, 19, 15, 20, 33, 12, 17, 10]
     for key in keys:
         ht.insert(key)
@@ -86,3 +557,27 @@ if __name__ == '__main__':
     ht.remove(33)
     print('\nHash Table after removing 15:\n')
     ht.print_table()
+    print(f'\nLoad factor: {ht.load_factor:.2f}, buckets: {ht.bucket_count}, longest chain: {ht.longest_chain}')
+
+    # Map with string keys, hashed with the random seed of the table
+    words = HashTableSeparateChaining()
+    for word in ['red', 'black', 'tree', 'hash', 'table']:
+        words[word] = len(word)
+    print("\nwords['tree'] =", words['tree'])
+    del words['hash']
+    print("words.get('hash') =", words.get('hash'))
+    print(dict(words.items()))
+
+    # Read-only compact copy
+    print('\nCompact table:\n')
+    compact = ht.compact()
+    compact.print_table()
+    print('\nFind 28:', compact.find(28))
+
+    # Binary file, loaded back or memory-mapped
+    import os
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(), 'table.htc')
+    ht.save(path)
+    print('\nLoaded table, find 28:', HashTableSeparateChaining.load(path).find(28))
+    print('Mapped table, find 28:', HashTableSeparateChaining.load(path, mmap=True).find(28))
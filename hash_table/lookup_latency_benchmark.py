@@ -0,0 +1,122 @@
+# Lookup latency benchmark: cuckoo hashing against the open addressing strategies and separate chaining.
+# Each table is filled with n keys (growing with its default policy), then every key is looked up once
+# (hits) and as many absent keys (misses), timing each lookup on its own. Prints one CSV row per table
+# with the load factor reached and the p50 / p99 / p999 / max latencies in nanoseconds.
+# The garbage collector is paused while timing, so that its pauses are not charged to a lookup.
+#
+# Usage: python lookup_latency_benchmark.py --keys 100000
+#        python lookup_latency_benchmark.py --engines cuckoo cuckoo_4way linear --distributions uniform clustered
+
+import argparse
+import gc
+import random
+import time
+
+from hash_table_cuckoo import CuckooHashTable
+from hash_table_open_addressing import HashTable
+from hash_table_separate_chaining import HashTableSeparateChaining
+
+ENGINES = ['cuckoo', 'cuckoo_4way', 'cuckoo_3hash', 'linear', 'double_hashing', 'robin_hood', 'hopscotch',
+           'chaining']
+DISTRIBUTIONS = ['uniform', 'sequential', 'clustered']
+PERCENTILES = [('p50', 0.5), ('p99', 0.99), ('p999', 0.999)]
+
+
+def generate_keys(distribution, n, rng):
+    """
+    Returns n distinct keys and n distinct absent keys:
+    - uniform: random keys below 2^40
+    - sequential: 0, 1, ..., n - 1 (misses n, n + 1, ...)
+    - clustered: runs of 64 consecutive keys starting at random multiples of 4096
+    """
+    if distribution == 'uniform':
+        keys = rng.sample(range(1 << 40), 2 * n)
+        return keys[:n], keys[n:]
+    if distribution == 'sequential':
+        return list(range(n)), list(range(n, 2 * n))
+    if distribution == 'clustered':
+        starts = rng.sample(range(1 << 28), -(-2 * n // 64))
+        keys = [4096 * start + i for start in starts for i in range(64)][:2 * n]
+        rng.shuffle(keys)
+        return keys[:n], keys[n:]
+    raise ValueError(f"unknown distribution: {distribution}")
+
+
+def build(engine):
+    """ Returns an empty table of the engine with its (insert, search) functions """
+    if engine.startswith('cuckoo'):
+        table = CuckooHashTable(bucket_size=4 if engine == 'cuckoo_4way' else 1,
+                                hash_count=3 if engine == 'cuckoo_3hash' else 2)
+        return table, table.insert, table.search
+    if engine == 'chaining':
+        table = HashTableSeparateChaining()
+        return table, table.insert, table.find
+    table = HashTable(11)
+    if engine == 'linear':
+        return table, table.insert_linear, table.search_linear
+    if engine == 'robin_hood':
+        return table, table.insert_robin_hood, table.search_robin_hood
+    if engine == 'hopscotch':
+        return table, table.insert_hopscotch, table.search_hopscotch
+    return table, table.insert_double_hashing, table.search_double_hashing
+
+
+def latencies(search, keys):
+    """ Returns the sorted latencies of searching each key, in nanoseconds """
+    clock = time.perf_counter_ns
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for key in keys:
+            start = clock()
+            search(key)
+            timings.append(clock() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    timings.sort()
+    return timings
+
+
+def percentile(timings, q):
+    """ Nearest-rank percentile of sorted timings """
+    return timings[min(len(timings) - 1, int(q * len(timings)))]
+
+
+def run_one(engine, distribution, n, seed):
+    """ Fills a table of the engine with n keys and measures the latency of its hits and misses """
+    keys, misses = generate_keys(distribution, n, random.Random(f'{seed}-{distribution}'))
+    table, insert, search = build(engine)
+    for key in keys:
+        insert(key)
+    row = {'engine': engine, 'distribution': distribution, 'keys': n, 'load_factor': table.load_factor}
+    for kind, lookups in (('hit', keys), ('miss', misses)):
+        timings = latencies(search, lookups)
+        for name, q in PERCENTILES:
+            row[f'{kind}_{name}'] = percentile(timings, q)
+        row[f'{kind}_max'] = timings[-1]
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Lookup latency percentiles of the hash tables')
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=ENGINES)
+    parser.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS, default=['uniform'])
+    parser.add_argument('--keys', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    columns = ['engine', 'distribution', 'keys', 'load_factor'] + [
+        f'{kind}_{name}_ns' for kind in ('hit', 'miss') for name in [name for name, _ in PERCENTILES] + ['max']]
+    print(','.join(columns))
+    for distribution in args.distributions:
+        for engine in args.engines:
+            row = run_one(engine, distribution, args.keys, args.seed)
+            print(','.join([engine, distribution, str(args.keys), f"{row['load_factor']:.2f}"] + [
+                str(row[f'{kind}_{name}']) for kind in ('hit', 'miss') for name in
+                [name for name, _ in PERCENTILES] + ['max']]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+# Views returned by items() and values() of the hash tables. They are the
+# collections.abc.ItemsView and ValuesView of the mapping (live, iterable any number of times, with len,
+# `in` and, for the items, the set operations), except that they iterate over the mapping's _items()
+# generator, which walks its storage once, instead of looking up every key of the mapping again.
+
+from collections.abc import ItemsView, ValuesView
+
+
+class StorageItemsView(ItemsView):
+    """Items view iterating over mapping._items()."""
+    __slots__ = ()
+
+    def __iter__(self):
+        return self._mapping._items()
+
+
+class StorageValuesView(ValuesView):
+    """Values view iterating over mapping._items()."""
+    __slots__ = ()
+
+    def __iter__(self):
+        for _, value in self._mapping._items():
+            yield value
@@ -0,0 +1,156 @@
+# Benchmark of the collision handling strategies: linear probing, quadratic probing,
+# double hashing, Robin Hood and hopscotch hashing (open addressing) and separate chaining.
+# Sweeps table size, load factor and key distribution and writes one row per run as CSV or JSON.
+#
+# Usage: python probing_benchmark.py --sizes 101 1009 --load-factors 0.1 0.5 0.9 --format json
+
+import argparse
+import csv
+import json
+import random
+import sys
+import time
+
+from hash_table_open_addressing import HashTable
+from hash_table_separate_chaining import HashTableSeparateChaining
+
+STRATEGIES = ['linear', 'quadratic', 'double_hashing', 'robin_hood', 'hopscotch', 'chaining']
+DISTRIBUTIONS = ['uniform', 'sequential', 'adversarial']
+DEFAULT_LOAD_FACTORS = [0.1, 0.25, 0.5, 0.75, 0.85, 0.9, 0.95]
+
+FIELDS = [
+    'strategy', 'distribution', 'size', 'seeded', 'target_load_factor', 'keys', 'failed',
+    'insert_seconds', 'search_hit_seconds', 'search_miss_seconds',
+    'max_probe', 'avg_successful', 'avg_unsuccessful',
+    'primary_clusters', 'primary_cluster_max', 'primary_cluster_mean',
+    'secondary_cluster_max', 'secondary_cluster_mean', 'probe_histogram',
+]
+
+
+def generate_keys(distribution, n, size, rng):
+    """
+    Returns n distinct keys:
+    - uniform: random keys in [0, 1000 * size)
+    - sequential: 0, 1, ..., n - 1
+    - adversarial: multiples of the table size, which all share the home slot 0
+    """
+    if distribution == 'uniform':
+        return rng.sample(range(1000 * size), n)
+    if distribution == 'sequential':
+        return list(range(n))
+    if distribution == 'adversarial':
+        return [i * size for i in range(n)]
+    raise ValueError(f"unknown distribution: {distribution}")
+
+
+def build_operations(strategy, size, c1, c2, table_seed=0):
+    """ Returns a fresh fixed-size table of the strategy with its (insert, search) functions """
+    if strategy == 'chaining':
+        table = HashTableSeparateChaining(size, max_load_factor=float('inf'), min_load_factor=0, seed=table_seed)
+        return table, table.insert, table.find
+    table = HashTable(size, max_load_factor=1.0, seed=table_seed)
+    if strategy == 'linear':
+        return table, table.insert_linear, table.search_linear
+    if strategy == 'quadratic':
+        return table, (lambda key: table.insert_quadratic(key, c1, c2)), (lambda key: table.search_quadratic(key, c1, c2))
+    if strategy == 'robin_hood':
+        return table, table.insert_robin_hood, table.search_robin_hood
+    if strategy == 'hopscotch':
+        return table, table.insert_hopscotch, table.search_hopscotch
+    return table, table.insert_double_hashing, table.search_double_hashing
+
+
+def run_one(strategy, distribution, size, load_factor, rng, c1=1, c2=3, table_seed=0):
+    """ Fills a table of the given size up to the load factor and measures it """
+    n = int(load_factor * size)
+    keys = generate_keys(distribution, n, size, rng)
+    # Keys that were not inserted, with the same distribution, for the unsuccessful searches
+    misses = [key + 1000 * size * (n + 1) for key in generate_keys(distribution, n, size, rng)]
+    table, insert, search = build_operations(strategy, size, c1, c2, table_seed)
+    row = {'strategy': strategy, 'distribution': distribution, 'size': size, 'seeded': table_seed != 0,
+           'target_load_factor': load_factor, 'keys': n, 'failed': False}
+
+    start = time.perf_counter()
+    try:
+        for key in keys:
+            insert(key)
+    except OverflowError:
+        # Quadratic probing with arbitrary c1, c2 does not always reach a free slot,
+        # and hopscotch hashing fails when no key can be moved into a neighborhood
+        row['failed'] = True
+        return row
+    row['insert_seconds'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys:
+        search(key)
+    row['search_hit_seconds'] = time.perf_counter() - start
+    start = time.perf_counter()
+    for key in misses:
+        search(key)
+    row['search_miss_seconds'] = time.perf_counter() - start
+
+    stats = table.probe_stats(misses or None)
+    for field in FIELDS:
+        if field in stats:
+            row[field] = stats[field]
+    return row
+
+
+def run(sizes, load_factors, distributions, strategies, seed=0, c1=1, c2=3, seeded_tables=False):
+    """ 
+    Runs every combination of the parameters and returns the list of rows.
+    With seeded_tables, the tables hash with a seed derived from `seed` (see hash_functions).
+    """
+    rows = []
+    for size in sizes:
+        for load_factor in load_factors:
+            for distribution in distributions:
+                for strategy in strategies:
+                    # Same keys for every strategy of a combination
+                    rng = random.Random(f'{seed}-{size}-{load_factor}-{distribution}')
+                    table_seed = random.Random(f'{seed}-table').getrandbits(64) if seeded_tables else 0
+                    rows.append(run_one(strategy, distribution, size, load_factor, rng, c1, c2, table_seed))
+    return rows
+
+
+def write_rows(rows, fmt, output):
+    """ Writes the rows as CSV (the histogram as a JSON string) or as a JSON list """
+    if fmt == 'json':
+        json.dump(rows, output, indent=2)
+        output.write('\n')
+        return
+    writer = csv.DictWriter(output, fieldnames=FIELDS)
+    writer.writeheader()
+    for row in rows:
+        row = dict(row)
+        if 'probe_histogram' in row:
+            row['probe_histogram'] = json.dumps(row['probe_histogram'])
+        writer.writerow(row)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark of the hash table collision handling strategies')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[101, 1009])
+    parser.add_argument('--load-factors', type=float, nargs='+', default=DEFAULT_LOAD_FACTORS)
+    parser.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS, default=DISTRIBUTIONS)
+    parser.add_argument('--strategies', nargs='+', choices=STRATEGIES, default=STRATEGIES)
+    parser.add_argument('--c1', type=int, default=1, help='linear constant of quadratic probing')
+    parser.add_argument('--c2', type=int, default=3, help='quadratic constant of quadratic probing')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--seeded-tables', action='store_true', help='hash with a seeded mixer instead of k mod m')
+    parser.add_argument('--format', choices=['csv', 'json'], default='csv')
+    parser.add_argument('--output', help='output file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    rows = run(args.sizes, args.load_factors, args.distributions, args.strategies, args.seed, args.c1, args.c2,
+               args.seeded_tables)
+    if args.output:
+        with open(args.output, 'w', newline='') as output:
+            write_rows(rows, args.format, output)
+    else:
+        write_rows(rows, args.format, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
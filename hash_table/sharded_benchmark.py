@@ -0,0 +1,77 @@
+# Ingestion benchmark of the sharded hash table.
+# Inserts n random 64-bit keys, then finds them, in:
+# - a single table in this process, key by key (HashTableSeparateChaining.insert or
+#   HashTable.insert_double_hashing): shards = 0 in the output
+# - a ShardedHashTable with 1, 2, 4, ... worker processes, through insert_many and find_many
+# and prints one CSV row per run with the operations per second and the insert speedup over the single table.
+# The sharded runs are checked: every key must be found and the shards must hold n keys in total.
+# The speedup can only grow with the shards up to the number of cores of the machine.
+#
+# Usage: python sharded_benchmark.py --shards 1 2 4 8 --keys 1000000
+#        python sharded_benchmark.py --tables open_addressing --batch 100000
+
+import argparse
+import os
+import random
+import time
+
+from hash_table_open_addressing import HashTable
+from hash_table_separate_chaining import HashTableSeparateChaining
+from sharded_hash_table import TABLES, ShardedHashTable
+
+
+def single(kind, keys):
+    """ Returns the seconds taken to insert, then find, the keys one by one in a table of this process """
+    if kind == 'chaining':
+        table = HashTableSeparateChaining()
+        insert, find = table.insert, table.find
+    else:
+        table = HashTable(11)
+        insert, find = table.insert_double_hashing, table.search_double_hashing
+    start = time.perf_counter()
+    for key in keys:
+        insert(key)
+    inserted = time.perf_counter()
+    for key in keys:
+        find(key)
+    return inserted - start, time.perf_counter() - inserted
+
+
+def sharded(kind, shards, keys, batch):
+    """ Returns the seconds taken by insert_many and find_many of the keys on a ShardedHashTable """
+    with ShardedHashTable(shards, kind, batch_size=batch) as table:
+        start = time.perf_counter()
+        table.insert_many(keys)
+        inserted = time.perf_counter()
+        found = table.find_many(keys)
+        elapsed = inserted - start, time.perf_counter() - inserted
+        if not all(found) or len(table) != len(keys):
+            raise ValueError(f'{kind} with {shards} shards: {len(table)} keys, expected {len(keys)}')
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ingestion throughput of the sharded hash table')
+    parser.add_argument('--tables', nargs='+', choices=list(TABLES), default=list(TABLES))
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--keys', type=int, default=1000000)
+    parser.add_argument('--batch', type=int, default=65536, help='keys per worker and message')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    keys = [rng.getrandbits(63) for _ in range(args.keys)]
+    print(f'# {os.cpu_count()} cores')
+    print('table,shards,keys,insert_ops_per_second,find_ops_per_second,insert_speedup')
+    for kind in args.tables:
+        insert_seconds, find_seconds = single(kind, keys)
+        baseline = insert_seconds
+        print(f'{kind},0,{args.keys},{args.keys / insert_seconds:.0f},{args.keys / find_seconds:.0f},1.00')
+        for shards in args.shards:
+            insert_seconds, find_seconds = sharded(kind, shards, keys, args.batch)
+            print(f'{kind},{shards},{args.keys},{args.keys / insert_seconds:.0f},{args.keys / find_seconds:.0f},'
+                  f'{baseline / insert_seconds:.2f}')
+
+
+if __name__ == '__main__':
+    main()
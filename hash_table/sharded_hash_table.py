@@ -0,0 +1,332 @@
+# Hash table sharded over worker processes, so that ingestion is not limited to the one core the GIL allows.
+# Each key belongs to shard mix64(h(k)) % shards, and each shard is a worker process that owns its own
+# HashTableSeparateChaining (or HashTable). The batch operations split the keys by shard and hand every
+# worker its part at once; 64-bit integer keys travel through a shared memory buffer per worker
+# (multiprocessing.shared_memory) and the pipe only carries a short message, so no key is pickled.
+# Other keys, and values, are pickled as one list per worker and batch.
+# The workers run in parallel: the parent waits for all the shards of a batch before sending the next.
+
+import multiprocessing
+from array import array
+from multiprocessing import shared_memory
+
+from hash_functions import mix64, prehash
+from hash_table_open_addressing import HashTable
+from hash_table_separate_chaining import HashTableSeparateChaining
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: the keys are then split by shard one by one
+    np = None
+
+TABLES = {
+    'chaining': HashTableSeparateChaining,
+    'open_addressing': HashTable,
+}
+
+
+def _serve(connection, memory_name, kind, options):
+    """Worker loop: applies the batches received on the connection to the shard's own table."""
+    memory = shared_memory.SharedMemory(name=memory_name)
+    table = TABLES[kind](**options)
+    try:
+        while True:
+            operation, n, keys, values = connection.recv()
+            if operation == 'close':
+                break
+            try:
+                if keys is None:
+                    keys = memory.buf[:8 * n].cast('q').tolist()
+                result = _apply(table, kind, operation, keys, values)
+                if operation in ('find', 'remove'):
+                    # One byte per key, written over the keys that were just read
+                    memory.buf[:n] = bytes(map(bool, result))
+                    result = None
+                connection.send((result, len(table)))
+            except Exception as error:  # Raised again by the parent
+                connection.send((error, None))
+    finally:
+        memory.close()
+        connection.close()
+
+
+def _apply(table, kind, operation, keys, values):
+    """Runs one operation of a batch on the table of a shard."""
+    if operation == 'insert':
+        if values is None and kind == 'open_addressing':
+            table.insert_many(keys)
+        elif values is None:
+            for key in keys:
+                table.insert(key)
+        else:
+            for key, value in zip(keys, values):
+                table[key] = value
+        return None
+    if operation == 'find':
+        if kind == 'open_addressing':
+            return table.contains_many(keys)
+        return [table.find(key) for key in keys]
+    if operation == 'remove':
+        removed = []
+        for key in keys:
+            try:
+                del table[key]
+                removed.append(True)
+            except KeyError:
+                removed.append(False)
+        return removed
+    if operation == 'get':
+        return [table.get(key) for key in keys]
+    if operation == 'items':
+        return list(table.items())
+    raise ValueError(f"unknown operation {operation!r}")
+
+
+def _mix64_array(keys):
+    """mix64 of a NumPy int64 array, on uint64 whose arithmetic wraps modulo 2^64 like hash_functions.mix64."""
+    x = keys.astype(np.uint64)
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return x
+
+
+class ShardedHashTable:
+    def __init__(self, shards=4, kind='chaining', batch_size=65536, **options):
+        """
+        Starts `shards` worker processes, each holding a table of the given kind ('chaining' for
+        HashTableSeparateChaining, 'open_addressing' for HashTable with double hashing) built with the options,
+        and a shared memory buffer of `batch_size` keys per worker.
+        The workers are stopped by close(), or on leaving a with block.
+        """
+        if kind not in TABLES:
+            raise ValueError(f"kind must be one of {', '.join(TABLES)}")
+        if kind == 'open_addressing':
+            options.setdefault('size', 11)
+        self.shards = shards
+        self.kind = kind
+        self.batch_size = batch_size
+        self._counts = [0] * shards
+        self._memories = []
+        self._connections = []
+        self._workers = []
+        context = multiprocessing.get_context()
+        for _ in range(shards):
+            memory = shared_memory.SharedMemory(create=True, size=8 * batch_size)
+            connection, worker_connection = context.Pipe()
+            worker = context.Process(target=_serve, args=(worker_connection, memory.name, kind, options),
+                                     daemon=True)
+            worker.start()
+            worker_connection.close()
+            self._memories.append(memory)
+            self._connections.append(connection)
+            self._workers.append(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stops the workers and frees the shared memory; the keys are lost (see collect)."""
+        for connection, worker in zip(self._connections, self._workers):
+            if worker.is_alive():
+                connection.send(('close', 0, None, None))
+            worker.join()
+            connection.close()
+        for memory in self._memories:
+            memory.close()
+            memory.unlink()
+        self._connections, self._workers, self._memories = [], [], []
+
+    def shard(self, key):
+        """Index of the worker owning the key."""
+        return mix64(prehash(key)) % self.shards
+
+    def _split(self, keys):
+        """
+        Returns (order, bounds, typed): the positions of the keys grouped by shard (in input order within a shard),
+        the slice of order of each shard and, when every key fits in 64 bits, the keys as an int64 array or
+        array('q') in that order (None otherwise).
+        """
+        if np is not None:
+            typed = np.asarray(keys)
+            if typed.dtype.kind in 'iu' and len(typed) and (typed.dtype.kind == 'i' or typed.max() < 1 << 63):
+                typed = typed.astype(np.int64)
+                shard_ids = (_mix64_array(typed) % np.uint64(self.shards)).astype(np.int64)
+                order = np.argsort(shard_ids, kind='stable')
+                bounds = np.searchsorted(shard_ids[order], np.arange(self.shards + 1)).tolist()
+                return order, bounds, typed[order]
+        groups = [[] for _ in range(self.shards)]
+        for position, key in enumerate(keys):
+            groups[self.shard(key)].append(position)
+        order = [position for group in groups for position in group]
+        bounds = [0]
+        for group in groups:
+            bounds.append(bounds[-1] + len(group))
+        typed = None
+        if all(type(key) is int for key in keys):
+            try:
+                typed = array('q', [keys[position] for position in order])
+            except OverflowError:
+                typed = None  # Integers beyond 64 bits are pickled
+        return order, bounds, typed
+
+    def _run(self, operation, keys, values=None):
+        """
+        Sends the keys (and values) of every shard to its worker, batch_size keys at a time per worker, and
+        returns the results in the order of the keys: flags for find and remove (a NumPy array when NumPy is
+        installed, a list otherwise), values for get.
+        The keys are split by shard batch_size * shards at a time, each split running while the workers
+        are still busy with the previous keys.
+        """
+        keys = keys if np is not None and isinstance(keys, np.ndarray) else list(keys)
+        if values is not None:
+            values = list(values)
+        flags = None
+        if operation in ('find', 'remove'):
+            flags = np.zeros(len(keys), dtype=bool) if np is not None else [False] * len(keys)
+        results = [None] * len(keys) if operation == 'get' else None
+        pending = []
+        step = self.batch_size * self.shards
+        for offset in range(0, len(keys), step):
+            order, bounds, typed = self._split(keys[offset:offset + step])
+            start = list(bounds[:-1])
+            while any(start[shard] < bounds[shard + 1] for shard in range(self.shards)):
+                # A worker's buffer can only be written again once it has replied
+                self._wait(pending, flags, results)
+                for shard in range(self.shards):
+                    low = start[shard]
+                    high = min(bounds[shard + 1], low + self.batch_size)
+                    if low == high:
+                        continue
+                    start[shard] = high
+                    positions = order[low:high]
+                    if typed is not None:
+                        self._memories[shard].buf[:8 * (high - low)] = typed[low:high].tobytes()
+                        batch = None
+                    else:
+                        batch = [keys[offset + position] for position in positions]
+                    batch_values = None
+                    if values is not None:
+                        batch_values = [values[offset + position] for position in positions]
+                    self._connections[shard].send((operation, high - low, batch, batch_values))
+                    pending.append((shard, offset, positions))
+        self._wait(pending, flags, results)
+        return flags if flags is not None else results
+
+    def _wait(self, pending, flags, results):
+        """
+        Receives the replies of the pending batches and stores their results at the positions of their keys.
+        Every reply is read before the error of a failed batch is raised, so that the next batches stay in step.
+        """
+        errors = []
+        for shard, offset, positions in pending:
+            try:
+                result = self._receive(shard)
+            except Exception as error:
+                errors.append(error)
+                continue
+            if flags is not None:
+                found = bytes(self._memories[shard].buf[:len(positions)])
+                if np is not None:
+                    flags[offset:][positions] = np.frombuffer(found, dtype=bool)
+                else:
+                    for position, flag in zip(positions, found):
+                        flags[offset + position] = bool(flag)
+            elif results is not None:
+                for position, value in zip(positions, result):
+                    results[offset + position] = value
+        pending.clear()
+        if errors:
+            raise errors[0]
+
+    def _receive(self, shard):
+        """Waits for the reply of a worker and updates its key count; raises the error of a failed operation."""
+        result, count = self._connections[shard].recv()
+        if isinstance(result, Exception):
+            raise result
+        self._counts[shard] = count
+        return result
+
+    def _call(self, operation, key, value=None):
+        """Runs an operation on a single key, sent pickled to its worker."""
+        shard = self.shard(key)
+        memory = self._memories[shard]
+        self._connections[shard].send((operation, 1, [key], None if value is None else [value]))
+        result = self._receive(shard)
+        return bool(memory.buf[0]) if operation in ('find', 'remove') else result
+
+    def insert_many(self, keys, values=None):
+        """Inserts the keys (with the values, in the same order, if given), one message per worker and batch."""
+        self._run('insert', keys, values)
+
+    def find_many(self, keys):
+        """
+        Returns a boolean mask telling which of the keys are in the table
+        (a NumPy array when NumPy is installed, a list otherwise).
+        """
+        return self._run('find', keys)
+
+    def remove_many(self, keys):
+        """Removes the keys. Returns the number of keys that were found."""
+        return int(sum(self._run('remove', keys)))
+
+    def get_many(self, keys):
+        """Returns the values of the keys (None for the missing ones), in the same order."""
+        return self._run('get', keys)
+
+    def insert(self, key, value=None):
+        """Insert a key into its shard, or replace its value if it is already present."""
+        self._call('insert', key, value)
+
+    def find(self, key):
+        """Find a key in its shard."""
+        return self._call('find', key)
+
+    def remove(self, key):
+        """Remove a key from its shard. Returns True if the key was found."""
+        return self._call('remove', key)
+
+    def get(self, key, default=None):
+        """Returns the value of the key, or default if it is not in the table."""
+        if not self.find(key):
+            return default
+        return self._call('get', key)[0]
+
+    def items(self):
+        """Yields the (key, value) pairs of every shard, shard by shard (one message per worker)."""
+        for connection in self._connections:
+            connection.send(('items', 0, [], None))
+        # Every reply is read before the first pair is yielded, so an unfinished iteration leaves none behind
+        shards = [self._receive(shard) for shard in range(self.shards)]
+        for pairs in shards:
+            yield from pairs
+
+    def collect(self):
+        """Merges the shards into a single table of the same kind, built with the default options, in the parent."""
+        table = TABLES[self.kind](11) if self.kind == 'open_addressing' else TABLES[self.kind]()
+        for key, value in self.items():
+            table[key] = value
+        return table
+
+    def __len__(self):
+        return sum(self._counts)
+
+    def __contains__(self, key):
+        return self.find(key)
+
+
+if __name__ == '__main__':
+    with ShardedHashTable(shards=4) as table:
+        table.insert_many(range(0, 20000, 2))
+        table.insert('red', 3)
+        print('Keys:', len(table), '- keys per shard:', table._counts)
+        print('find_many([10, 11, 12]):', list(table.find_many([10, 11, 12])))
+        print("Find 'red':", table.find('red'), '- value:', table.get('red'))
+        print('Removed by remove_many(range(0, 100, 2)):', table.remove_many(range(0, 100, 2)))
+        merged = table.collect()
+        print('Collected table:', len(merged), 'keys - find 100:', merged.find(100), '- find 98:', merged.find(98))
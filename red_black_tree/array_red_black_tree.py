@@ -0,0 +1,462 @@
+# Red-Black Tree stored in parallel arrays instead of one Python object per node.
+# Node i is described by left[i], right[i], parent[i] (int32 indices), size[i] (int32 subtree size),
+# color[i] (one byte, 1 for red) and keys[i]. Index 0 is the NIL sentinel: black, size 0.
+# Deleted slots go to a free list chained through `left` and are reused by the next inserts.
+# With an array typecode for the keys (e.g. key_type='q' for 64-bit ints) a node takes about 25 bytes,
+# against a hundred or more for a RedBlackTree.Node and the int object it points to.
+
+from array import array
+
+from red_black_tree import Color
+
+NIL = 0
+
+
+class NodeView:
+    """Read-only handle to the node at an index of an ArrayRedBlackTree; prints like a RedBlackTree.Node"""
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def key(self):
+        return self.tree.keys[self.index] if self.index != NIL else None
+
+    @property
+    def color(self):
+        return Color.RED if self.tree.color[self.index] else Color.BLACK
+
+    @property
+    def subtree_size(self):
+        return self.tree.size[self.index]
+
+    def __eq__(self, other):
+        return isinstance(other, NodeView) and other.tree is self.tree and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.tree), self.index))
+
+    def __str__(self):
+        return f"{self.key} ({self.color.value})"
+
+
+class ArrayRedBlackTree:
+
+    def __init__(self, key_type=None):
+        """
+        Empty tree. key_type is an array typecode for the keys ('q', 'd', ...);
+        without it the keys are kept in a list and can be any comparable objects.
+        """
+        self.key_type = key_type
+        self.keys = array(key_type, [0]) if key_type else [None]
+        self.left = array('i', [NIL])
+        self.right = array('i', [NIL])
+        self.parent = array('i', [NIL])
+        self.size = array('i', [0])
+        self.color = bytearray(1)
+        self.root = NIL
+        # Head of the list of free slots, linked through left
+        self._free = NIL
+
+    def __len__(self):
+        return self.size[self.root]
+
+    def nbytes(self):
+        """Bytes used by the arrays (the key objects themselves are not counted when keys is a list)"""
+        key_bytes = self.keys.itemsize * len(self.keys) if self.key_type else 8 * len(self.keys)
+        return key_bytes + 4 * (len(self.left) + len(self.right) + len(self.parent) + len(self.size)) + len(self.color)
+
+    def validate(self):
+        """
+        Checks the same invariants as RedBlackTree.validate on the arrays.
+        Raises ValueError on the first violation; returns the black height otherwise.
+        """
+        keys, left, right, parent, size, color = self.keys, self.left, self.right, self.parent, self.size, self.color
+        if color[NIL] or size[NIL] != 0:
+            raise ValueError("the NIL slot must be black with size 0")
+        if color[self.root]:
+            raise ValueError("the root must be black")
+        if self.root != NIL and parent[self.root] != NIL:
+            raise ValueError("the root must have NIL as parent")
+
+        def check(node, low, high):
+            if node == NIL:
+                return 1, 0
+            key = keys[node]
+            if (low is not None and key < low) or (high is not None and key > high):
+                raise ValueError(f"key {key} breaks the BST order")
+            for child in (left[node], right[node]):
+                if child != NIL and parent[child] != node:
+                    raise ValueError(f"wrong parent link below key {key}")
+            if color[node] and (color[left[node]] or color[right[node]]):
+                raise ValueError(f"red node {key} has a red child")
+            left_height, left_size = check(left[node], low, key)
+            right_height, right_size = check(right[node], key, high)
+            if left_height != right_height:
+                raise ValueError(f"black heights differ below key {key}")
+            if size[node] != left_size + right_size + 1:
+                raise ValueError(f"subtree size of key {key} is {size[node]}, expected {left_size + right_size + 1}")
+            return left_height + (not color[node]), left_size + right_size + 1
+
+        return check(self.root, None, None)[0]
+
+    def _view(self, index):
+        return NodeView(self, index)
+
+    def _index(self, node):
+        # Methods taking a node accept either a NodeView or a raw index
+        return node.index if isinstance(node, NodeView) else node
+
+    def _new_node(self, key):
+        # Takes a slot from the free list, or appends one to every array
+        index = self._free
+        if index != NIL:
+            self._free = self.left[index]
+            self.keys[index] = key
+            self.left[index] = NIL
+            self.right[index] = NIL
+            self.parent[index] = NIL
+            self.size[index] = 1
+            self.color[index] = 1
+            return index
+        self.keys.append(key)
+        self.left.append(NIL)
+        self.right.append(NIL)
+        self.parent.append(NIL)
+        self.size.append(1)
+        self.color.append(1)
+        return len(self.color) - 1
+
+    def _release(self, index):
+        # Puts a slot back on the free list; drops the reference to the key object
+        self.keys[index] = 0 if self.key_type else None
+        self.left[index] = self._free
+        self._free = index
+
+    # *Rotations: same as RedBlackTree, on indices; the sizes of the two rotated nodes are fixed in place
+
+    def _left_rotation(self, x):
+        left, right, parent, size = self.left, self.right, self.parent, self.size
+        y = right[x]
+        right[x] = left[y]
+        if left[y] != NIL:
+            parent[left[y]] = x
+        parent[y] = parent[x]
+        xp = parent[x]
+        if xp == NIL:
+            self.root = y
+        elif x == left[xp]:
+            left[xp] = y
+        else:
+            right[xp] = y
+        left[y] = x
+        parent[x] = y
+        size[y] = size[x]
+        size[x] = size[left[x]] + size[right[x]] + 1
+
+    def _right_rotation(self, x):
+        left, right, parent, size = self.left, self.right, self.parent, self.size
+        y = left[x]
+        left[x] = right[y]
+        if right[y] != NIL:
+            parent[right[y]] = x
+        parent[y] = parent[x]
+        xp = parent[x]
+        if xp == NIL:
+            self.root = y
+        elif x == right[xp]:
+            right[xp] = y
+        else:
+            left[xp] = y
+        right[y] = x
+        parent[x] = y
+        size[y] = size[x]
+        size[x] = size[left[x]] + size[right[x]] + 1
+
+    def _fix_insert(self, z):
+        left, right, parent, color = self.left, self.right, self.parent, self.color
+        while color[parent[z]]:
+            p = parent[z]
+            g = parent[p]
+            if p == left[g]:
+                uncle = right[g]
+                if color[uncle]:
+                    color[p] = 0
+                    color[uncle] = 0
+                    color[g] = 1
+                    z = g
+                else:
+                    if z == right[p]:
+                        z = p
+                        self._left_rotation(z)
+                        p = parent[z]
+                    color[p] = 0
+                    color[g] = 1
+                    self._right_rotation(g)
+            else:
+                uncle = left[g]
+                if color[uncle]:
+                    color[p] = 0
+                    color[uncle] = 0
+                    color[g] = 1
+                    z = g
+                else:
+                    if z == left[p]:
+                        z = p
+                        self._right_rotation(z)
+                        p = parent[z]
+                    color[p] = 0
+                    color[g] = 1
+                    self._left_rotation(g)
+        color[self.root] = 0
+
+    def _fix_delete(self, x):
+        left, right, parent, color = self.left, self.right, self.parent, self.color
+        while x != self.root and not color[x]:
+            p = parent[x]
+            if x == left[p]:
+                sibling = right[p]
+                if color[sibling]:
+                    color[sibling] = 0
+                    color[p] = 1
+                    self._left_rotation(p)
+                    sibling = right[p]
+                if not color[left[sibling]] and not color[right[sibling]]:
+                    color[sibling] = 1
+                    x = p
+                else:
+                    if not color[right[sibling]]:
+                        color[left[sibling]] = 0
+                        color[sibling] = 1
+                        self._right_rotation(sibling)
+                        sibling = right[p]
+                    color[sibling] = color[p]
+                    color[p] = 0
+                    color[right[sibling]] = 0
+                    self._left_rotation(p)
+                    x = self.root
+            else:
+                sibling = left[p]
+                if color[sibling]:
+                    color[sibling] = 0
+                    color[p] = 1
+                    self._right_rotation(p)
+                    sibling = left[p]
+                if not color[left[sibling]] and not color[right[sibling]]:
+                    color[sibling] = 1
+                    x = p
+                else:
+                    if not color[left[sibling]]:
+                        color[right[sibling]] = 0
+                        color[sibling] = 1
+                        self._left_rotation(sibling)
+                        sibling = left[p]
+                    color[sibling] = color[p]
+                    color[p] = 0
+                    color[left[sibling]] = 0
+                    self._right_rotation(p)
+                    x = self.root
+        color[x] = 0
+
+    def _replace_node(self, old, new):
+        # Puts new in the place of old; sets parent[NIL] too, which _fix_delete relies on
+        parent = self.parent
+        old_parent = parent[old]
+        if old_parent == NIL:
+            self.root = new
+        elif old == self.left[old_parent]:
+            self.left[old_parent] = new
+        else:
+            self.right[old_parent] = new
+        parent[new] = old_parent
+
+    def insert(self, key):
+        """Inserts a new node with the specified key into the Red-Black Tree."""
+        keys, left, right, size = self.keys, self.left, self.right, self.size
+        new = self._new_node(key)
+        parent_node = NIL
+        node = self.root
+        # The new node ends up below every node of the path, so their sizes grow by one on the way down
+        while node != NIL:
+            size[node] += 1
+            parent_node = node
+            node = left[node] if key < keys[node] else right[node]
+        self.parent[new] = parent_node
+        if parent_node == NIL:
+            self.root = new
+        elif key < keys[parent_node]:
+            left[parent_node] = new
+        else:
+            right[parent_node] = new
+        self._fix_insert(new)
+
+    def delete_val(self, key):
+        """Removes the node with the specified key from the Red-Black Tree."""
+        node = self._find_index(key)
+        if node == NIL:
+            return  # Node not found
+        left, right, parent, size, color = self.left, self.right, self.parent, self.size, self.color
+
+        removed_red = color[node]
+        if left[node] == NIL:
+            child = right[node]
+            self._replace_node(node, child)
+        elif right[node] == NIL:
+            child = left[node]
+            self._replace_node(node, child)
+        else:
+            successor = self._min_index(right[node])
+            removed_red = color[successor]
+            child = right[successor]
+            if parent[successor] == node:
+                parent[child] = successor
+            else:
+                self._replace_node(successor, child)
+                right[successor] = right[node]
+                parent[right[successor]] = successor
+            self._replace_node(node, successor)
+            left[successor] = left[node]
+            parent[left[successor]] = successor
+            color[successor] = color[node]
+            size[successor] = size[node]
+
+        # Exactly one node is gone below every node from the child's parent up to the root
+        ancestor = parent[child]
+        while ancestor != NIL:
+            size[ancestor] -= 1
+            ancestor = parent[ancestor]
+
+        if not removed_red:
+            self._fix_delete(child)
+        self._release(node)
+
+    def _find_index(self, key):
+        keys, left, right = self.keys, self.left, self.right
+        node = self.root
+        while node != NIL:
+            node_key = keys[node]
+            if key == node_key:
+                return node
+            node = left[node] if key < node_key else right[node]
+        return NIL
+
+    def _min_index(self, node):
+        while self.left[node] != NIL:
+            node = self.left[node]
+        return node
+
+    def _max_index(self, node):
+        while self.right[node] != NIL:
+            node = self.right[node]
+        return node
+
+    def find(self, key):
+        return self._view(self._find_index(key))
+
+    def find_min(self, node):
+        return self._view(self._min_index(self._index(node)))
+
+    def find_max(self, node):
+        return self._view(self._max_index(self._index(node)))
+
+    def find_kth(self, i):
+        left, right, size = self.left, self.right, self.size
+        node = self.root
+        k = i
+        while node != NIL:
+            left_size = size[left[node]]
+            if k == left_size + 1:
+                return self._view(node)
+            elif k <= left_size:
+                node = left[node]
+            else:
+                k -= left_size + 1
+                node = right[node]
+        return None  # k is out of bounds
+
+    def _iter_indices(self, node):
+        # In-order walk of the subtree with an explicit stack
+        left, right = self.left, self.right
+        stack = []
+        while stack or node != NIL:
+            while node != NIL:
+                stack.append(node)
+                node = left[node]
+            node = stack.pop()
+            yield node
+            node = right[node]
+
+    def __iter__(self):
+        keys = self.keys
+        for node in self._iter_indices(self.root):
+            yield keys[node]
+
+    def print_in_order(self, node):
+        keys, color = self.keys, self.color
+        for index in self._iter_indices(self._index(node)):
+            print(f"{keys[index]}({Color.RED.value if color[index] else Color.BLACK.value})", end=" ")
+
+    def find_interval(self, low, high):
+        print(f"\nElements in the interval [{low}, {high}]:", end=" ")
+        keys, left, right, color = self.keys, self.left, self.right, self.color
+        # Stack of the nodes whose key is >= low on the path to low, then an in-order walk until high
+        stack = []
+        node = self.root
+        while node != NIL:
+            if keys[node] < low:
+                node = right[node]
+            else:
+                stack.append(node)
+                node = left[node]
+        while stack:
+            node = stack.pop()
+            if keys[node] > high:
+                break
+            print(f"{keys[node]}({Color.RED.value if color[node] else Color.BLACK.value})", end=" ")
+            node = right[node]
+            while node != NIL:
+                stack.append(node)
+                node = left[node]
+        print()
+
+    def print_tree(self):
+        keys, left, right, color = self.keys, self.left, self.right, self.color
+        # (node, indent, last) entries, right child pushed first so the left one is printed first
+        stack = [(self.root, "", True)]
+        while stack:
+            node, indent, last = stack.pop()
+            if node == NIL:
+                continue
+            print(indent + ("R----" if last else "L----"), end="")
+            indent += "     " if last else "|    "
+            print(f"{keys[node]}({Color.RED.value if color[node] else Color.BLACK.value})")
+            stack.append((right[node], indent, True))
+            stack.append((left[node], indent, False))
+
+
+if __name__ == "__main__":
+    # Same operations as the RedBlackTree exercise, on 64-bit integer keys
+    tree = ArrayRedBlackTree('q')
+    for key in [5, 16, 22, 45, 2, 10, 18, 30, 50, 12, 1]:
+        tree.insert(key)
+    print("Inorder after inserting keys:")
+    tree.print_in_order(tree.root)
+    print("\n")
+    print("Searching for key 22:", tree.find(22))
+    print("Searching for key 15:", tree.find(15))
+    for key in [30, 10, 22]:
+        tree.delete_val(key)
+    for key in [25, 9, 33, 50]:
+        tree.insert(key)
+    print("Inorder after deleting 30, 10, 22 and inserting 25, 9, 33, 50:")
+    tree.print_in_order(tree.root)
+    print("\n")
+    print("The biggest key:", tree.find_max(tree.root))
+    print("The smallest key:", tree.find_min(tree.root))
+    print("The 5th smallest key:", tree.find_kth(5))
+    tree.find_interval(10, 30)
+    print("\nSlots:", len(tree.color) - 1, "- keys:", len(tree), "- bytes:", tree.nbytes())
+    print("\nRed-Black Tree:")
+    tree.print_tree()
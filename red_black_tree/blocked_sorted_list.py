@@ -0,0 +1,316 @@
+# Ordered container with the operations of RedBlackTree, stored as a list of sorted blocks.
+# Each block is a Python list of at most 2 * load keys; maxes[i] is the last key of block i. A lookup is
+# one bisect on maxes and one inside a block, both running in C over contiguous lists, instead of
+# following ~2 log n node pointers in Python. Inserts and deletes shift at most one block.
+# Positions (find_kth, ranks) go through a Fenwick tree over the block lengths: O(log(n / load)) per
+# query and per update, rebuilt in O(n / load) only when a block is split or merged.
+# Like RedBlackTree, equal keys are all kept, a new one after the existing ones.
+# The queries take the arguments of the RedBlackTree ones but return keys (not nodes); a miss returns NIL,
+# which is None here, so `container.find(key) is container.NIL` works on both.
+
+import itertools
+from bisect import bisect_left, bisect_right, insort_right
+
+
+class BlockedSortedList:
+    # What the queries return for a missing key, as RedBlackTree.NIL
+    NIL = None
+
+    def __init__(self, load=256):
+        """Empty list; blocks hold between load / 2 and 2 * load keys (a lone block can be smaller)"""
+        self._load = load
+        self._blocks = []
+        self._maxes = []
+        self._len = 0
+        # Fenwick tree over the block lengths (1-based); None when it has to be rebuilt
+        self._tree = None
+
+    @classmethod
+    def from_sorted(cls, iterable, load=256):
+        """Builds the list from keys given in ascending order in O(n)"""
+        keys = list(iterable)
+        for i in range(1, len(keys)):
+            if keys[i] < keys[i - 1]:
+                raise ValueError("keys must be sorted in ascending order")
+        container = cls(load)
+        container._blocks = [keys[i:i + load] for i in range(0, len(keys), load)]
+        container._maxes = [block[-1] for block in container._blocks]
+        container._len = len(keys)
+        return container
+
+    @classmethod
+    def from_iterable(cls, iterable, load=256):
+        return cls.from_sorted(sorted(iterable), load)
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def root(self):
+        """Stands for RedBlackTree.root in find_min(tree.root): NIL when empty, the list itself otherwise"""
+        return self if self._len else self.NIL
+
+    # *Fenwick tree over the block lengths
+
+    def _fenwick(self):
+        tree = self._tree
+        if tree is None:
+            tree = [0] + [len(block) for block in self._blocks]
+            size = len(tree)
+            for i in range(1, size):
+                parent = i + (i & -i)
+                if parent < size:
+                    tree[parent] += tree[i]
+            self._tree = tree
+        return tree
+
+    def _fenwick_add(self, block_index, delta):
+        tree = self._tree
+        i = block_index + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, block_index):
+        # Number of keys in the blocks before block_index
+        tree = self._fenwick()
+        total = 0
+        i = block_index
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, position):
+        # (block index, index in the block) of the key at 0-based position
+        tree = self._fenwick()
+        block_index = 0
+        step = 1 << (len(tree).bit_length() - 1)
+        while step:
+            nxt = block_index + step
+            if nxt < len(tree) and tree[nxt] <= position:
+                position -= tree[nxt]
+                block_index = nxt
+            step >>= 1
+        return block_index, position
+
+    # *Updates
+
+    def insert(self, key):
+        """Inserts the key, after any equal keys."""
+        blocks, maxes = self._blocks, self._maxes
+        self._len += 1
+        if not maxes:
+            blocks.append([key])
+            maxes.append(key)
+            self._tree = None
+            return
+        i = bisect_right(maxes, key)
+        if i == len(maxes):
+            i -= 1
+            block = blocks[i]
+            block.append(key)
+            maxes[i] = key
+        else:
+            block = blocks[i]
+            insort_right(block, key)
+        if len(block) > 2 * self._load:
+            self._split(i)
+        elif self._tree is not None:
+            self._fenwick_add(i, 1)
+
+    def _split(self, i):
+        # Splits block i in two halves
+        block = self._blocks[i]
+        half = len(block) // 2
+        self._blocks.insert(i + 1, block[half:])
+        del block[half:]
+        self._maxes[i] = block[-1]
+        self._maxes.insert(i + 1, self._blocks[i + 1][-1])
+        self._tree = None
+
+    def delete_val(self, key):
+        """Removes one occurrence of the key. Returns True if the key was found."""
+        blocks, maxes = self._blocks, self._maxes
+        i = bisect_left(maxes, key)
+        if i == len(maxes):
+            return False
+        block = blocks[i]
+        j = bisect_left(block, key)
+        if block[j] != key:
+            return False
+        del block[j]
+        self._len -= 1
+        if not block:
+            del blocks[i]
+            del maxes[i]
+            self._tree = None
+            return True
+        maxes[i] = block[-1]
+        if len(block) < self._load // 2 and len(blocks) > 1:
+            # Merges the block with its left neighbor (its right one for the first block)
+            if i == 0:
+                i = 1
+            blocks[i - 1].extend(blocks[i])
+            maxes[i - 1] = maxes[i]
+            del blocks[i]
+            del maxes[i]
+            self._tree = None
+            if len(blocks[i - 1]) > 2 * self._load:
+                self._split(i - 1)
+        elif self._tree is not None:
+            self._fenwick_add(i, -1)
+        return True
+
+    # *Queries
+
+    def find(self, key):
+        """Returns the key if it is in the list, otherwise NIL"""
+        maxes = self._maxes
+        i = bisect_left(maxes, key)
+        if i == len(maxes):
+            return self.NIL
+        block = self._blocks[i]
+        j = bisect_left(block, key)
+        return block[j] if block[j] == key else self.NIL
+
+    def __contains__(self, key):
+        maxes = self._maxes
+        i = bisect_left(maxes, key)
+        if i == len(maxes):
+            return False
+        block = self._blocks[i]
+        return block[bisect_left(block, key)] == key
+
+    def find_min(self, node=None):
+        """The smallest key, or NIL; node (tree.root for a RedBlackTree) is accepted and ignored"""
+        return self._blocks[0][0] if self._blocks else self.NIL
+
+    def find_max(self, node=None):
+        """The largest key, or NIL; node (tree.root for a RedBlackTree) is accepted and ignored"""
+        return self._maxes[-1] if self._maxes else self.NIL
+
+    def find_kth(self, i):
+        """The i-th smallest key (1-based), or None"""
+        if not 1 <= i <= self._len:
+            return None  # k is out of bounds
+        block_index, j = self._locate(i - 1)
+        return self._blocks[block_index][j]
+
+    def bisect_left(self, key):
+        """Number of keys < key"""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return self._len
+        return self._prefix(i) + bisect_left(self._blocks[i], key)
+
+    def bisect_right(self, key):
+        """Number of keys <= key"""
+        i = bisect_right(self._maxes, key)
+        if i == len(self._maxes):
+            return self._len
+        return self._prefix(i) + bisect_right(self._blocks[i], key)
+
+    def rank(self, key):
+        """Number of keys < key"""
+        return self.bisect_left(key)
+
+    def count_between(self, low, high, inclusive=(True, True)):
+        """Number of keys between low and high, in O(log n), with the same bounds as items_between"""
+        if isinstance(inclusive, bool):
+            inclusive = (inclusive, inclusive)
+        low_inclusive, high_inclusive = inclusive
+        start = self.bisect_left(low) if low_inclusive else self.bisect_right(low)
+        end = self.bisect_right(high) if high_inclusive else self.bisect_left(high)
+        return max(0, end - start)
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._blocks)
+
+    def __reversed__(self):
+        for block in reversed(self._blocks):
+            yield from reversed(block)
+
+    def _iter_positions(self, start, stop):
+        # Keys at the positions [start, stop)
+        if start >= stop:
+            return
+        block_index, j = self._locate(start)
+        remaining = stop - start
+        for block in itertools.islice(self._blocks, block_index, None):
+            chunk = block[j:j + remaining]
+            yield from chunk
+            remaining -= len(chunk)
+            if not remaining:
+                return
+            j = 0
+
+    def items_between(self, low, high, inclusive=(True, True)):
+        """
+        Yields the keys between low and high in ascending order. inclusive is a bool or a (low, high)
+        pair of bools telling whether each bound is included.
+        """
+        if isinstance(inclusive, bool):
+            inclusive = (inclusive, inclusive)
+        low_inclusive, high_inclusive = inclusive
+        start = self.bisect_left(low) if low_inclusive else self.bisect_right(low)
+        stop = self.bisect_right(high) if high_inclusive else self.bisect_left(high)
+        return self._iter_positions(start, stop)
+
+    def find_interval(self, low, high):
+        print(f"\nElements in the interval [{low}, {high}]:", end=" ")
+        for key in self.items_between(low, high):
+            print(key, end=" ")
+        print()
+
+    def print_in_order(self):
+        for key in self:
+            print(key, end=" ")
+
+    def validate(self):
+        """
+        Checks that the blocks are non-empty, within their size bound and sorted across blocks, and that
+        maxes, the length and the Fenwick tree match them. Raises ValueError on the first violation.
+        """
+        blocks, maxes = self._blocks, self._maxes
+        if len(blocks) != len(maxes):
+            raise ValueError("one max per block expected")
+        previous = None
+        for block, block_max in zip(blocks, maxes):
+            if not block or len(block) > 2 * self._load:
+                raise ValueError(f"block of size {len(block)}")
+            if block[-1] != block_max:
+                raise ValueError(f"max of block is {block_max}, expected {block[-1]}")
+            if previous is not None and block[0] < previous:
+                raise ValueError(f"blocks out of order at key {block[0]}")
+            if any(b < a for a, b in zip(block, block[1:])):
+                raise ValueError("block not sorted")
+            previous = block_max
+        if self._len != sum(map(len, blocks)):
+            raise ValueError(f"length is {self._len}, expected {sum(map(len, blocks))}")
+        if self._tree is not None:
+            tree = self._tree
+            self._tree = None
+            if self._fenwick() != tree:
+                raise ValueError("Fenwick tree does not match the block lengths")
+        return True
+
+
+if __name__ == "__main__":
+    keys = [5, 16, 22, 45, 2, 10, 18, 30, 50, 12, 1]
+    container = BlockedSortedList(load=4)
+    for key in keys:
+        container.insert(key)
+    print("Keys after inserting:", list(container), "- blocks:", container._blocks)
+    print("Searching for key 22:", container.find(22))
+    print("Searching for key 15:", container.find(15))
+    for key in [30, 10, 22]:
+        container.delete_val(key)
+    for key in [25, 9, 33, 50]:
+        container.insert(key)
+    print("Keys after deleting 30, 10, 22 and inserting 25, 9, 33, 50:", list(container))
+    print("The biggest key:", container.find_max(container.root))
+    print("The smallest key:", container.find_min(container.root))
+    print("The 5th smallest key:", container.find_kth(5))
+    container.find_interval(10, 30)
+    print("Keys in [10, 30]:", container.count_between(10, 30))
@@ -0,0 +1,402 @@
+# Persistent Red-Black Tree: snapshot() returns in O(1) a read-only view of the current keys that later
+# inserts and deletes do not change, so long scans can run while the tree keeps being written.
+# Nodes have no parent pointers and are changed through path copying: insert and delete are those of a
+# left-leaning red-black tree (Sedgewick), which are recursive, so each one rebuilds the nodes of its
+# search path and shares every other subtree with the previous version of the tree.
+# Copies are only made when needed: every node records the version (token) that created it and can be
+# changed in place by that version. snapshot() starts a new version, so the nodes reachable from a
+# snapshot are never written again; between snapshots the tree is updated in place.
+# Keys are unique, as in RedBlackTree(duplicates=MAP): the left-leaning delete relies on it.
+
+import threading
+
+
+def _is_red(node):
+    return node is not None and node.red
+
+
+def _size(node):
+    return node.size if node is not None else 0
+
+
+class _TreeReader:
+    """Queries shared by the tree and its snapshots; they only read the nodes under self.root"""
+
+    def __len__(self):
+        return _size(self.root)
+
+    def find(self, key):
+        """Returns the node with the key, or None"""
+        node = self.root
+        while node is not None:
+            if key == node.key:
+                return node
+            node = node.left if key < node.key else node.right
+        return None
+
+    def __contains__(self, key):
+        return self.find(key) is not None
+
+    def __getitem__(self, key):
+        node = self.find(key)
+        if node is None:
+            raise KeyError(key)
+        return node.value
+
+    def get(self, key, default=None):
+        """Returns the value of the key, or default if it is not in the tree"""
+        node = self.find(key)
+        return default if node is None else node.value
+
+    def find_min(self):
+        node = self.root
+        while node is not None and node.left is not None:
+            node = node.left
+        return node
+
+    def find_max(self):
+        node = self.root
+        while node is not None and node.right is not None:
+            node = node.right
+        return node
+
+    def find_kth(self, i):
+        node = self.root
+        k = i
+        while node is not None:
+            left_size = _size(node.left)
+            if k == left_size + 1:
+                return node
+            elif k <= left_size:
+                node = node.left
+            else:
+                k -= left_size + 1
+                node = node.right
+        return None  # k is out of bounds
+
+    def bisect_left(self, key):
+        """Number of keys < key"""
+        count = 0
+        node = self.root
+        while node is not None:
+            if node.key < key:
+                count += _size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return count
+
+    def bisect_right(self, key):
+        """Number of keys <= key"""
+        count = 0
+        node = self.root
+        while node is not None:
+            if key < node.key:
+                node = node.left
+            else:
+                count += _size(node.left) + 1
+                node = node.right
+        return count
+
+    def rank(self, key):
+        """Number of keys < key"""
+        return self.bisect_left(key)
+
+    def count_between(self, low, high, inclusive=(True, True)):
+        """Number of keys between low and high, in O(log n), with the same bounds as items_between"""
+        if isinstance(inclusive, bool):
+            inclusive = (inclusive, inclusive)
+        low_inclusive, high_inclusive = inclusive
+        start = self.bisect_left(low) if low_inclusive else self.bisect_right(low)
+        end = self.bisect_right(high) if high_inclusive else self.bisect_left(high)
+        return max(0, end - start)
+
+    def _iter_nodes(self, low=None):
+        # In-order walk with an explicit stack, from the first key >= low (from the start if low is None)
+        stack = []
+        node = self.root
+        while node is not None:
+            if low is not None and node.key < low:
+                node = node.right
+            else:
+                stack.append(node)
+                node = node.left
+        while stack:
+            node = stack.pop()
+            yield node
+            node = node.right
+            while node is not None:
+                stack.append(node)
+                node = node.left
+
+    def __iter__(self):
+        """Yields the keys in ascending order"""
+        for node in self._iter_nodes():
+            yield node.key
+
+    def items(self):
+        """Yields the (key, value) pairs in key order"""
+        for node in self._iter_nodes():
+            yield node.key, node.value
+
+    def items_between(self, low, high, inclusive=(True, True)):
+        """
+        Yields the keys between low and high in ascending order. inclusive is a bool or a (low, high)
+        pair of bools telling whether each bound is included.
+        """
+        if isinstance(inclusive, bool):
+            inclusive = (inclusive, inclusive)
+        low_inclusive, high_inclusive = inclusive
+        for node in self._iter_nodes(low):
+            if not low_inclusive and node.key == low:
+                continue
+            if high < node.key or (not high_inclusive and node.key == high):
+                return
+            yield node.key
+
+    def find_interval(self, low, high):
+        print(f"\nElements in the interval [{low}, {high}]:", end=" ")
+        for node in self._iter_nodes(low):
+            if node.key > high:
+                break
+            print(f"{node.key}({'R' if node.red else 'B'})", end=" ")
+        print()
+
+    def print_tree(self):
+        def print_helper(node, indent, last):
+            if node is not None:
+                print(indent + ("R----" if last else "L----") + f"{node.key}({'R' if node.red else 'B'})")
+                indent += "     " if last else "|    "
+                print_helper(node.left, indent, False)
+                print_helper(node.right, indent, True)
+
+        print_helper(self.root, "", True)
+
+    def validate(self):
+        """
+        Checks the invariants of the left-leaning red-black tree: black root, no red right child,
+        no two reds in a row, the same number of black nodes on every path, BST order and sizes.
+        Raises ValueError on the first violation; returns the black height otherwise.
+        """
+        if _is_red(self.root):
+            raise ValueError("the root must be black")
+
+        def check(node, low, high):
+            if node is None:
+                return 1, 0
+            if (low is not None and node.key < low) or (high is not None and node.key > high):
+                raise ValueError(f"key {node.key} breaks the BST order")
+            if _is_red(node.right):
+                raise ValueError(f"node {node.key} has a red right child")
+            if node.red and _is_red(node.left):
+                raise ValueError(f"red node {node.key} has a red child")
+            left_height, left_size = check(node.left, low, node.key)
+            right_height, right_size = check(node.right, node.key, high)
+            if left_height != right_height:
+                raise ValueError(f"black heights differ below key {node.key}")
+            if node.size != left_size + right_size + 1:
+                raise ValueError(f"subtree size of key {node.key} is {node.size}, expected {left_size + right_size + 1}")
+            return left_height + (not node.red), node.size
+
+        return check(self.root, None, None)[0]
+
+
+class TreeSnapshot(_TreeReader):
+    """Read-only view of a PersistentRedBlackTree at the time snapshot() was called"""
+
+    def __init__(self, root):
+        self.root = root
+
+
+class PersistentRedBlackTree(_TreeReader):
+
+    class Node:
+        __slots__ = ('key', 'value', 'red', 'left', 'right', 'size', 'token')
+
+        def __init__(self, key, value, token):
+            self.key = key
+            self.value = value
+            self.red = True
+            self.left = None
+            self.right = None
+            self.size = 1
+            # Version allowed to change the node in place
+            self.token = token
+
+        def __str__(self):
+            return f"{self.key} ({'R' if self.red else 'B'})"
+
+    def __init__(self):
+        """
+        Empty tree. Writers (insert, delete_val) and snapshot() are serialized by a lock;
+        other threads should read through snapshots, which never change.
+        """
+        self.root = None
+        self._token = object()
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """Returns a read-only view of the current tree in O(1)"""
+        with self._lock:
+            # From now on the current nodes belong to the snapshot and are copied before being changed
+            self._token = object()
+            return TreeSnapshot(self.root)
+
+    def __iter__(self):
+        """Yields the keys in ascending order, as they were when the iteration started"""
+        return iter(self.snapshot())
+
+    def _own(self, node):
+        # Returns the node if this version may change it, otherwise a copy that it may change
+        if node.token is self._token:
+            return node
+        copy = self.Node(node.key, node.value, self._token)
+        copy.red = node.red
+        copy.left = node.left
+        copy.right = node.right
+        copy.size = node.size
+        return copy
+
+    # *Rotations and color flips: the node given is owned by the current version; the children that
+    #           are changed are owned (copied if needed) first
+
+    def _rotate_left(self, node):
+        right_child = self._own(node.right)
+        node.right = right_child.left
+        right_child.left = node
+        right_child.red = node.red
+        node.red = True
+        right_child.size = node.size
+        node.size = _size(node.left) + _size(node.right) + 1
+        return right_child
+
+    def _rotate_right(self, node):
+        left_child = self._own(node.left)
+        node.left = left_child.right
+        left_child.right = node
+        left_child.red = node.red
+        node.red = True
+        left_child.size = node.size
+        node.size = _size(node.left) + _size(node.right) + 1
+        return left_child
+
+    def _flip_colors(self, node):
+        node.red = not node.red
+        node.left = left = self._own(node.left)
+        left.red = not left.red
+        node.right = right = self._own(node.right)
+        right.red = not right.red
+
+    def _move_red_left(self, node):
+        # Makes node.left or one of its children red, borrowing from the right sibling if needed
+        self._flip_colors(node)
+        if _is_red(node.right.left):
+            node.right = self._rotate_right(node.right)
+            node = self._rotate_left(node)
+            self._flip_colors(node)
+        return node
+
+    def _move_red_right(self, node):
+        self._flip_colors(node)
+        if _is_red(node.left.left):
+            node = self._rotate_right(node)
+            self._flip_colors(node)
+        return node
+
+    def _balance(self, node):
+        # Restores the left-leaning invariants on the way back up and fixes the size
+        if _is_red(node.right) and not _is_red(node.left):
+            node = self._rotate_left(node)
+        if _is_red(node.left) and _is_red(node.left.left):
+            node = self._rotate_right(node)
+        if _is_red(node.left) and _is_red(node.right):
+            self._flip_colors(node)
+        node.size = _size(node.left) + _size(node.right) + 1
+        return node
+
+    def _insert(self, node, key, value):
+        if node is None:
+            return self.Node(key, value, self._token)
+        node = self._own(node)
+        if key == node.key:
+            node.value = value
+            return node
+        if key < node.key:
+            node.left = self._insert(node.left, key, value)
+        else:
+            node.right = self._insert(node.right, key, value)
+        return self._balance(node)
+
+    def _delete_min(self, node):
+        if node.left is None:
+            return None
+        node = self._own(node)
+        if not _is_red(node.left) and not _is_red(node.left.left):
+            node = self._move_red_left(node)
+        node.left = self._delete_min(node.left)
+        return self._balance(node)
+
+    def _delete(self, node, key):
+        # The key is known to be in the subtree
+        node = self._own(node)
+        if key < node.key:
+            if not _is_red(node.left) and not _is_red(node.left.left):
+                node = self._move_red_left(node)
+            node.left = self._delete(node.left, key)
+        else:
+            if _is_red(node.left):
+                node = self._rotate_right(node)
+            if key == node.key and node.right is None:
+                return None
+            if not _is_red(node.right) and not _is_red(node.right.left):
+                node = self._move_red_right(node)
+            if key == node.key:
+                # Replaced by its successor, which is removed from the right subtree
+                successor = node.right
+                while successor.left is not None:
+                    successor = successor.left
+                node.key = successor.key
+                node.value = successor.value
+                node.right = self._delete_min(node.right)
+            else:
+                node.right = self._delete(node.right, key)
+        return self._balance(node)
+
+    def insert(self, key, value=None):
+        """Inserts the key with the value into the tree, or replaces the value of the key if it is already there."""
+        with self._lock:
+            root = self._insert(self.root, key, value)
+            root.red = False
+            self.root = root
+
+    def delete_val(self, key):
+        """Removes the node with the specified key from the tree. Returns True if the key was found."""
+        with self._lock:
+            if self.find(key) is None:
+                return False
+            root = self._own(self.root)
+            if not _is_red(root.left) and not _is_red(root.right):
+                root.red = True
+            root = self._delete(root, key)
+            if root is not None:
+                root.red = False
+            self.root = root
+            return True
+
+
+if __name__ == "__main__":
+    tree = PersistentRedBlackTree()
+    for key in [5, 16, 22, 45, 2, 10, 18, 30, 50, 12, 1]:
+        tree.insert(key)
+    before = tree.snapshot()
+    for key in [30, 10, 22]:
+        tree.delete_val(key)
+    for key in [25, 9, 33, 50]:
+        tree.insert(key)
+    print("Snapshot taken after the first inserts:", list(before))
+    print("Current tree:", list(tree))
+    print("The 5th smallest key:", tree.find_kth(5), "- in the snapshot:", before.find_kth(5))
+    before.find_interval(10, 30)
+    tree.find_interval(10, 30)
+    print("\nCurrent tree:")
+    tree.print_tree()
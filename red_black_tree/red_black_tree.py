@@ -1,20 +1,119 @@
+import contextlib
 import enum
+import gc
+import itertools
+import operator
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import ItemsView, Mapping, MutableMapping, ValuesView
+
+from tree_binary_format import numbers, read_file, write_file
 
 class Color(enum.Enum):
     """Enum class to represent the color of a node in a Red-Black Tree"""
     RED = "R"
     BLACK = "B"
 
-class RedBlackTree:
+# Module-level aliases: the fix-up loops test colors by identity (`color is RED`),
+# which is cheaper than looking up and comparing the enum members with ==
+RED = Color.RED
+BLACK = Color.BLACK
+
+# How a tree handles a key that is already in it (the duplicates argument of RedBlackTree):
+# MULTI adds another node, MAP keeps one node per key and replaces its value,
+# COUNT keeps one node per key with the number of times it was inserted
+MULTI = 'multi'
+MAP = 'map'
+COUNT = 'count'
+
+class Augmentation:
+    """
+    Aggregate maintained in every node (node.aggregate) over the keys of its subtree: measure(node) is the
+    value of a single node and combine(a, b) an associative operation (a monoid), so the aggregate of a
+    subtree can be rebuilt from those of its children after a rotation. identity is what empty ranges
+    aggregate to. combine is always called with the values in key order, so it need not be commutative.
+    """
+    def __init__(self, measure, combine, identity=None):
+        self.measure = measure
+        self.combine = combine
+        self.identity = identity
+
+    @classmethod
+    def sum(cls, measure=None):
+        """Sum of measure(node): the keys times their counts by default, node.value for the values of a map"""
+        return cls(measure or (lambda node: node.key * node.count), operator.add, 0)
+
+    @classmethod
+    def min(cls, measure=None):
+        """Smallest measure(node) (the keys by default); None over an empty range"""
+        return cls(measure or (lambda node: node.key), min)
+
+    @classmethod
+    def max(cls, measure=None):
+        """
+        Largest measure(node) (the keys by default); None over an empty range.
+        With (start, end) keys and measure=lambda node: node.key[1] this is the max-endpoint of an interval tree.
+        """
+        return cls(measure or (lambda node: node.key), max)
+
+# Marks an empty part of a range in aggregate(), so that identity is never combined
+_EMPTY = object()
+
+@contextlib.contextmanager
+def _gc_paused():
+    # Nodes point to each other, so every node is tracked by the cyclic garbage collector, and a batch that
+    # allocates many long-lived nodes sets off full collections walking the whole tree again and again.
+    # The nodes a batch creates are all reachable from the tree, so there is nothing for them to collect
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+# items() and values() views: those of collections.abc (live, with len and `in`), except that they
+# iterate over the tree's _items() generator, which walks the nodes once instead of finding every key again
+class StorageItemsView(ItemsView):
+    """Items view iterating over mapping._items()"""
+    __slots__ = ()
+
+    def __iter__(self):
+        return self._mapping._items()
+
+class StorageValuesView(ValuesView):
+    """Values view iterating over mapping._items()"""
+    __slots__ = ()
+
+    def __iter__(self):
+        for _, value in self._mapping._items():
+            yield value
+
+# Binary tree files (RedBlackTree.save, see tree_binary_format) use the format of the hash table files:
+# the magic, the length of a JSON header (options of the tree and where each section starts), then the sections,
+# each aligned to 8 bytes: arrays of 64-bit numbers, usable in place from a memory-mapped file, or pickles of lists.
+_MAGIC = b'RBTREE\x00\x01'
+
+
+class RedBlackTree(MutableMapping):
 
     class Node:
-        def __init__(self, key, color=Color.RED):
+        # No per-node __dict__: a node is a fixed set of slots
+        # sort_key is what the tree compares: the key itself, or key(key) computed once for trees with a key function.
+        # count is the number of times the key was inserted (always 1 unless the tree counts duplicates)
+        __slots__ = ('key', 'sort_key', 'value', 'count', 'color', 'parent', 'right', 'left', 'subtree_size', 'aggregate')
+
+        def __init__(self, key, color=Color.RED, sort_key=None, value=None):
             self.key = key
+            self.sort_key = key if sort_key is None else sort_key
+            self.value = value
+            self.count = 1
             self.color = color
             self.parent = None
             self.right = None
             self.left = None
             self.subtree_size = 1
+            self.aggregate = None
         
         def __str__(self):
             return f"{self.key} ({self.color.value})"
@@ -39,13 +138,101 @@ class RedBlackTree:
                 return None
             return self.parent.sibling()
 
-    def __init__(self):
-        self.NIL = self.Node(None, Color.BLACK)
-        self.NIL.subtree_size = 0
+    def __init__(self, augmentation=None, duplicates=MULTI, key=None):
+        """
+        Empty tree. augmentation (see Augmentation) adds an aggregate to every node for aggregate().
+        duplicates is MULTI (equal keys get their own nodes), MAP (insert replaces the value of an
+        existing key) or COUNT (an existing key has its count incremented; sizes, ranks and iteration
+        include the repetitions). key is a function giving the sort key of a key, as in sorted(); it
+        is called once per inserted key and once per query, and the nodes keep its result.
+        The tree is a MutableMapping with MAP or COUNT duplicates, which keep one node per key; a MULTI
+        tree repeats its equal keys in keys() and items(), and tree[key] gives the first value found.
+        """
+        if duplicates not in (MULTI, MAP, COUNT):
+            raise ValueError(f"unknown duplicates mode: {duplicates}")
+        # Every tree has its own sentinel: fix_delete writes NIL.parent, so trees sharing it could not be
+        # modified concurrently. Only the trees made by split, join and the set operations share theirs
+        self.NIL = self._new_nil()
         self.root = self.NIL
-        self.NIL.parent = self.NIL
-        self.NIL.left = self.NIL
-        self.NIL.right = self.NIL
+        self.augmentation = augmentation
+        self.duplicates = duplicates
+        self.key_function = key
+
+    def _new_nil(self):
+        # Sentinel standing for every leaf of the tree: black, size 0, its own parent and children
+        nil = self.Node(None, Color.BLACK)
+        nil.subtree_size = 0
+        nil.count = 0
+        nil.parent = nil
+        nil.left = nil
+        nil.right = nil
+        return nil
+
+    @classmethod
+    def from_sorted(cls, iterable, augmentation=None, duplicates=MULTI, key=None, values=None):
+        """
+        Builds a tree from keys given in ascending order in O(n), without rotations:
+        the middle key of each range becomes the root of its subtree, so every leaf is on the
+        last two levels. All nodes are black except those on the deepest level, which are red,
+        so every path to NIL has the same number of black nodes.
+        The garbage collector is paused while the nodes are created.
+        values, if given, are the values of the keys, in the same order.
+        With MAP or COUNT duplicates, equal keys become a single node (with the last of their values).
+        """
+        tree = cls(augmentation, duplicates, key)
+        keys = list(iterable)
+        values = None if values is None else list(values)
+        sort_keys = keys if key is None else [key(k) for k in keys]
+        for i in range(1, len(keys)):
+            if sort_keys[i] < sort_keys[i - 1]:
+                raise ValueError("keys must be sorted in ascending order")
+        counts = None
+        if duplicates != MULTI and keys:
+            # Keeps the first key of each run of equal sort keys, with the length of the run
+            firsts = [0] + [i for i in range(1, len(keys)) if sort_keys[i - 1] < sort_keys[i]]
+            ends = firsts[1:] + [len(keys)]
+            if duplicates == COUNT:
+                counts = [end - start for start, end in zip(firsts, ends)]
+            if values is not None:
+                values = [values[end - 1] for end in ends]
+            keys = [keys[i] for i in firsts]
+            sort_keys = [sort_keys[i] for i in firsts]
+        tree._build(keys, sort_keys, counts, values)
+        return tree
+
+    def _build(self, keys, sort_keys, counts=None, values=None):
+        # Makes the tree hold the nodes of the sorted keys (with their counts and values, if given)
+        NIL = self.NIL
+        Node = self.Node
+        red_depth = len(keys).bit_length() - 1
+
+        def build(low, high, depth, parent):
+            # Builds the subtree holding keys[low:high]
+            if low >= high:
+                return NIL
+            mid = (low + high) // 2
+            node = Node(keys[mid], Color.RED if depth == red_depth and depth > 0 else Color.BLACK, sort_keys[mid])
+            if counts is not None:
+                node.count = counts[mid]
+            if values is not None:
+                node.value = values[mid]
+            node.parent = parent
+            node.left = build(low, mid, depth + 1, node)
+            node.right = build(mid + 1, high, depth + 1, node)
+            self.update_size(node)
+            return node
+
+        with _gc_paused():
+            self.root = build(0, len(keys), 0, NIL)
+
+    @classmethod
+    def from_iterable(cls, iterable, augmentation=None, duplicates=MULTI, key=None):
+        """Builds a tree from keys in any order: sorts them, then builds it with from_sorted"""
+        return cls.from_sorted(sorted(iterable, key=key), augmentation, duplicates, key)
+
+    def _sort_key(self, key):
+        # What the nodes are compared with: computed once per operation, never during the descent
+        return key if self.key_function is None else self.key_function(key)
 
     # *Rotations: Rotations are fundamental operations
     #           in maintaining the balanced structure of a Red-Black Tree (RBT). 
@@ -112,111 +299,100 @@ class RedBlackTree:
 
     def fix_insert(self, new_node: Node):
         # While there are two continuos red nodes, we need to fix the tree
-        while new_node.parent and new_node.parent.color == Color.RED:
+        while new_node.parent.color is RED:
             # If the parent of the left child of the grandparent of the new node is the parent of the new node
-            if new_node.parent == new_node.grandparent().left:
+            if new_node.parent is new_node.grandparent().left:
                 uncle = new_node.uncle()
-                if uncle and uncle.color == Color.RED:
-                    new_node.parent.color = Color.BLACK
-                    uncle.color = Color.BLACK
-                    new_node.grandparent().color = Color.RED
+                if uncle.color is RED:
+                    new_node.parent.color = BLACK
+                    uncle.color = BLACK
+                    new_node.grandparent().color = RED
                     new_node = new_node.grandparent()
                 else:
-                    if new_node == new_node.parent.right:
+                    if new_node is new_node.parent.right:
                         new_node = new_node.parent
                         self.left_rotation(new_node)
-                    new_node.parent.color = Color.BLACK
-                    new_node.grandparent().color = Color.RED
+                    new_node.parent.color = BLACK
+                    new_node.grandparent().color = RED
                     self.right_rotation(new_node.grandparent())
             # If the parent of the right child of the grandparent of the new node is the parent of the new node
             else:
                 uncle = new_node.uncle()
-                if uncle and uncle.color == Color.RED:
-                    new_node.parent.color = Color.BLACK
-                    uncle.color = Color.BLACK
-                    new_node.grandparent().color = Color.RED
+                if uncle.color is RED:
+                    new_node.parent.color = BLACK
+                    uncle.color = BLACK
+                    new_node.grandparent().color = RED
                     new_node = new_node.grandparent()
                 else:
-                    if new_node == new_node.parent.left:
+                    if new_node is new_node.parent.left:
                         new_node = new_node.parent
                         self.right_rotation(new_node)
-                    new_node.parent.color = Color.BLACK
-                    new_node.grandparent().color = Color.RED
+                    new_node.parent.color = BLACK
+                    new_node.grandparent().color = RED
                     self.left_rotation(new_node.grandparent())
-        
-        # Update size of the subtree after rotations
-        self.update_size(new_node)
-        self.update_size(new_node.parent)
-        if new_node.grandparent():
-            self.update_size(new_node.grandparent())
-        
-        self.root.color = Color.BLACK
+
+        # A red root means the black height of the tree grows by one when it is recolored
+        grew = self.root.color is RED
+        self.root.color = BLACK
+        return grew
     
     def fix_delete(self, node: Node):
         # While the node is not the root and the color of the node is black
-        while node != self.root and node.color == Color.BLACK:
+        while node is not self.root and node.color is BLACK:
             # If the node is the left child of its parent
-            if node == node.parent.left:
+            if node is node.parent.left:
                 sibling = node.sibling()
-                if sibling.color == Color.RED:
-                    sibling.color = Color.BLACK
-                    node.parent.color = Color.RED
+                if sibling.color is RED:
+                    sibling.color = BLACK
+                    node.parent.color = RED
                     self.left_rotation(node.parent)
                     sibling = node.sibling()
                 # If the color of the left child of the sibling of the node is black and the color of the right child of the sibling of the node is black
-                if (sibling.left.color == Color.BLACK) and (sibling.right.color == Color.BLACK):
-                    sibling.color = Color.RED
+                if (sibling.left.color is BLACK) and (sibling.right.color is BLACK):
+                    sibling.color = RED
                     node = node.parent
                 # If the color of the left child of the sibling of the node is black and the color of the right child of the sibling of the node is red
                 else:
-                    if sibling.right.color == Color.BLACK:
-                        sibling.left.color = Color.BLACK
-                        sibling.color = Color.RED
+                    if sibling.right.color is BLACK:
+                        sibling.left.color = BLACK
+                        sibling.color = RED
                         self.right_rotation(sibling)
                         sibling = node.sibling()
 
                     sibling.color = node.parent.color
-                    node.parent.color = Color.BLACK
-                    sibling.right.color = Color.BLACK
+                    node.parent.color = BLACK
+                    sibling.right.color = BLACK
                     self.left_rotation(node.parent)
                     node = self.root
             else:
                 # If the node is the right child of its parent
                 sibling = node.sibling()
                 # If the color of the sibling of the node is red
-                if sibling.color == Color.RED:
-                    sibling.color = Color.BLACK
-                    node.parent.color = Color.RED
+                if sibling.color is RED:
+                    sibling.color = BLACK
+                    node.parent.color = RED
                     self.right_rotation(node.parent)
                     sibling = node.sibling()
                 # If the color of the left child of the sibling of the node is black and the color of the right child of the sibling of the node is black
-                if (sibling.left.color == Color.BLACK) and (sibling.right.color == Color.BLACK):
-                    sibling.color = Color.RED
+                if (sibling.left.color is BLACK) and (sibling.right.color is BLACK):
+                    sibling.color = RED
                     node = node.parent
                 # If the color of the right child of the sibling of the node is black and the color of the left child of the sibling of the node is red
                 else:
-                    if sibling.left.color == Color.BLACK:
-                        sibling.right.color = Color.BLACK
-                        sibling.color = Color.RED
+                    if sibling.left.color is BLACK:
+                        sibling.right.color = BLACK
+                        sibling.color = RED
                         self.left_rotation(sibling)
                         sibling = node.sibling()
 
                     sibling.color = node.parent.color
-                    node.parent.color = Color.BLACK
-                    sibling.left.color = Color.BLACK
+                    node.parent.color = BLACK
+                    sibling.left.color = BLACK
                     self.right_rotation(node.parent)
                     node = self.root
 
-            # Update subtree sizes after fixing deletion violations
-            self.update_size(node)
-            if node.parent != self.NIL:
-                self.update_size(node.parent)
-
         # Set the color of the node to black
-        node.color = Color.BLACK
-
-        # Update the size of the root (since the structure might have changed)
-        self.update_size(self.root)
+        node.color = BLACK
 
     def replace_node(self, old_node, new_node):
         if old_node.parent == self.NIL:
@@ -228,46 +404,76 @@ class RedBlackTree:
         new_node.parent = old_node.parent
 
     #Q.1: Implement the insert, deleteVal and printInOrder methods for the Red-Black Tree
-    def insert(self, key):
-        """Inserts a new node with the specified key into the Red-Black Tree."""
-        new_node = self.Node(key)
-        new_node.parent = self.NIL
-        new_node.left = self.NIL
-        new_node.right = self.NIL
-
+    def insert(self, key, value=None):
+        """
+        Inserts a new node with the specified key (and value) into the Red-Black Tree.
+        With MAP duplicates an existing key gets the new value instead, and with COUNT its count grows by one.
+        """
+        sort_key = self._sort_key(key)
+        multi = self.duplicates == MULTI
         parent_node = self.NIL
         curr_node = self.root
-        while curr_node != self.NIL:
-            # While the current node is not NIL, we traverse the tree to find the correct position for the new node
+        while curr_node is not self.NIL:
+            # While the current node is not NIL, we traverse the tree to find the correct position for the new node.
+            # With MULTI duplicates the new node ends up in the subtree of every node on the way, so their sizes
+            # grow by one here; the rotations of fix_insert then only recompute the sizes of the two nodes they move
+            if multi:
+                curr_node.subtree_size += 1
+            elif sort_key == curr_node.sort_key:
+                if self.duplicates == MAP:
+                    curr_node.value = value
+                    if self.augmentation is not None:
+                        self.update_aggregates_up(curr_node)
+                else:
+                    curr_node.count += 1
+                    self._add_to_sizes(curr_node, 1)
+                return
             parent_node = curr_node
-            if new_node.key < curr_node.key:
+            if sort_key < curr_node.sort_key:
                 # If the key of the new node is less than the key of the current node, we move to the left child
                 curr_node = curr_node.left
             else:
                 # If the key of the new node is greater than or equal to the key of the current node, we move to the right child
                 curr_node = curr_node.right
+        new_node = self.Node(key, RED, sort_key, value)
+        new_node.left = self.NIL
+        new_node.right = self.NIL
         new_node.parent = parent_node
+        if not multi:
+            # The key turned out to be new: one more node below every node of the path
+            self._add_to_sizes(parent_node, 1)
         if parent_node == self.NIL:
             # If the parent node is NIL, the new node is the root of the tree
             self.root = new_node
-        elif new_node.key < parent_node.key:
+        elif sort_key < parent_node.sort_key:
             # If the key of the new node is less than the key of the parent node, the new node is the left child of the parent node
             parent_node.left = new_node
         else:
             # If the key of the new node is greater than or equal to the key of the parent node, the new node is the right child of the parent node
             parent_node.right = new_node
+        if self.augmentation is not None:
+            # Unlike sizes, aggregates cannot be updated on the way down; they are rebuilt on the path
+            # before fix_insert, whose rotations then only need the children of the nodes they move
+            self.update_aggregates_up(new_node)
         self.fix_insert(new_node)
 
-        # update the size of the subtree
-        while parent_node != self.NIL:
-            self.update_size(parent_node)
-            parent_node = parent_node.parent
-        
     def delete_val(self, key):
-        """Removes the node with the specified key from the Red-Black Tree."""
+        """
+        Removes the node with the specified key from the Red-Black Tree (with COUNT duplicates, one
+        occurrence of the key). Returns True if the key was found.
+        """
         node_to_delete = self.find(key)
         if node_to_delete == self.NIL:
-            return  # Node not found
+            return False  # Node not found
+        self._delete_node(node_to_delete)
+        return True
+
+    def _delete_node(self, node_to_delete):
+        # Removes the node (one occurrence of its key with COUNT duplicates) from the tree
+        if node_to_delete.count > 1:
+            node_to_delete.count -= 1
+            self._add_to_sizes(node_to_delete, -1)
+            return
 
         successor_node = node_to_delete
         original_color = successor_node.color
@@ -294,38 +500,431 @@ class RedBlackTree:
             successor_node.left = node_to_delete.left
             successor_node.left.parent = successor_node
             successor_node.color = node_to_delete.color
+            successor_node.subtree_size = node_to_delete.subtree_size
 
-        # Update subtree sizes from the deleted node upwards
-        parent = node_to_delete.parent
-        while parent != self.NIL:
-            self.update_size(parent)
+        # Walk from the child's new parent (set even when the child is NIL) to the root: the nodes below the
+        # new place of the successor lost the successor, the others the deleted node (the same node when it
+        # had less than two children). The rotations of fix_delete keep the sizes
+        removed = successor_node.count
+        parent = child_node.parent
+        while parent is not self.NIL:
+            if parent is successor_node:
+                removed = node_to_delete.count
+            parent.subtree_size -= removed
             parent = parent.parent
+        if self.augmentation is not None:
+            self.update_aggregates_up(child_node.parent)
 
-        if original_color == Color.BLACK:
+        if original_color is BLACK:
             self.fix_delete(child_node)
 
+    # *Batch operations: the keys of a batch are sorted once and handled in key order, so consecutive
+    #           keys go through the same nodes, which stay in the CPU caches, and insert_many can
+    #           search each key from the previous one instead of from the root.
+
+    def insert_many(self, keys, values=None):
+        """
+        Inserts the keys (with the values, if given) as that many calls to insert would, in the same order for
+        equal keys. Each key is searched from the last node inserted (finger search): the search climbs to
+        the lowest ancestor whose subtree can hold the key, then goes down from there, so clustered keys
+        cost O(1) each to place. The garbage collector is paused during the batch.
+        """
+        keys = list(keys)
+        values = itertools.repeat(None) if values is None else values
+        # sorted() is stable, so equal keys keep the order in which they were given
+        batch = sorted(zip(map(self._sort_key, keys), keys, values), key=operator.itemgetter(0))
+        with _gc_paused():
+            self._insert_sorted(batch)
+
+    def _insert_sorted(self, batch):
+        # Inserts the (sort key, key, value) triples, sorted by sort key
+        NIL = self.NIL
+        multi = self.duplicates == MULTI
+        augmented = self.augmentation is not None
+        finger = NIL
+        for sort_key, key, value in batch:
+            if finger is NIL:
+                curr_node = self.root
+                parent_node = NIL
+            else:
+                # The keys come in ascending order: above the finger, only an ancestor reached from its left
+                # child bounds the subtree from above
+                curr_node = finger
+                while curr_node.parent is not NIL and (curr_node is curr_node.parent.right
+                                                       or not sort_key < curr_node.parent.sort_key):
+                    curr_node = curr_node.parent
+                parent_node = curr_node.parent
+            while curr_node is not NIL:
+                if not multi and sort_key == curr_node.sort_key:
+                    break
+                parent_node = curr_node
+                curr_node = curr_node.left if sort_key < curr_node.sort_key else curr_node.right
+            if curr_node is not NIL:
+                # An existing key, with MAP or COUNT duplicates
+                if self.duplicates == MAP:
+                    curr_node.value = value
+                    if augmented:
+                        self.update_aggregates_up(curr_node)
+                else:
+                    curr_node.count += 1
+                    self._add_to_sizes(curr_node, 1)
+                finger = curr_node
+                continue
+            new_node = self.Node(key, RED, sort_key, value)
+            new_node.left = NIL
+            new_node.right = NIL
+            new_node.parent = parent_node
+            if parent_node is NIL:
+                self.root = new_node
+            elif sort_key < parent_node.sort_key:
+                parent_node.left = new_node
+            else:
+                parent_node.right = new_node
+            # The search did not go through the top of the tree, so the sizes are updated on a separate walk
+            # up (a loop of additions, cheaper than the comparisons of a full descent)
+            if augmented:
+                self.update_aggregate(new_node)
+                self._add_to_sizes(parent_node, 1)
+            else:
+                node = parent_node
+                while node is not NIL:
+                    node.subtree_size += 1
+                    node = node.parent
+            self.fix_insert(new_node)
+            finger = new_node
+
+    def find_many(self, keys):
+        """
+        Returns the nodes of the keys (self.NIL for a missing one) in the order of keys, as find would.
+        The keys are looked up in ascending order, so consecutive searches share most of their path
+        and find its nodes still in the CPU caches; a repeated key is looked up once.
+        """
+        keys = list(keys)
+        sort_keys = [self._sort_key(key) for key in keys]
+        order = sorted(range(len(keys)), key=sort_keys.__getitem__)
+        found = [self.NIL] * len(keys)
+        for i, node in zip(order, self._find_sorted([sort_keys[i] for i in order])):
+            found[i] = node
+        return found
+
+    def _find_sorted(self, queries):
+        # Nodes of the sorted sort keys queries (NIL for a missing one), in the same order
+        NIL = self.NIL
+        found = []
+        node = NIL
+        previous = _EMPTY
+        for key in queries:
+            if key != previous:
+                previous = key
+                node = self.root
+                while node is not NIL and key != node.sort_key:
+                    node = node.left if key < node.sort_key else node.right
+            found.append(node)
+        return found
+
+    def delete_many(self, keys):
+        """
+        Removes one occurrence of each key, as delete_val would for each of them; returns how many were found.
+        The nodes are all located first, in key order (see find_many), then unlinked in key order too, so that
+        consecutive deletes walk up overlapping paths. A delete moves nodes but never copies them, so the
+        nodes found stay valid.
+        """
+        batch = sorted(zip(map(self._sort_key, keys), keys), key=operator.itemgetter(0))
+        NIL = self.NIL
+        removed = 0
+        gone = set()
+        for (_, key), node in zip(batch, self._find_sorted([sort_key for sort_key, _ in batch])):
+            if node is NIL:
+                continue
+            if node in gone:
+                # The key is repeated in the batch and its node was removed: look for another one
+                removed += self.delete_val(key)
+                continue
+            if node.count == 1:
+                gone.add(node)
+            self._delete_node(node)
+            removed += 1
+        return removed
 
     # A helper function in order to keep track of the subtree size for the findKth function
     def update_size(self, node):
-        if node != self.NIL:
-            node.subtree_size = (
-                (node.left.subtree_size if node.left != self.NIL else 0) +
-                (node.right.subtree_size if node.right != self.NIL else 0) + 1
-            )
+        # NIL has size 0, so the children need no check
+        if node is not self.NIL:
+            node.subtree_size = node.left.subtree_size + node.right.subtree_size + node.count
+            if self.augmentation is not None:
+                self.update_aggregate(node)
+
+    def _add_to_sizes(self, node, delta):
+        # Adds delta to the sizes from node up to the root, rebuilding their aggregates on the way
+        augmented = self.augmentation is not None
+        while node is not self.NIL:
+            node.subtree_size += delta
+            if augmented:
+                self.update_aggregate(node)
+            node = node.parent
+
+    def update_aggregate(self, node):
+        # Rebuilds the aggregate of the node from its children (NIL has none)
+        augmentation = self.augmentation
+        value = augmentation.measure(node)
+        if node.left is not self.NIL:
+            value = augmentation.combine(node.left.aggregate, value)
+        if node.right is not self.NIL:
+            value = augmentation.combine(value, node.right.aggregate)
+        node.aggregate = value
+
+    def update_aggregates_up(self, node):
+        # Rebuilds the aggregates from node up to the root
+        while node is not self.NIL:
+            self.update_aggregate(node)
+            node = node.parent
+
+    def __len__(self):
+        return self.root.subtree_size
+
+    # *Map interface: tree[key] = value inserts the key or replaces its value (in every duplicates mode,
+    #           the first node found with the key is updated); the keys stay sorted. With add and discard,
+    #           the tree also works where a set is expected (collections.abc.MutableMapping does the rest).
+    #           Like len(), iteration and the keys(), items() and values() views count every occurrence of a
+    #           key: one per node with MULTI duplicates, count times (with the value of the node) with COUNT.
+    #           Only MAP and COUNT trees keep one node per key and so follow the mapping contract; a MULTI tree
+    #           (the default) repeats its equal keys in keys() and items(), and tree[key] is the value of the
+    #           first node found. Trees therefore keep identity equality and hashing instead of Mapping.__eq__,
+    #           which would merge the duplicates (a tree of [1, 1] would equal one of [1]).
+
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def __contains__(self, key):
+        return self.find(key) is not self.NIL
+
+    def __getitem__(self, key):
+        node = self.find(key)
+        if node is self.NIL:
+            raise KeyError(key)
+        return node.value
+
+    def __setitem__(self, key, value):
+        if self.duplicates == MAP:
+            self.insert(key, value)
+            return
+        node = self.find(key)
+        if node is self.NIL:
+            self.insert(key, value)
+        else:
+            node.value = value
+            if self.augmentation is not None:
+                self.update_aggregates_up(node)
+
+    def __delitem__(self, key):
+        if not self.delete_val(key):
+            raise KeyError(key)
+
+    def add(self, key):
+        """
+        Inserts the key as set.add: a MAP tree only when the key is not in it yet (keeping its value);
+        MULTI and COUNT trees are multisets and keep every occurrence.
+        """
+        if self.duplicates != MAP or self.find(key) is self.NIL:
+            self.insert(key)
+
+    def discard(self, key):
+        """Removes one occurrence of the key if it is in the tree, as set.discard"""
+        self.delete_val(key)
+
+    def clear(self):
+        """Removes every key, in O(1)"""
+        self.root = self.NIL
+
+    def get(self, key, default=None):
+        """Returns the value of the key, or default if it is not in the tree"""
+        node = self.find(key)
+        return default if node is self.NIL else node.value
+
+    def _items(self):
+        # The (key, value) pairs in key order, each repeated by the count of its node
+        for node in self.iter_nodes():
+            if node.count == 1:
+                yield node.key, node.value
+            else:
+                yield from itertools.repeat((node.key, node.value), node.count)
+
+    def items(self):
+        """View of the (key, value) pairs in key order, one per occurrence of the key as in iteration"""
+        return StorageItemsView(self)
+
+    def values(self):
+        """View of the values in the order of items()"""
+        return StorageValuesView(self)
+
+    def validate(self):
+        """
+        Checks every invariant of the tree: black root, no red node with a red child, the same number
+        of black nodes on every path to NIL, BST order, parent links and subtree sizes.
+        Raises ValueError on the first violation; returns the black height otherwise.
+        """
+        NIL = self.NIL
+        if NIL.color is not BLACK or NIL.subtree_size != 0:
+            raise ValueError("the NIL sentinel must be black with size 0")
+        if self.root.color is not BLACK:
+            raise ValueError("the root must be black")
+        if self.root is not NIL and self.root.parent is not NIL:
+            raise ValueError("the root must have NIL as parent")
+
+        def check(node, low, high):
+            # Returns (black height, size) of the subtree, whose keys must be within [low, high]
+            if node is NIL:
+                return 1, 0
+            if (low is not None and node.sort_key < low) or (high is not None and node.sort_key > high):
+                raise ValueError(f"key {node.key} breaks the BST order")
+            if node.count < 1 or (node.count > 1 and self.duplicates != COUNT):
+                raise ValueError(f"key {node.key} has count {node.count}")
+            for child in (node.left, node.right):
+                if child is not NIL and child.parent is not node:
+                    raise ValueError(f"wrong parent link below key {node.key}")
+            if node.color is RED and (node.left.color is RED or node.right.color is RED):
+                raise ValueError(f"red node {node.key} has a red child")
+            left_height, left_size = check(node.left, low, node.sort_key)
+            right_height, right_size = check(node.right, node.sort_key, high)
+            if left_height != right_height:
+                raise ValueError(f"black heights differ below key {node.key}")
+            size = left_size + right_size + node.count
+            if node.subtree_size != size:
+                raise ValueError(f"subtree size of key {node.key} is {node.subtree_size}, expected {size}")
+            if self.augmentation is not None:
+                stored = node.aggregate
+                self.update_aggregate(node)
+                if node.aggregate != stored:
+                    raise ValueError(f"aggregate of key {node.key} is {stored}, expected {node.aggregate}")
+            return left_height + (node.color is BLACK), size
+
+        if self.duplicates != MULTI:
+            keys = [node.sort_key for node in self._iter_subtree(self.root)]
+            if any(not a < b for a, b in zip(keys, keys[1:])):
+                raise ValueError("a key is in more than one node")
+        return check(self.root, None, None)[0]
 
     def print_in_order(self, node):
-        if node != self.NIL:
-            self.print_in_order(node.left)
-            print(f"{node.key}({node.color.value})", end=" ")
-            self.print_in_order(node.right)
+        for curr_node in self._iter_subtree(node):
+            print(f"{curr_node.key}({curr_node.color.value})", end=" ")
+
+    # *Iterative traversals: generators that walk the tree with parent pointers (or an explicit stack)
+    #           instead of recursion, yield lazily and can be stopped at any point, so reading
+    #           the first k keys from a position costs O(log n + k).
+
+    def _iter_subtree(self, node):
+        # In-order traversal of the subtree rooted at node with an explicit stack
+        stack = []
+        while stack or node != self.NIL:
+            if node != self.NIL:
+                stack.append(node)
+                node = node.left
+            else:
+                node = stack.pop()
+                yield node
+                node = node.right
+
+    def successor_node(self, node):
+        """Returns the node following node in key order, or NIL"""
+        if node.right != self.NIL:
+            return self.find_min(node.right)
+        parent = node.parent
+        while parent != self.NIL and node == parent.right:
+            node = parent
+            parent = parent.parent
+        return parent
+
+    def predecessor_node(self, node):
+        """Returns the node preceding node in key order, or NIL"""
+        if node.left != self.NIL:
+            return self.find_max(node.left)
+        parent = node.parent
+        while parent != self.NIL and node == parent.left:
+            node = parent
+            parent = parent.parent
+        return parent
+
+    def lower_bound(self, key, strict=False):
+        """Returns the first node whose key is >= key (> key if strict), or NIL"""
+        key = self._sort_key(key)
+        curr_node = self.root
+        result = self.NIL
+        while curr_node != self.NIL:
+            if curr_node.sort_key > key or (not strict and curr_node.sort_key == key):
+                result = curr_node
+                curr_node = curr_node.left
+            else:
+                curr_node = curr_node.right
+        return result
+
+    def upper_bound(self, key, strict=False):
+        """Returns the last node whose key is <= key (< key if strict), or NIL"""
+        key = self._sort_key(key)
+        curr_node = self.root
+        result = self.NIL
+        while curr_node != self.NIL:
+            if curr_node.sort_key < key or (not strict and curr_node.sort_key == key):
+                result = curr_node
+                curr_node = curr_node.right
+            else:
+                curr_node = curr_node.left
+        return result
+
+    def iter_nodes(self, start=None, reverse=False):
+        """Yields the nodes in key order (descending if reverse), starting at node start"""
+        node = start
+        if node is None:
+            if self.root == self.NIL:
+                return
+            node = self.find_max(self.root) if reverse else self.find_min(self.root)
+        step = self.predecessor_node if reverse else self.successor_node
+        while node != self.NIL:
+            yield node
+            node = step(node)
+
+    def _iter_keys(self, nodes):
+        # Keys of the nodes, each repeated by its count
+        for node in nodes:
+            if node.count == 1:
+                yield node.key
+            else:
+                yield from itertools.repeat(node.key, node.count)
+
+    def __iter__(self):
+        """Yields the keys in ascending order"""
+        return self._iter_keys(self.iter_nodes())
+
+    def __reversed__(self):
+        """Yields the keys in descending order"""
+        return self._iter_keys(self.iter_nodes(reverse=True))
+
+    def iter_from(self, key, reverse=False):
+        """Yields the keys >= key in ascending order (the keys <= key in descending order if reverse)"""
+        start = self.upper_bound(key) if reverse else self.lower_bound(key)
+        return self._iter_keys(self.iter_nodes(start, reverse))
+
+    def items_between(self, low, high, inclusive=(True, True)):
+        """
+        Yields the keys between low and high in ascending order.
+        inclusive is a bool or a (low, high) pair of bools telling whether each bound is included.
+        """
+        if isinstance(inclusive, bool):
+            inclusive = (inclusive, inclusive)
+        low_inclusive, high_inclusive = inclusive
+        high = self._sort_key(high)
+        for node in self.iter_nodes(self.lower_bound(low, strict=not low_inclusive)):
+            if node.sort_key > high or (node.sort_key == high and not high_inclusive):
+                return
+            yield from self._iter_keys((node,))
 
     #Q.2: Implement find(find a specific key), find_min(find the lowest key) and find_max(find the greatest key) methods
     def find(self, key):
+        key = self._sort_key(key)
         curr_node = self.root
         while curr_node is not self.NIL:
-            if key == curr_node.key:
+            if key == curr_node.sort_key:
                 return curr_node
-            elif key < curr_node.key:
+            elif key < curr_node.sort_key:
                 curr_node = curr_node.left
             else:
                 curr_node = curr_node.right
@@ -343,43 +942,480 @@ class RedBlackTree:
 
     #Q.3: Implement findKth(i), where i is the i-th smallest value of the tree
     def find_kth(self, i):
-        def kth_helper(node, k):
-            if node == self.NIL:
-                return None  # k is out of bounds
-            
-            left_size = node.left.subtree_size if node.left != self.NIL else 0
-            
-            if k == left_size + 1:
+        node = self.root
+        k = i
+        while node != self.NIL:
+            left_size = node.left.subtree_size
+
+            if k <= left_size:
+                node = node.left  # Search in the left subtree
+            elif k <= left_size + node.count:
                 return node  # Found the k-th smallest element
-            elif k <= left_size:
-                return kth_helper(node.left, k)  # Search in the left subtree
             else:
-                return kth_helper(node.right, k - left_size - 1)  # Search in the right subtree
+                k -= left_size + node.count  # Search in the right subtree
+                node = node.right
+        return None  # k is out of bounds
 
-        return kth_helper(self.root, i)
+    # *Order statistics: the inverse of find_kth. Counting the keys on one side of a key adds up the
+    #           subtree sizes left behind on a single root-to-leaf walk, so ranks and range counts
+    #           take O(log n) without visiting the keys in between.
 
-    #Q.4: Implement a function that finds and shows the values between the interval of the 2 keys (low, high)
-    def find_interval(self, low, high):
-        def inorder_search(node):
-            if node == self.NIL:
-                return
+    def bisect_left(self, key):
+        """Number of keys < key: the position where key would be inserted before any equal keys"""
+        key = self._sort_key(key)
+        count = 0
+        node = self.root
+        while node is not self.NIL:
+            if node.sort_key < key:
+                count += node.left.subtree_size + node.count
+                node = node.right
+            else:
+                node = node.left
+        return count
+
+    def bisect_right(self, key):
+        """Number of keys <= key: the position where key would be inserted after any equal keys"""
+        key = self._sort_key(key)
+        count = 0
+        node = self.root
+        while node is not self.NIL:
+            if key < node.sort_key:
+                node = node.left
+            else:
+                count += node.left.subtree_size + node.count
+                node = node.right
+        return count
+
+    def rank(self, key):
+        """Number of keys < key (find_kth(rank(key) + 1) is the first node with a key >= key)"""
+        return self.bisect_left(key)
+
+    def count_between(self, low, high, inclusive=(True, True)):
+        """Number of keys between low and high, with the same bounds as items_between, in O(log n)"""
+        if isinstance(inclusive, bool):
+            inclusive = (inclusive, inclusive)
+        low_inclusive, high_inclusive = inclusive
+        start = self.bisect_left(low) if low_inclusive else self.bisect_right(low)
+        end = self.bisect_right(high) if high_inclusive else self.bisect_left(high)
+        return max(0, end - start)
+
+    def count(self, key):
+        """Number of times the key is in the tree"""
+        return self.bisect_right(key) - self.bisect_left(key)
+
+    def floor(self, key):
+        """Largest key <= key, or None"""
+        return self.upper_bound(key).key
 
-            # Traverse left subtree if there's a chance of finding values in range
-            if node.key > low:
-                inorder_search(node.left)
+    def ceiling(self, key):
+        """Smallest key >= key, or None"""
+        return self.lower_bound(key).key
 
-            # Include current node if it's within range
-            if low <= node.key <= high:
-                print(f"{node.key}({node.color.value})", end=" ")
+    def predecessor(self, key):
+        """Largest key < key, or None"""
+        return self.upper_bound(key, strict=True).key
 
-            # Traverse right subtree if there's a chance of finding values in range
-            if node.key < high:
-                inorder_search(node.right)
+    def successor(self, key):
+        """Smallest key > key, or None"""
+        return self.lower_bound(key, strict=True).key
 
+    # *Aggregates: with an augmentation, every node keeps the aggregate of its subtree, so the aggregate
+    #           of a key range combines O(log n) stored aggregates along the two boundary paths
+
+    def aggregate(self, low=None, high=None, inclusive=(True, True)):
+        """
+        Aggregate of the keys between low and high (None for no bound), with the same bounds as
+        items_between; the identity of the augmentation when the range is empty. Runs in O(log n).
+        """
+        if self.augmentation is None:
+            raise ValueError("the tree has no augmentation")
+        NIL = self.NIL
+        measure = self.augmentation.measure
+        combine = self.augmentation.combine
+        if isinstance(inclusive, bool):
+            inclusive = (inclusive, inclusive)
+        low_inclusive, high_inclusive = inclusive
+        if low is not None:
+            low = self._sort_key(low)
+        if high is not None:
+            high = self._sort_key(high)
+
+        def join(a, b):
+            if a is _EMPTY:
+                return b
+            if b is _EMPTY:
+                return a
+            return combine(a, b)
+
+        def fold(node, low, high):
+            # Aggregate of the keys of the subtree within the bounds that are still active
+            while node is not NIL:
+                if low is None and high is None:
+                    return node.aggregate
+                if low is not None and (node.sort_key < low if low_inclusive else not low < node.sort_key):
+                    node = node.right
+                elif high is not None and (high < node.sort_key if high_inclusive else not node.sort_key < high):
+                    node = node.left
+                else:
+                    # The node is in the range: below it each side keeps only one bound
+                    return join(join(fold(node.left, low, None), measure(node)), fold(node.right, None, high))
+            return _EMPTY
+
+        result = fold(self.root, low, high)
+        return self.augmentation.identity if result is _EMPTY else result
+
+    #Q.4: Implement a function that finds and shows the values between the interval of the 2 keys (low, high)
+    def find_interval(self, low, high):
         print(f"\nElements in the interval [{low}, {high}]:", end=" ")
-        inorder_search(self.root)
+        # Start at the first key >= low and follow the successors until high
+        high_key = self._sort_key(high)
+        for node in self.iter_nodes(self.lower_bound(low)):
+            if node.sort_key > high_key:
+                break
+            print(f"{node.key}({node.color.value})", end=" ")
         print()
     
+    # *Split and join: join links two trees through a pivot key by walking down the taller tree to the
+    #           black height of the shorter one, in O(|difference of black heights| + 1).
+    #           Split cuts the search path of a key and joins the pieces back on each side;
+    #           the joins telescope, so split is O(log n) too. The set operations are built on
+    #           both and cost O(m log(n/m + 1)) for trees of sizes m <= n.
+    #           These operations move the nodes into the result trees, leaving their inputs empty.
+    #           The result trees share the NIL sentinel of the larger input; the nodes of the other input are
+    #           re-pointed to it, in O(size of that input), unless both inputs already share their sentinel
+    #           (as the two halves of a split do). Trees sharing a sentinel must not be modified concurrently.
+
+    def _black_height(self, node):
+        # Number of black nodes on the path from node (included) down to NIL
+        height = 0
+        while node != self.NIL:
+            if node.color == Color.BLACK:
+                height += 1
+            node = node.left
+        return height
+
+    def _join_nodes(self, left, left_height, pivot, right, right_height):
+        # Joins the subtrees left <= pivot <= right, given their black heights; returns (root, black height).
+        # Uses self.root as scratch space, so it runs on a working tree.
+        NIL = self.NIL
+        # The roots are made black so that the pivot can be attached as a red node
+        if left.color == Color.RED:
+            left.color = Color.BLACK
+            left_height += 1
+        if right.color == Color.RED:
+            right.color = Color.BLACK
+            right_height += 1
+        if left_height == right_height:
+            pivot.color = Color.BLACK
+            pivot.parent = NIL
+            pivot.left = left
+            pivot.right = right
+            if left != NIL:
+                left.parent = pivot
+            if right != NIL:
+                right.parent = pivot
+            self.update_size(pivot)
+            return pivot, left_height + 1
+
+        taller_is_left = left_height > right_height
+        root, height = (left, left_height) if taller_is_left else (right, right_height)
+        target = right_height if taller_is_left else left_height
+        # Walk down the inner spine of the taller tree to a black node with the other tree's black height
+        parent = NIL
+        node = root
+        while node.color == Color.RED or height != target:
+            if node.color == Color.BLACK:
+                height -= 1
+            parent = node
+            node = node.right if taller_is_left else node.left
+        pivot.color = Color.RED
+        pivot.parent = parent
+        if taller_is_left:
+            pivot.left, pivot.right = node, right
+            parent.right = pivot
+        else:
+            pivot.left, pivot.right = left, node
+            parent.left = pivot
+        if pivot.left != NIL:
+            pivot.left.parent = pivot
+        if pivot.right != NIL:
+            pivot.right.parent = pivot
+        self.update_size(pivot)
+        while parent != NIL:
+            self.update_size(parent)
+            parent = parent.parent
+        root.parent = NIL
+        self.root = root
+        grew = self.fix_insert(pivot)
+        root = self.root
+        self.root = NIL
+        return root, max(left_height, right_height) + grew
+
+    def _split_before(self, node, height, key, after_equal=False):
+        # Splits the subtree (of black height height) into the nodes placed before the sort key and the others:
+        # the keys < key, or the keys <= key with after_equal. Returns (before, its height, rest, its height)
+        NIL = self.NIL
+        if node == NIL:
+            return NIL, 0, NIL, 0
+        child_height = height - (node.color == Color.BLACK)
+        left, right = node.left, node.right
+        left.parent = NIL
+        right.parent = NIL
+        if node.sort_key < key or (after_equal and node.sort_key == key):
+            before, before_height, rest, rest_height = self._split_before(right, child_height, key, after_equal)
+            before, before_height = self._join_nodes(left, child_height, node, before, before_height)
+        else:
+            before, before_height, rest, rest_height = self._split_before(left, child_height, key, after_equal)
+            rest, rest_height = self._join_nodes(rest, rest_height, node, right, child_height)
+        return before, before_height, rest, rest_height
+
+    def _split_key(self, node, height, key):
+        # Splits the subtree into the keys < key, == key (every occurrence, in order) and > key;
+        # returns (less, less height, equal, equal height, greater, greater height)
+        less, less_height, rest, rest_height = self._split_before(node, height, key)
+        equal, equal_height, greater, greater_height = self._split_before(rest, rest_height, key, True)
+        return less, less_height, equal, equal_height, greater, greater_height
+
+    def _split_last(self, node, height):
+        # Removes the node with the largest key; returns (rest, rest height, removed node)
+        NIL = self.NIL
+        child_height = height - (node.color == Color.BLACK)
+        left, right = node.left, node.right
+        left.parent = NIL
+        if right == NIL:
+            node.left = node.parent = NIL
+            node.subtree_size = node.count
+            return left, child_height, node
+        right.parent = NIL
+        rest, rest_height, last = self._split_last(right, child_height)
+        rest, rest_height = self._join_nodes(left, child_height, node, rest, rest_height)
+        return rest, rest_height, last
+
+    def _concat_nodes(self, left, left_height, right, right_height):
+        # Joins two subtrees with left <= right without a pivot
+        if left == self.NIL:
+            return right, right_height
+        if right == self.NIL:
+            return left, left_height
+        left, left_height, pivot = self._split_last(left, left_height)
+        return self._join_nodes(left, left_height, pivot, right, right_height)
+
+    def _expose(self, node, height):
+        # Detaches the root from its subtrees; returns (left, right, children black height)
+        NIL = self.NIL
+        child_height = height - (node.color == Color.BLACK)
+        left, right = node.left, node.right
+        left.parent = NIL
+        right.parent = NIL
+        node.left = node.right = node.parent = NIL
+        node.subtree_size = node.count
+        return left, right, child_height
+
+    def _union_nodes(self, a, a_height, b, b_height):
+        # The occurrences in a of a key of b are dropped: b's own take their place
+        NIL = self.NIL
+        if a == NIL:
+            return b, b_height
+        if b == NIL:
+            return a, a_height
+        b_left, b_right, b_child_height = self._expose(b, b_height)
+        a_left, a_left_height, _, _, a_right, a_right_height = self._split_key(a, a_height, b.sort_key)
+        left, left_height = self._union_nodes(a_left, a_left_height, b_left, b_child_height)
+        right, right_height = self._union_nodes(a_right, a_right_height, b_right, b_child_height)
+        return self._join_nodes(left, left_height, b, right, right_height)
+
+    def _intersection_nodes(self, a, a_height, b, b_height):
+        # Keeps every occurrence in a of the keys of b
+        NIL = self.NIL
+        if a == NIL or b == NIL:
+            return NIL, 0
+        b_left, b_right, b_child_height = self._expose(b, b_height)
+        a_left, a_left_height, equal, equal_height, a_right, a_right_height = self._split_key(a, a_height, b.sort_key)
+        left, left_height = self._intersection_nodes(a_left, a_left_height, b_left, b_child_height)
+        right, right_height = self._intersection_nodes(a_right, a_right_height, b_right, b_child_height)
+        left, left_height = self._concat_nodes(left, left_height, equal, equal_height)
+        return self._concat_nodes(left, left_height, right, right_height)
+
+    def _difference_nodes(self, a, a_height, b, b_height):
+        # Drops every occurrence in a of the keys of b
+        NIL = self.NIL
+        if a == NIL or b == NIL:
+            return a, a_height
+        b_left, b_right, b_child_height = self._expose(b, b_height)
+        a_left, a_left_height, _, _, a_right, a_right_height = self._split_key(a, a_height, b.sort_key)
+        left, left_height = self._difference_nodes(a_left, a_left_height, b_left, b_child_height)
+        right, right_height = self._difference_nodes(a_right, a_right_height, b_right, b_child_height)
+        return self._concat_nodes(left, left_height, right, right_height)
+
+    def _take_root(self):
+        # Empties the tree and returns its former root with its black height; the emptied tree gets a new
+        # sentinel, as the nodes it gave away keep pointing to the old one
+        root = self.root
+        height = self._black_height(root)
+        self.NIL = self.root = self._new_nil()
+        return root, height
+
+    def _empty_like(self, nil=None):
+        # New tree with the same options, using the given sentinel instead of its own
+        tree = type(self)(self.augmentation, self.duplicates, self.key_function)
+        if nil is not None:
+            tree.NIL = tree.root = nil
+        return tree
+
+    def _adopt(self, root, nil):
+        # Makes the leaves of the subtree, which end in the sentinel nil, end in the sentinel of this tree
+        NIL = self.NIL
+        if nil is NIL or root is nil:
+            return NIL if root is nil else root
+        root.parent = NIL
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node.left is nil:
+                node.left = NIL
+            else:
+                stack.append(node.left)
+            if node.right is nil:
+                node.right = NIL
+            else:
+                stack.append(node.right)
+        return root
+
+    def _combine(self, other):
+        # Empties both trees; returns a working tree sharing the sentinel of the larger one, with the roots
+        # and black heights of this tree and of other, both ending in that sentinel
+        nil, other_nil = self.NIL, other.NIL
+        work = self._empty_like(nil if self.root.subtree_size >= other.root.subtree_size else other_nil)
+        a, a_height = self._take_root()
+        b, b_height = other._take_root()
+        return work, work._adopt(a, nil), a_height, work._adopt(b, other_nil), b_height
+
+    def _tree_from_root(self, root):
+        tree = self._empty_like(self.NIL)
+        root.parent = self.NIL
+        if root != self.NIL:
+            root.color = Color.BLACK
+        tree.root = root
+        return tree
+
+    def _check_compatible(self, other):
+        # Trees with different aggregates, duplicates handling or sort keys cannot share nodes
+        if (self.augmentation is not other.augmentation or self.duplicates != other.duplicates
+                or self.key_function is not other.key_function):
+            raise ValueError("the trees must share the same augmentation, duplicates mode and key function")
+
+    def split(self, key):
+        """
+        Splits the tree into (left_tree, right_tree): the keys < key and the keys >= key.
+        Runs in O(log n) and leaves this tree empty. The two trees share their NIL sentinel,
+        so they must not be modified concurrently.
+        """
+        work = self._empty_like(self.NIL)
+        root, height = self._take_root()
+        left, _, right, _ = work._split_before(root, height, self._sort_key(key))
+        return work._tree_from_root(left), work._tree_from_root(right)
+
+    @classmethod
+    def join(cls, left, pivot, right):
+        """
+        Returns a tree with the keys of left, the pivot key and the keys of right, which must
+        satisfy max(left) <= pivot <= min(right). Leaves left and right empty. Runs in O(log n) when
+        left and right share their NIL sentinel (e.g. the two halves of a split), otherwise the nodes
+        of the smaller tree are first re-pointed to the sentinel of the larger one in O(its size).
+        """
+        left._check_compatible(right)
+        pivot_key = left._sort_key(pivot)
+        # Without MULTI duplicates the pivot must not already be in a tree
+        strict = left.duplicates != MULTI
+        if left.root != left.NIL:
+            last = left.find_max(left.root).sort_key
+            if last > pivot_key or (strict and last == pivot_key):
+                raise ValueError("the keys of left must be <= pivot" + (" (<, without duplicates)" if strict else ""))
+        if right.root != right.NIL:
+            first = right.find_min(right.root).sort_key
+            if first < pivot_key or (strict and first == pivot_key):
+                raise ValueError("the keys of right must be >= pivot" + (" (>, without duplicates)" if strict else ""))
+        work, left_root, left_height, right_root, right_height = left._combine(right)
+        pivot_node = work.Node(pivot, RED, pivot_key)
+        root, _ = work._join_nodes(left_root, left_height, pivot_node, right_root, right_height)
+        return work._tree_from_root(root)
+
+    def union(self, other):
+        """
+        Returns a tree with the keys of both trees; empties both. A key present in both is taken from other
+        only: its value, its count with COUNT duplicates, all of its occurrences with MULTI duplicates.
+        """
+        self._check_compatible(other)
+        work, a, a_height, b, b_height = self._combine(other)
+        root, _ = work._union_nodes(a, a_height, b, b_height)
+        return work._tree_from_root(root)
+
+    def intersection(self, other):
+        """
+        Returns a tree with the keys of this tree that are also in other; empties both. The keys are taken
+        from this tree, with their values, counts and (with MULTI duplicates) all of their occurrences.
+        """
+        self._check_compatible(other)
+        work, a, a_height, b, b_height = self._combine(other)
+        root, _ = work._intersection_nodes(a, a_height, b, b_height)
+        return work._tree_from_root(root)
+
+    def difference(self, other):
+        """Returns a tree with the keys of this tree that are not in other (none of their occurrences); empties both"""
+        self._check_compatible(other)
+        work, a, a_height, b, b_height = self._combine(other)
+        root, _ = work._difference_nodes(a, a_height, b, b_height)
+        return work._tree_from_root(root)
+
+    # *Binary files: save writes the keys in order (with the counts and values), which is all load needs
+    #           to rebuild the tree with from_sorted in O(n): the colors and the shape are not stored.
+
+    def save(self, path):
+        """
+        Writes the tree to a binary file. Int or float keys and values are stored as arrays of 64-bit numbers,
+        other keys and values as pickles. The augmentation and the key function are not stored: pass them
+        again to load.
+        """
+        nodes = list(self.iter_nodes())
+        keys = [node.key for node in nodes]
+        typed = numbers(keys)
+        sections = {'keys': keys if typed is None else typed}
+        if self.duplicates == COUNT:
+            # Number of keys up to each node, so that find_kth can bisect it in a mapped file
+            sections['ends'] = array('q', itertools.accumulate(node.count for node in nodes))
+        values = [node.value for node in nodes]
+        if any(value is not None for value in values):
+            typed = numbers(values)
+            sections['values'] = values if typed is None else typed
+        write_file(path, _MAGIC, {'duplicates': self.duplicates, 'nodes': len(nodes)}, sections)
+
+    @classmethod
+    def load(cls, path, augmentation=None, key=None, mmap=False):
+        """
+        Reads a tree written by save, rebuilding it in O(n) without rotations; key must be the key function the
+        tree was saved with. With mmap=True, returns instead a read-only MappedRedBlackTree that answers the
+        queries from the memory-mapped file without creating any node (int or float keys only).
+        Keys and values that are not numbers are read with pickle.loads, which can run arbitrary code:
+        only load files from a trusted source.
+        """
+        header, sections = read_file(path, _MAGIC, mmap)
+        keys = sections['keys']
+        ends = sections.get('ends')
+        values = sections.get('values')
+        if mmap:
+            if not isinstance(keys, memoryview):
+                raise ValueError("only trees of int or float keys can be memory-mapped")
+            return MappedRedBlackTree(keys, ends, values, header['duplicates'], key)
+        tree = cls(augmentation, header['duplicates'], key)
+        keys = keys.tolist() if isinstance(keys, array) else keys
+        counts = None
+        if ends is not None:
+            counts = [end - start for start, end in zip(itertools.chain((0,), ends), ends)]
+        if isinstance(values, array):
+            values = values.tolist()
+        tree._build(keys, keys if key is None else [key(k) for k in keys], counts, values)
+        return tree
+
     #Q.5: Implement a function that prints the Red-Black Tree
     def print_tree(self):
         # Helper function to print the tree
@@ -401,6 +1437,156 @@ class RedBlackTree:
         print_helper(self.root, "", True)
 
 
+class MappedRedBlackTree(Mapping):
+    """
+    Read-only view of a tree saved by RedBlackTree.save, answering from the memory-mapped file
+    (RedBlackTree.load(path, mmap=True)): the sorted keys are searched in place with binary search,
+    so loading takes constant time and the pages of the file are only read when a query reaches them.
+    find_kth is an index (a bisection of the running counts with COUNT duplicates).
+    The queries return keys (and values), not nodes; find returns the stored key or None.
+    As for RedBlackTree, equality and hashing are by identity.
+    """
+
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def __init__(self, keys, ends, values, duplicates, key=None):
+        self.key_array = keys
+        # ends[i]: number of keys up to the node i, with COUNT duplicates (None otherwise)
+        self.ends = ends
+        self.value_array = values
+        self.duplicates = duplicates
+        self.key_function = key
+
+    def __len__(self):
+        return self.ends[-1] if self.ends else len(self.key_array)
+
+    def _bisect(self, key, right=False):
+        # Position of the first stored key > key (right) or >= key
+        search = bisect_right if right else bisect_left
+        if self.key_function is None:
+            return search(self.key_array, key)
+        return search(self.key_array, self.key_function(key), key=self.key_function)
+
+    def _before(self, position):
+        # Number of keys stored before the position (counting the repetitions)
+        if self.ends is None:
+            return position
+        return self.ends[position - 1] if position else 0
+
+    def _position(self, key):
+        # Position of the key in the key array, or None
+        position = self._bisect(key)
+        if position < len(self.key_array):
+            stored = self.key_array[position]
+            sort_key = key if self.key_function is None else self.key_function(key)
+            if (stored if self.key_function is None else self.key_function(stored)) == sort_key:
+                return position
+        return None
+
+    def find(self, key):
+        position = self._position(key)
+        return None if position is None else self.key_array[position]
+
+    def __contains__(self, key):
+        return self._position(key) is not None
+
+    def __getitem__(self, key):
+        position = self._position(key)
+        if position is None:
+            raise KeyError(key)
+        return None if self.value_array is None else self.value_array[position]
+
+    def get(self, key, default=None):
+        """Returns the value of the key, or default if it is not in the tree"""
+        position = self._position(key)
+        if position is None:
+            return default
+        return None if self.value_array is None else self.value_array[position]
+
+    def find_min(self):
+        return self.key_array[0] if len(self.key_array) else None
+
+    def find_max(self):
+        return self.key_array[-1] if len(self.key_array) else None
+
+    def find_kth(self, i):
+        if not 1 <= i <= len(self):
+            return None  # k is out of bounds
+        return self.key_array[i - 1 if self.ends is None else bisect_left(self.ends, i)]
+
+    def bisect_left(self, key):
+        """Number of keys < key"""
+        return self._before(self._bisect(key))
+
+    def bisect_right(self, key):
+        """Number of keys <= key"""
+        return self._before(self._bisect(key, right=True))
+
+    def rank(self, key):
+        """Number of keys < key"""
+        return self.bisect_left(key)
+
+    def count_between(self, low, high, inclusive=(True, True)):
+        """Number of keys between low and high, in O(log n), with the same bounds as items_between"""
+        if isinstance(inclusive, bool):
+            inclusive = (inclusive, inclusive)
+        low_inclusive, high_inclusive = inclusive
+        start = self.bisect_left(low) if low_inclusive else self.bisect_right(low)
+        end = self.bisect_right(high) if high_inclusive else self.bisect_left(high)
+        return max(0, end - start)
+
+    def _iter_keys(self, start, stop):
+        # Keys at the positions [start, stop) of the key array, repeated by their counts
+        if self.ends is None:
+            yield from self.key_array[start:stop]
+            return
+        previous = self._before(start)
+        for key, end in zip(self.key_array[start:stop], self.ends[start:stop]):
+            yield from itertools.repeat(key, end - previous)
+            previous = end
+
+    def __iter__(self):
+        return self._iter_keys(0, len(self.key_array))
+
+    def _items(self):
+        # The (key, value) pairs in key order, repeated by their counts
+        values = itertools.repeat(None) if self.value_array is None else self.value_array
+        if self.ends is None:
+            yield from zip(self.key_array, values)
+            return
+        previous = 0
+        for key, value, end in zip(self.key_array, values, self.ends):
+            yield from itertools.repeat((key, value), end - previous)
+            previous = end
+
+    def items(self):
+        """View of the (key, value) pairs in key order, one per occurrence of the key as in iteration"""
+        return StorageItemsView(self)
+
+    def values(self):
+        """View of the values in the order of items()"""
+        return StorageValuesView(self)
+
+    def items_between(self, low, high, inclusive=(True, True)):
+        """
+        Yields the keys between low and high in ascending order. inclusive is a bool or a (low, high)
+        pair of bools telling whether each bound is included.
+        """
+        if isinstance(inclusive, bool):
+            inclusive = (inclusive, inclusive)
+        low_inclusive, high_inclusive = inclusive
+        start = self._bisect(low, right=not low_inclusive)
+        stop = self._bisect(high, right=high_inclusive)
+        return self._iter_keys(start, max(start, stop))
+
+    def find_interval(self, low, high):
+        print(f"\nElements in the interval [{low}, {high}]:", end=" ")
+        for key in self.items_between(low, high):
+            print(key, end=" ")
+        print()
+
+
 if __name__ == "__main__":
     tree = RedBlackTree()
     #Q.6: Execute the operations and print the inorder of the Red-Black Tree after each operation
@@ -440,6 +1626,70 @@ if __name__ == "__main__":
     tree.find_interval(10, 30)
     print("\n")
 
+    # 6. Iterate lazily over the keys
+    print("Keys in descending order:", list(reversed(tree)))
+    print("Keys in [10, 30):", list(tree.items_between(10, 30, inclusive=(True, False))))
+    print("First 3 keys >= 20:", list(itertools.islice(tree.iter_from(20), 3)))
+    print("\n")
+
+    # 7. Build a tree from sorted keys in linear time
+    print("Tree built from sorted keys:")
+    RedBlackTree.from_sorted(range(1, 11)).print_tree()
+    print("\n")
+
+    # 8. Split a tree at a key and merge trees
+    low_keys, high_keys = RedBlackTree.from_sorted([1, 2, 3, 4, 5, 7, 8, 9, 10]).split(6)
+    print("Split at 6:", list(low_keys), list(high_keys))
+    print("Join with pivot 6:", list(RedBlackTree.join(low_keys, 6, high_keys)))
+    evens = RedBlackTree.from_sorted(range(0, 20, 2))
+    threes = RedBlackTree.from_sorted(range(0, 20, 3))
+    print("Union of multiples of 2 and 3:", list(evens.union(threes)))
+    print("\n")
+
+    # 9. Rank and range counts without walking the keys
+    print("Rank of 18:", tree.rank(18))
+    print("Keys in [10, 30]:", tree.count_between(10, 30))
+    print("Floor of 20:", tree.floor(20), "- ceiling of 20:", tree.ceiling(20))
+    print("Predecessor of 25:", tree.predecessor(25), "- successor of 25:", tree.successor(25))
+    print("\n")
+
+    # 10. Range sums kept in the nodes
+    sums = RedBlackTree.from_iterable(keys, augmentation=Augmentation.sum())
+    print("Sum of the keys in [10, 30]:", sums.aggregate(10, 30))
+    print("Sum of all keys:", sums.aggregate())
+    print("\n")
+
+    # 11. Sorted map, multiset and key function
+    ages = RedBlackTree(duplicates=MAP)
+    for name, age in [("carol", 31), ("alice", 25), ("bob", 40), ("alice", 26)]:
+        ages[name] = age
+    print("Sorted map:", list(ages.items()))
+    votes = RedBlackTree(duplicates=COUNT)
+    for vote in [3, 1, 3, 2, 3, 1]:
+        votes.insert(vote)
+    print("Multiset:", list(votes), "- nodes:", sum(1 for _ in votes.iter_nodes()), "- count of 3:", votes.count(3))
+    words = RedBlackTree.from_iterable(["banana", "Cherry", "apple"], key=str.lower)
+    print("Case-insensitive order:", list(words))
+    print("\n")
+
+    # 12. Batch operations
+    evens = RedBlackTree.from_sorted(range(0, 20, 2))
+    evens.insert_many([7, 3, 11])
+    print("After insert_many([7, 3, 11]):", list(evens))
+    print("find_many([11, 4, 5]):", [node.key for node in evens.find_many([11, 4, 5])])
+    print("Removed by delete_many([0, 3, 5]):", evens.delete_many([0, 3, 5]), "-", list(evens))
+    print("\n")
+
+    # 13. Save to a binary file, load it back or map it without building the nodes
+    import os
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(), "votes.rbt")
+    votes.save(path)
+    print("Loaded multiset:", list(RedBlackTree.load(path)))
+    mapped = RedBlackTree.load(path, mmap=True)
+    print("Mapped multiset:", list(mapped), "- 4th smallest:", mapped.find_kth(4), "- keys <= 2:", mapped.bisect_right(2))
+    print("\n")
+
     # Print the Red-Black Tree
     print("Red-Black Tree:")
     tree.print_tree()
@@ -0,0 +1,190 @@
+# Micro-benchmark and randomized invariant check of the Red-Black Tree engines:
+# - pointer: RedBlackTree (one Node object per key)
+# - array: ArrayRedBlackTree (parallel arrays)
+# - persistent: PersistentRedBlackTree (path copying, unique keys)
+# - blocked: BlockedSortedList (sorted blocks searched with bisect; returns keys instead of nodes)
+# The benchmark times n inserts, n find, n find_kth and n delete_val on a stream of keys and prints one CSV
+# row per run. The streams are random (distinct keys in random order), sequential (0, 1, ..., n - 1) and
+# skewed (power-law keys concentrated near 0, with many repeats).
+# The check runs random inserts and deletes (with repeated keys) and, after every operation, validates the
+# tree and compares find_kth against a sorted list of the keys (the blocked list uses blocks of 4 keys there).
+# With --batch, insert, find and delete_val called once per key of a batch are timed against insert_many,
+# find_many and delete_many on the same pointer tree.
+#
+# Usage: python tree_benchmark.py --keys 10000 100000
+#        python tree_benchmark.py --engines pointer blocked --distributions sequential skewed --keys 1000000
+#        python tree_benchmark.py --check --operations 3000 --seeds 20
+#        python tree_benchmark.py --batch 100000 --keys 1000000 10000000
+
+import argparse
+import bisect
+import random
+import time
+
+from array_red_black_tree import ArrayRedBlackTree
+from blocked_sorted_list import BlockedSortedList
+from persistent_red_black_tree import PersistentRedBlackTree
+from red_black_tree import RedBlackTree
+
+ENGINES = {
+    'pointer': RedBlackTree,
+    'array': ArrayRedBlackTree,
+    'persistent': PersistentRedBlackTree,
+    'blocked': BlockedSortedList,
+}
+# Engines that keep a single node per key
+UNIQUE_KEYS = {'persistent'}
+# Engines whose queries return the key rather than a node
+RETURNS_KEYS = {'blocked'}
+# Options of the engines in the check: with its default load of 256 keys per block, the blocked list
+# would keep the check's 200 distinct keys in a single block and never split or merge one
+CHECK_OPTIONS = {'blocked': {'load': 4}}
+
+
+def key_stream(distribution, n, rng):
+    """ Returns the n keys to insert """
+    if distribution == 'random':
+        return rng.sample(range(100 * n), n)
+    if distribution == 'sequential':
+        return list(range(n))
+    if distribution == 'skewed':
+        return [int(n * rng.random() ** 4) for _ in range(n)]
+    raise ValueError(f"unknown distribution {distribution!r}")
+
+
+DISTRIBUTIONS = ('random', 'sequential', 'skewed')
+
+
+def benchmark(engine, n, seed, distribution='random'):
+    """ Returns the operations per second of insert, find, find_kth and delete_val with n keys """
+    rng = random.Random(seed)
+    keys = key_stream(distribution, n, rng)
+    tree = ENGINES[engine]()
+    row = {'engine': engine, 'distribution': distribution, 'keys': n}
+
+    start = time.perf_counter()
+    for key in keys:
+        tree.insert(key)
+    row['insert'] = n / (time.perf_counter() - start)
+
+    rng.shuffle(keys)
+    start = time.perf_counter()
+    for key in keys:
+        tree.find(key)
+    row['find'] = n / (time.perf_counter() - start)
+
+    ranks = [rng.randint(1, len(tree)) for _ in range(n)]
+    start = time.perf_counter()
+    for rank in ranks:
+        tree.find_kth(rank)
+    row['find_kth'] = n / (time.perf_counter() - start)
+
+    rng.shuffle(keys)
+    start = time.perf_counter()
+    for key in keys:
+        tree.delete_val(key)
+    row['delete_val'] = n / (time.perf_counter() - start)
+    return row
+
+
+def benchmark_batch(n, batch, seed):
+    """
+    Returns the seconds taken by batch single-key calls and by the batch methods of RedBlackTree
+    (insert_many, find_many, delete_many) on a tree of n random keys
+    """
+    rng = random.Random(seed)
+    tree = RedBlackTree.from_sorted(range(0, 10 * n, 10))
+    keys = [rng.randrange(10 * n) for _ in range(batch)]
+    row = {'keys': n, 'batch': batch}
+    for name, single, many in (('insert', tree.insert, tree.insert_many),
+                               ('find', tree.find, tree.find_many),
+                               ('delete', tree.delete_val, tree.delete_many)):
+        start = time.perf_counter()
+        for key in keys:
+            single(key)
+        row[name] = time.perf_counter() - start
+        if name == 'insert':
+            # The batch runs on the same tree as the single-key calls: their keys are removed first
+            for key in keys:
+                tree.delete_val(key)
+        elif name == 'delete':
+            tree.insert_many(keys)
+        start = time.perf_counter()
+        many(keys)
+        row[name + '_many'] = time.perf_counter() - start
+    return row
+
+
+def check(engine, operations, seed, key_range=200):
+    """ Runs random operations, validating the tree after each one; raises ValueError on a violation """
+    rng = random.Random(seed)
+    tree = ENGINES[engine](**CHECK_OPTIONS.get(engine, {}))
+    expected = []
+    for step in range(operations):
+        key = rng.randrange(key_range)
+        if rng.random() < 0.6:
+            tree.insert(key)
+            if engine not in UNIQUE_KEYS or key not in expected:
+                bisect.insort(expected, key)
+        else:
+            tree.delete_val(key)
+            position = bisect.bisect_left(expected, key)
+            if position < len(expected) and expected[position] == key:
+                del expected[position]
+        tree.validate()
+        if len(tree) != len(expected):
+            raise ValueError(f"step {step}: {len(tree)} keys, expected {len(expected)}")
+        rank = rng.randint(1, len(expected) + 1)
+        node = tree.find_kth(rank)
+        found = node if engine in RETURNS_KEYS or node is None else node.key
+        wanted = expected[rank - 1] if rank <= len(expected) else None
+        if found != wanted:
+            raise ValueError(f"step {step}: find_kth({rank}) returned {found}, expected {wanted}")
+    found = [tree.find_kth(i) for i in range(1, len(expected) + 1)]
+    if engine not in RETURNS_KEYS:
+        found = [node.key for node in found]
+    if found != expected:
+        raise ValueError("find_kth does not match the sorted keys")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark and invariant check of the Red-Black Tree engines')
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument('--keys', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS, default=['random'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--check', action='store_true', help='run the randomized invariant check instead')
+    parser.add_argument('--operations', type=int, default=2000, help='operations per seed of the check')
+    parser.add_argument('--seeds', type=int, default=10, help='number of seeds of the check')
+    parser.add_argument('--batch', type=int, help='time single-key calls against the batch methods of the '
+                                                  'pointer tree with batches of this size instead')
+    args = parser.parse_args(argv)
+
+    if args.batch:
+        print('keys,batch,insert_seconds,insert_many_seconds,find_seconds,find_many_seconds,'
+              'delete_seconds,delete_many_seconds')
+        for n in args.keys:
+            row = benchmark_batch(n, args.batch, args.seed)
+            print(f"{n},{args.batch},{row['insert']:.3f},{row['insert_many']:.3f},{row['find']:.3f},"
+                  f"{row['find_many']:.3f},{row['delete']:.3f},{row['delete_many']:.3f}")
+        return
+
+    if args.check:
+        for engine in args.engines:
+            for seed in range(args.seed, args.seed + args.seeds):
+                check(engine, args.operations, seed)
+            print(f'{engine}: {args.seeds} x {args.operations} operations, all invariants hold')
+        return
+
+    print('engine,distribution,keys,insert_ops_per_second,find_ops_per_second,find_kth_ops_per_second,'
+          'delete_val_ops_per_second')
+    for distribution in args.distributions:
+        for n in args.keys:
+            for engine in args.engines:
+                row = benchmark(engine, n, args.seed, distribution)
+                print(f"{engine},{distribution},{n},{row['insert']:.0f},{row['find']:.0f},{row['find_kth']:.0f},"
+                      f"{row['delete_val']:.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# Binary files of the tree (RedBlackTree.save), in the format of the hash table files (hash_table/binary_format.py).
+# A file is a magic string, the length of a JSON header (the parameters of the table and where each section
+# starts), then the sections, each aligned to 8 bytes. A section is either an array of numbers in native
+# byte order, which a memory-mapped file can serve in place, or a pickle of a list of other objects.
+
+import json
+import mmap
+import pickle
+import struct
+import sys
+from array import array
+
+
+def numbers(items):
+    """ Returns the items as an array('q') or array('d') if they are all ints or all floats, otherwise None """
+    items = list(items)
+    for typecode, kind in (('q', int), ('d', float)):
+        if all(type(item) is kind for item in items):
+            try:
+                return array(typecode, items)
+            except OverflowError:
+                return None  # Integers beyond 64 bits
+    return None
+
+
+def write_file(path, magic, header, sections):
+    """ Writes the header and the sections (arrays or bytearrays, or lists to pickle) to the file at path """
+    blobs = {}
+    for name, section in sections.items():
+        if isinstance(section, array):
+            blobs[name] = (section.typecode, section.tobytes())
+        elif isinstance(section, (bytes, bytearray)):
+            blobs[name] = ('B', bytes(section))
+        else:
+            blobs[name] = ('pickle', pickle.dumps(section, pickle.HIGHEST_PROTOCOL))
+    header = dict(header, byteorder=sys.byteorder, sections={})
+    # The offsets depend on the length of the header, which depends on the offsets: they are recomputed until
+    # the encoded header keeps its length. The length only grows from one pass to the next, so this ends
+    encoded = json.dumps(header).encode()
+    while True:
+        offset = -(-(len(magic) + 4 + len(encoded)) // 8) * 8
+        layout = {}
+        for name, (typecode, blob) in blobs.items():
+            layout[name] = [offset, len(blob), typecode]
+            offset += -(-len(blob) // 8) * 8
+        header['sections'] = layout
+        previous, encoded = encoded, json.dumps(header).encode()
+        if len(encoded) == len(previous):
+            break
+    with open(path, 'wb') as file:
+        file.write(magic + struct.pack('<I', len(encoded)) + encoded)
+        for name, (typecode, blob) in blobs.items():
+            file.seek(layout[name][0])
+            file.write(blob)
+        file.truncate(offset)
+
+
+def read_file(path, magic, use_mmap=False):
+    """
+    Returns (header, sections) from a file written by write_file.
+    With use_mmap, the number sections are read-only memoryviews over the mapped file, whose pages the
+    operating system reads on first access; otherwise they are arrays (bytearrays for 'B') holding a copy.
+    Raises ValueError if the file does not start with magic or was written with another byte order.
+    The pickle sections are unpickled, which can run arbitrary code: only read files from a trusted source.
+    """
+    with open(path, 'rb') as file:
+        if file.read(len(magic)) != magic:
+            raise ValueError(f"{path} is not a file of this type")
+        length, = struct.unpack('<I', file.read(4))
+        header = json.loads(file.read(length))
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError(f"{path} was written on a {header['byteorder']}-endian machine")
+        if use_mmap:
+            buffer = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            file.seek(0)
+            buffer = memoryview(file.read())
+    sections = {}
+    for name, (offset, size, typecode) in header['sections'].items():
+        blob = buffer[offset:offset + size]
+        if typecode == 'pickle':
+            sections[name] = pickle.loads(blob)
+        elif use_mmap:
+            sections[name] = blob.cast(typecode)
+        elif typecode == 'B':
+            sections[name] = bytearray(blob)
+        else:
+            sections[name] = array(typecode)
+            sections[name].frombytes(blob)
+    return header, sections
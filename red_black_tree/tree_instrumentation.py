@@ -0,0 +1,324 @@
+# Instrumentation of a RedBlackTree: counts what its insert, delete_val and find calls cost inside the tree.
+# For every sampled call it records the rotations and the color changes done by fix_insert / fix_delete, the
+# update_size calls and the number of nodes the descent compared (a histogram per kind of call). The height
+# history gets a point, with the number of calls made so far, every time the black height of the tree changes
+# or a sampled descent goes deeper than the one of the previous point: the largest descent depth sampled since
+# that point (a lower bound of the height, equal to it once a deepest leaf is reached) and the black height.
+# Nothing is added to RedBlackTree itself: the instrumentation stores wrappers of the three operations as
+# attributes of the instrumented tree, which take precedence over the methods of the class, and removes them
+# in close(). A tree that is not instrumented (or no longer) runs the plain methods, at no cost.
+# With sample_every=N only one call in N on average is traced (at random gaps, so that a periodic workload is
+# not sampled at the same point of its period): the other calls only pay for the wrapper and a counter,
+# cheap enough to leave the instrumentation on. A sampled call additionally installs hooks on the rotations,
+# update_size and the fix-ups for its own duration, and compares the colors of the nodes around the fix-up
+# before and after it. The fix-ups set colors by plain assignments, which cannot be hooked, so color_changes
+# counts the nodes whose color differs after the fix-up: a node recolored twice back to its color counts 0,
+# and the count is a lower bound of the color assignments made.
+#
+# Usage:
+#        with TreeInstrumentation(tree, sample_every=100) as stats:
+#            ... workload ...
+#        print(stats.to_json(indent=2))
+
+import json
+import random
+from collections import Counter
+
+from red_black_tree import MULTI, RED
+
+# Kind of operation -> RedBlackTree method it instruments
+OPERATIONS = {'insert': 'insert', 'delete': 'delete_val', 'find': 'find'}
+
+
+class OperationStats:
+    """Counters of one kind of operation; everything but calls only covers the sampled calls"""
+    __slots__ = ('sampled', 'countdown', 'scheduled', 'rotations', 'color_changes', 'update_size_calls',
+                 'rotations_per_op', 'descent_depth')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Sets every counter back to zero"""
+        self.sampled = 0
+        # Calls left until the next sampled one, and number of calls up to the next sampled one: the wrappers
+        # only count down, so that an unsampled call costs a single decrement
+        self.countdown = 1
+        self.scheduled = 1
+        self.rotations = 0
+        # Nodes whose color differs after the fix-up (not the number of color assignments)
+        self.color_changes = 0
+        self.update_size_calls = 0
+        # Number of rotations -> number of sampled calls that made that many
+        self.rotations_per_op = Counter()
+        # Nodes compared by the descent -> number of sampled calls
+        self.descent_depth = Counter()
+
+    @property
+    def calls(self):
+        """Number of calls made"""
+        return self.scheduled - self.countdown
+
+    def as_dict(self):
+        """The counters, with the histograms as {value: calls} sorted by value"""
+        return {
+            'calls': self.calls,
+            'sampled': self.sampled,
+            'rotations': self.rotations,
+            'color_changes': self.color_changes,
+            'update_size_calls': self.update_size_calls,
+            'rotations_per_op': dict(sorted(self.rotations_per_op.items())),
+            'descent_depth': dict(sorted(self.descent_depth.items())),
+        }
+
+
+class TreeInstrumentation:
+    def __init__(self, tree, sample_every=1, seed=None):
+        """
+        Starts counting the insert, delete_val and find calls of the tree, tracing one call in sample_every
+        on average (every call with 1). seed seeds the random gaps between sampled calls.
+        Raises ValueError if the tree is already instrumented.
+        """
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
+        # The operations of an instrumented tree are the wrappers stored on it, which are not bound methods
+        if any(getattr(getattr(tree, name), '__self__', None) is not tree for name in OPERATIONS.values()):
+            raise ValueError("the tree is already instrumented")
+        self.tree = tree
+        self.sample_every = sample_every
+        self._random = random.Random(seed)
+        self.operations = {kind: OperationStats() for kind in OPERATIONS}
+        # Points {calls, size, max_depth, black_height}: the largest descent depth sampled since the previous
+        # point and the black height, each time the black height changed or max_depth went past the last one
+        self.height = []
+        self._deepest = 0
+        cls = type(tree)
+
+        # Hooks of a sampled call, counting into the current call's counters
+        def left_rotation(node):
+            self._rotations += 1
+            cls.left_rotation(tree, node)
+
+        def right_rotation(node):
+            self._rotations += 1
+            cls.right_rotation(tree, node)
+
+        def update_size(node):
+            self._update_size_calls += 1
+            cls.update_size(tree, node)
+
+        def fix_insert(node):
+            colors = self._colors_around(self._insert_fix_path(node), 1)
+            grew = cls.fix_insert(tree, node)
+            self._color_changes += sum(node.color is not color for node, color in colors.items())
+            return grew
+
+        def fix_delete(node):
+            colors = self._colors_around(self._delete_fix_path(node), 3)
+            cls.fix_delete(tree, node)
+            self._color_changes += sum(node.color is not color for node, color in colors.items())
+
+        self._hooks = {'left_rotation': left_rotation, 'right_rotation': right_rotation,
+                       'update_size': update_size, 'fix_insert': fix_insert, 'fix_delete': fix_delete}
+        for kind, name in OPERATIONS.items():
+            setattr(tree, name, self._wrap(kind, getattr(cls, name)))
+        self._installed = True
+
+    def _wrap(self, kind, function):
+        # Replacement of the method function of the tree, counting its calls into the stats of kind.
+        # The wrappers have the exact parameters of the methods: forwarding *args would double their cost
+        tree = self.tree
+        stats = self.operations[kind]
+        if kind == 'insert':
+            def call(key, value=None):
+                stats.countdown -= 1
+                if stats.countdown:
+                    return function(tree, key, value)
+                return self._trace(stats, function, key, (value,))
+        elif kind == 'delete':
+            find = type(tree).find
+
+            def delete_val(tree, key):
+                # RedBlackTree.delete_val, searching the key with the find of the class: the search is part
+                # of the deletion, and must not go through the wrapper counting the find calls
+                node = find(tree, key)
+                if node is tree.NIL:
+                    return False
+                tree._delete_node(node)
+                return True
+
+            def call(key):
+                stats.countdown -= 1
+                if stats.countdown:
+                    return delete_val(tree, key)
+                return self._trace(stats, delete_val, key, ())
+        else:
+            def call(key):
+                stats.countdown -= 1
+                if stats.countdown:
+                    return function(tree, key)
+                return self._trace(stats, function, key, ())
+        return call
+
+    def _trace(self, stats, function, key, args):
+        # Runs a sampled call with the hooks installed, then adds its costs to stats
+        tree = self.tree
+        gap = self._random.randrange(1, 2 * self.sample_every)
+        stats.countdown = gap
+        stats.scheduled += gap
+        stats.sampled += 1
+        # A MULTI insert goes down to a leaf even when the key is in the tree; everything else stops at the key
+        stops = stats is not self.operations['insert'] or tree.duplicates != MULTI
+        depth = self._descent_depth(key, stops)
+        stats.descent_depth[depth] += 1
+        self._deepest = max(self._deepest, depth)
+        self._rotations = self._color_changes = self._update_size_calls = 0
+        for name, hook in self._hooks.items():
+            setattr(tree, name, hook)
+        try:
+            return function(tree, key, *args)
+        finally:
+            for name in self._hooks:
+                delattr(tree, name)
+            stats.rotations += self._rotations
+            stats.rotations_per_op[self._rotations] += 1
+            stats.color_changes += self._color_changes
+            stats.update_size_calls += self._update_size_calls
+            black_height = tree._black_height(tree.root)
+            last = self.height[-1] if self.height else None
+            if last is None or last['black_height'] != black_height or self._deepest > last['max_depth']:
+                calls = sum(operation.calls for operation in self.operations.values())
+                self.height.append({'calls': calls, 'size': len(tree), 'max_depth': self._deepest,
+                                    'black_height': black_height})
+                self._deepest = 0
+
+    def _descent_depth(self, key, stops_at_key):
+        # Number of nodes a search for the key compares, the same way as find and insert
+        tree = self.tree
+        sort_key = tree._sort_key(key)
+        node = tree.root
+        depth = 0
+        while node is not tree.NIL:
+            depth += 1
+            if stops_at_key and sort_key == node.sort_key:
+                break
+            node = node.left if sort_key < node.sort_key else node.right
+        return depth
+
+    def _insert_fix_path(self, node):
+        # Ancestors fix_insert(node) can reach, found from the colors before it runs: it goes up two levels
+        # while the parent and the uncle are red, and stops at a black parent or after rotating at a black uncle.
+        # The uncles it recolors are children of these nodes, and the root may be recolored at the end
+        path = [node, self.tree.root]
+        while node.parent.color is RED:
+            parent = node.parent
+            grandparent = parent.parent
+            path.append(parent)
+            path.append(grandparent)
+            uncle = grandparent.left if parent is grandparent.right else grandparent.right
+            if uncle.color is not RED:
+                break
+            node = grandparent
+        return path
+
+    def _delete_fix_path(self, node):
+        # Ancestors fix_delete(node) can reach: it only goes up through black nodes, and stops at (and blackens)
+        # the first red one. node may be NIL, whose parent is then set. The siblings it recolors are children of
+        # these nodes, and their children and grandchildren can be recolored by the rotations at the last level
+        NIL = self.tree.NIL
+        path = []
+        ancestor = node if node is not NIL else node.parent
+        while ancestor is not NIL:
+            path.append(ancestor)
+            if ancestor.color is RED:
+                break
+            ancestor = ancestor.parent
+        return path
+
+    def _colors_around(self, path, levels):
+        # Colors of the nodes of the path and of their descendants down to `levels` levels below them
+        NIL = self.tree.NIL
+        colors = {}
+        for ancestor in path:
+            layer = [ancestor]
+            for _ in range(levels + 1):
+                below = []
+                for current in layer:
+                    if current is not NIL:
+                        colors[current] = current.color
+                        below.append(current.left)
+                        below.append(current.right)
+                layer = below
+        return colors
+
+    def reset(self):
+        """Sets every counter back to zero and forgets the height history"""
+        for stats in self.operations.values():
+            stats.reset()
+        self.height.clear()
+        self._deepest = 0
+
+    def close(self):
+        """Gives the tree back its plain methods; the counters are kept"""
+        if self._installed:
+            for name in OPERATIONS.values():
+                delattr(self.tree, name)
+            self._installed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def counters(self):
+        """Flat {name: number} view of the totals, e.g. {'insert.calls': 1000, 'insert.rotations': 580, ...}"""
+        flat = {}
+        for kind, stats in self.operations.items():
+            for name, value in stats.as_dict().items():
+                if not isinstance(value, dict):
+                    flat[f'{kind}.{name}'] = value
+            if stats.sampled:
+                flat[f'{kind}.mean_rotations'] = stats.rotations / stats.sampled
+                depths = stats.descent_depth
+                flat[f'{kind}.mean_descent_depth'] = sum(d * n for d, n in depths.items()) / stats.sampled
+        return flat
+
+    def as_dict(self):
+        """Every counter and histogram, and the height history"""
+        return {
+            'sample_every': self.sample_every,
+            'operations': {kind: stats.as_dict() for kind, stats in self.operations.items()},
+            'height': list(self.height),
+        }
+
+    def to_json(self, **kwargs):
+        """as_dict() as a JSON string (the keyword arguments go to json.dumps)"""
+        return json.dumps(self.as_dict(), **kwargs)
+
+
+if __name__ == '__main__':
+    from red_black_tree import RedBlackTree
+
+    # Every call traced: ascending keys make insert rotate at almost every step
+    tree = RedBlackTree()
+    with TreeInstrumentation(tree) as stats:
+        for key in range(1, 1001):
+            tree.insert(key)
+        for key in range(1, 1001, 3):
+            tree.find(key)
+        for key in range(1, 1001, 2):
+            tree.delete_val(key)
+    for name, value in stats.counters().items():
+        print(f'{name}: {value:.2f}' if isinstance(value, float) else f'{name}: {value}')
+    print('Depth and black height over time:',
+          [(point['calls'], point['max_depth'], point['black_height']) for point in stats.height])
+    print("\n")
+
+    # One call in 50 traced
+    sampled = TreeInstrumentation(RedBlackTree(), sample_every=50, seed=1)
+    rng = random.Random(0)
+    for _ in range(10000):
+        sampled.tree.insert(rng.randrange(100000))
+    print('Sampled inserts:', json.dumps(sampled.operations['insert'].as_dict()))
+    sampled.close()
@@ -0,0 +1,10 @@
+# The modules under test are scripts living in hash_table/ and red_black_tree/, next to their own helper
+# modules, as for engine_benchmark.py: both directories go on the import path of the tests.
+#
+# Usage: python -m pytest tests
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'hash_table'), os.path.join(ROOT, 'red_black_tree')]
@@ -0,0 +1,128 @@
+# Round trips through save and load, copied and memory-mapped, compared with the content that was saved.
+
+import bisect
+import random
+
+import pytest
+
+from hash_table_open_addressing import DOUBLE_HASHING, HOPSCOTCH, ROBIN_HOOD, HashTable
+from hash_table_separate_chaining import CompactChainingTable, HashTableSeparateChaining
+from red_black_tree import COUNT, MAP, MULTI, MappedRedBlackTree, RedBlackTree
+
+
+def random_items(seed, n=1000, values=True):
+    rng = random.Random(seed)
+    return {rng.randrange(-10**9, 10**9): (rng.random() if values else None) for _ in range(n)}
+
+
+@pytest.mark.parametrize('storage', ['list', 'array'])
+@pytest.mark.parametrize('method', [DOUBLE_HASHING, ROBIN_HOOD, HOPSCOTCH])
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_open_addressing(tmp_path, method, storage, use_mmap):
+    items = random_items(method)
+    table = HashTable(11, storage=storage)
+    insert = getattr(table, f'insert_{method}')
+    for key, value in items.items():
+        insert(key, value)
+    for key in list(items)[::4]:
+        table.discard(key)
+        del items[key]
+    path = tmp_path / 'table.bin'
+    table.save(path)
+    loaded = HashTable.load(path, mmap=use_mmap)
+    assert dict(loaded.items()) == items
+    assert loaded.seed == table.seed
+    search = getattr(loaded, f'search_{method}')
+    for key in random_items('absent', 200):
+        assert (search(key) is not None) == (key in items)
+    if use_mmap:
+        with pytest.raises(TypeError):
+            loaded[1] = 1
+    else:
+        loaded[1] = 1
+        assert loaded[1] == 1
+
+
+def test_open_addressing_with_object_keys(tmp_path):
+    table = HashTable(11)
+    for i in range(300):
+        table[f'key{i}'] = (i, str(i))
+    path = tmp_path / 'table.bin'
+    table.save(path)
+    assert dict(HashTable.load(path).items()) == dict(table.items())
+    with pytest.raises(ValueError):
+        HashTable.load(path, mmap=True)
+
+
+@pytest.mark.parametrize('values', [False, True])
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_chaining(tmp_path, values, use_mmap):
+    items = random_items('chaining', values=values)
+    table = HashTableSeparateChaining()
+    for key, value in items.items():
+        table.insert(key, value)
+    path = tmp_path / 'table.bin'
+    table.save(path)
+    loaded = HashTableSeparateChaining.load(path, mmap=use_mmap)
+    assert isinstance(loaded, CompactChainingTable if use_mmap else HashTableSeparateChaining)
+    assert dict(loaded.items()) == items
+    assert len(loaded) == len(items)
+    for key in random_items('absent', 200):
+        assert loaded.find(key) == (key in items)
+        assert loaded.get(key) == items.get(key)
+    if not use_mmap:
+        loaded.insert(1, 'one')
+        assert loaded.find(1)
+
+
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_compact_chaining(tmp_path, use_mmap):
+    table = HashTableSeparateChaining()
+    for i in range(500):
+        table.insert(i * 7, i)
+    compact = table.compact()
+    path = tmp_path / 'table.bin'
+    compact.save(path)
+    loaded = CompactChainingTable.load(path, mmap=use_mmap)
+    assert dict(loaded.items()) == {i * 7: i for i in range(500)}
+    assert [loaded.find(key) for key in range(100)] == [key % 7 == 0 for key in range(100)]
+
+
+@pytest.mark.parametrize('duplicates', [MULTI, MAP, COUNT])
+@pytest.mark.parametrize('use_mmap', [False, True])
+def test_tree(tmp_path, duplicates, use_mmap):
+    rng = random.Random(duplicates)
+    tree = RedBlackTree(duplicates=duplicates)
+    for _ in range(1000):
+        key = rng.randrange(300)
+        tree.insert(key, key * 0.5)
+    expected = list(tree.items())
+    keys = [key for key, _ in expected]
+    path = tmp_path / 'tree.rbt'
+    tree.save(path)
+    loaded = RedBlackTree.load(path, mmap=use_mmap)
+    if use_mmap:
+        assert isinstance(loaded, MappedRedBlackTree)
+    else:
+        loaded.validate()
+    assert list(loaded.items()) == expected
+    assert len(loaded) == len(keys)
+    for key in range(-5, 310, 7):
+        assert loaded.bisect_left(key) == bisect.bisect_left(keys, key)
+        assert loaded.bisect_right(key) == bisect.bisect_right(keys, key)
+        assert loaded.count_between(key, key + 20, (True, False)) == (
+            bisect.bisect_left(keys, key + 20) - bisect.bisect_left(keys, key))
+    kth = loaded.find_kth(len(keys) // 2)
+    assert (kth if use_mmap else kth.key) == keys[len(keys) // 2 - 1]
+
+
+def test_tree_with_object_keys(tmp_path):
+    tree = RedBlackTree.from_iterable(['pear', 'Apple', 'fig'], key=str.lower)
+    path = tmp_path / 'tree.rbt'
+    tree.save(path)
+    loaded = RedBlackTree.load(path, key=str.lower)
+    loaded.validate()
+    assert list(loaded) == ['Apple', 'fig', 'pear']
+    assert 'APPLE' in loaded
+    with pytest.raises(ValueError):
+        RedBlackTree.load(path, mmap=True)
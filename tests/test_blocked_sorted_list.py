@@ -0,0 +1,57 @@
+# Differential tests of BlockedSortedList against a sorted list, with blocks small enough to be split and
+# merged all the time.
+
+import bisect
+import random
+
+import pytest
+
+from blocked_sorted_list import BlockedSortedList
+
+
+@pytest.mark.parametrize('load', [2, 4, 16])
+def test_matches_sorted_list(load):
+    rng = random.Random(load)
+    container = BlockedSortedList(load)
+    expected = []
+    for step in range(4000):
+        key = rng.randrange(300)
+        if rng.random() < 0.6:
+            container.insert(key)
+            bisect.insort(expected, key)
+        else:
+            found = container.delete_val(key)
+            assert found == (key in expected)
+            if found:
+                expected.remove(key)
+        container.validate()
+        assert len(container) == len(expected)
+        assert (container.find(key) is not container.NIL) == (key in expected)
+        position = rng.randint(1, len(expected) + 1)
+        assert container.find_kth(position) == (expected[position - 1] if position <= len(expected) else None)
+        low = rng.randrange(300)
+        assert container.bisect_left(low) == bisect.bisect_left(expected, low)
+        assert container.bisect_right(low) == bisect.bisect_right(expected, low)
+        high = low + rng.randrange(50)
+        assert list(container.items_between(low, high, (True, False))) == expected[
+            bisect.bisect_left(expected, low):bisect.bisect_left(expected, high)]
+        assert container.count_between(low, high) == (
+            bisect.bisect_right(expected, high) - bisect.bisect_left(expected, low))
+    assert list(container) == expected
+    assert list(reversed(container)) == expected[::-1]
+
+
+def test_tree_compatible_queries():
+    container = BlockedSortedList.from_iterable([5, 1, 3], load=2)
+    assert container.find(4) is container.NIL
+    assert container.find_min(container.root) == 1
+    assert container.find_max(container.root) == 5
+    empty = BlockedSortedList()
+    assert empty.root is empty.NIL
+    assert empty.find_min() is empty.NIL
+    assert empty.find_max() is empty.NIL
+
+
+def test_from_sorted_rejects_unsorted_keys():
+    with pytest.raises(ValueError):
+        BlockedSortedList.from_sorted([1, 3, 2])
@@ -0,0 +1,71 @@
+# Differential tests of CuckooHashTable against a dict, including keys that only fit with the stash.
+
+import random
+
+import pytest
+
+from hash_table_cuckoo import CuckooHashTable
+
+
+@pytest.mark.parametrize('hash_count,bucket_size', [(2, 1), (3, 1), (2, 4)])
+def test_matches_dict(hash_count, bucket_size):
+    rng = random.Random(f'{hash_count}-{bucket_size}')
+    table = CuckooHashTable(4, hash_count=hash_count, bucket_size=bucket_size, seed=0)
+    expected = {}
+    for step in range(3000):
+        key = rng.randrange(500)
+        if rng.random() < 0.6:
+            table[key] = step
+            expected[key] = step
+        else:
+            assert table.delete(key) == (key in expected)
+            expected.pop(key, None)
+        assert len(table) == len(expected)
+        probe = rng.randrange(500)
+        assert table.find(probe) == (probe in expected)
+        assert table.get(probe) == expected.get(probe)
+    assert dict(table.items()) == expected
+
+
+def test_stash():
+    # Keys 0 to 4 all have the key hash 0, hence the same two buckets whatever the seed: three of them
+    # can only be in the stash
+    table = CuckooHashTable(8, stash_size=4, hash_function=lambda key: 0 if key < 5 else key, seed=0)
+    expected = {}
+    for key in range(5):
+        table[key] = str(key)
+        expected[key] = str(key)
+    assert len(table.stash) == 3
+    rng = random.Random(0)
+    for step in range(500):
+        key = rng.randrange(5, 60)
+        if rng.random() < 0.6:
+            table[key] = step
+            expected[key] = step
+        else:
+            table.discard(key)
+            expected.pop(key, None)
+        assert dict(table.items()) == expected
+    # Deleting a colliding key leaves the stash, or frees a slot that a stashed one moves into
+    colliding = sum(key < 5 for key, _ in table.stash)
+    del table[0]
+    del expected[0]
+    assert sum(key < 5 for key, _ in table.stash) == colliding - 1
+    assert dict(table.items()) == expected
+    for key in expected:
+        assert table.search(key) is not None
+
+
+def test_too_many_equal_hashes():
+    # 2 buckets of 1 slot and a stash of 4: a 7th key with the same key hash cannot be placed
+    table = CuckooHashTable(8, stash_size=4, hash_function=lambda key: 0, seed=0)
+    for key in range(6):
+        table.insert(key)
+    with pytest.raises(OverflowError):
+        table.insert(6)
+    assert sorted(table) == list(range(6))
+
+
+def test_default_seeds_differ():
+    assert CuckooHashTable().hash_seed != CuckooHashTable().hash_seed
+    assert CuckooHashTable(seed=0).hash_seed == CuckooHashTable(seed=0).hash_seed
@@ -0,0 +1,87 @@
+# Differential tests of HashTable: random inserts, updates and deletes with every probing strategy, slot
+# storage and capacity policy, compared with a dict after every operation.
+
+import random
+
+import pytest
+
+from hash_table_open_addressing import DOUBLE_HASHING, HOPSCOTCH, LINEAR, QUADRATIC, ROBIN_HOOD, HashTable
+
+METHODS = (LINEAR, QUADRATIC, DOUBLE_HASHING, ROBIN_HOOD, HOPSCOTCH)
+
+
+def operations(table, method):
+    """ The (insert, search, delete) functions of the table for the method """
+    if method == QUADRATIC:
+        return (lambda key, value: table.insert_quadratic(key, 1, 3, value),
+                lambda key: table.search_quadratic(key, 1, 3),
+                lambda key: table.delete_quadratic(key, 1, 3))
+    return (getattr(table, f'insert_{method}'), getattr(table, f'search_{method}'),
+            getattr(table, f'delete_{method}'))
+
+
+@pytest.mark.parametrize('capacity', ['prime', 'power_of_two'])
+@pytest.mark.parametrize('storage', ['list', 'array'])
+@pytest.mark.parametrize('method', METHODS)
+def test_matches_dict(method, storage, capacity):
+    rng = random.Random(f'{method}-{storage}-{capacity}')
+    table = HashTable(11, capacity=capacity, storage=storage, neighborhood=8)
+    insert, search, delete = operations(table, method)
+    expected = {}
+    for step in range(2000):
+        key = rng.randrange(300)
+        if rng.random() < 0.6:
+            insert(key, step)
+            expected[key] = step
+        else:
+            delete(key)
+            expected.pop(key, None)
+        assert len(table) == len(expected)
+        probe = rng.randrange(300)
+        assert (search(probe) is not None) == (probe in expected)
+        assert table.get(probe) == expected.get(probe)
+    assert dict(table.items()) == expected
+    assert sorted(table) == sorted(expected)
+    assert sorted(table.values()) == sorted(expected.values())
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_mapping_interface(method):
+    table = HashTable(11, seed=0)
+    operations(table, method)[0](0, 'zero')
+    expected = {0: 'zero'}
+    for key in range(1, 100):
+        table[key] = key * key
+        expected[key] = key * key
+    for key in range(0, 100, 3):
+        del table[key]
+        del expected[key]
+    assert table == expected
+    with pytest.raises(KeyError):
+        table[3]
+    table.add(1)
+    table.add(3)
+    table.discard(4)
+    expected[3] = None
+    del expected[4]
+    assert table == expected
+
+
+@pytest.mark.parametrize('storage', ['list', 'array'])
+@pytest.mark.parametrize('method', [LINEAR, DOUBLE_HASHING, ROBIN_HOOD, HOPSCOTCH])
+def test_insert_many_and_contains_many(method, storage):
+    rng = random.Random(method)
+    keys = [rng.randrange(-10**6, 10**6) for _ in range(3000)]
+    table = HashTable(11, storage=storage)
+    table.insert_many(keys[:2000], method)
+    assert sorted(table) == sorted(set(keys[:2000]))
+    assert list(table.contains_many(keys)) == [key in set(keys[:2000]) for key in keys]
+
+
+def test_string_keys_with_random_seeds():
+    words = [f'word{i}' for i in range(500)]
+    for seed in (None, 0, 12345):
+        table = HashTable(11, seed=seed)
+        for i, word in enumerate(words):
+            table.insert_double_hashing(word, i)
+        assert dict(table.items()) == {word: i for i, word in enumerate(words)}
@@ -0,0 +1,55 @@
+# Differential tests of PersistentRedBlackTree against a dict: snapshots taken along the way must keep the
+# content they had when they were taken, whatever the tree does afterwards.
+
+import random
+import threading
+
+from persistent_red_black_tree import PersistentRedBlackTree
+
+
+def test_snapshots_are_isolated():
+    rng = random.Random(0)
+    tree = PersistentRedBlackTree()
+    expected = {}
+    snapshots = []
+    for step in range(3000):
+        key = rng.randrange(200)
+        if rng.random() < 0.6:
+            tree.insert(key, step)
+            expected[key] = step
+        else:
+            assert tree.delete_val(key) == (key in expected)
+            expected.pop(key, None)
+        if step % 97 == 0:
+            snapshots.append((tree.snapshot(), sorted(expected.items())))
+    tree.validate()
+    assert list(tree.items()) == sorted(expected.items())
+    for snapshot, items in snapshots:
+        snapshot.validate()
+        assert list(snapshot.items()) == items
+        assert len(snapshot) == len(items)
+        for i, (key, value) in enumerate(items, 1):
+            assert snapshot.find_kth(i).key == key
+            assert snapshot[key] == value
+        assert snapshot.count_between(50, 150) == sum(50 <= key <= 150 for key, _ in items)
+
+
+def test_snapshot_reads_while_writing():
+    tree = PersistentRedBlackTree()
+    for key in range(1000):
+        tree.insert(key)
+    snapshot = tree.snapshot()
+    errors = []
+
+    def read():
+        for _ in range(20):
+            if list(snapshot) != list(range(1000)):
+                errors.append('snapshot changed')
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for key in range(0, 1000, 2):
+        tree.delete_val(key)
+    reader.join()
+    assert not errors
+    assert list(tree) == list(range(1, 1000, 2))
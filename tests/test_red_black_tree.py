@@ -0,0 +1,118 @@
+# Differential tests of RedBlackTree in its three duplicates modes, validated after every operation:
+# MULTI against a sorted list, MAP against a dict, COUNT against a Counter.
+
+import bisect
+import random
+from collections import Counter
+
+import pytest
+
+from red_black_tree import COUNT, MAP, MULTI, RedBlackTree
+
+
+def check_order(tree, keys):
+    """ Compares the order queries of the tree with the sorted list of its keys """
+    assert len(tree) == len(keys)
+    assert list(tree) == keys
+    for i in (1, len(keys) // 2, len(keys)):
+        if keys:
+            assert tree.find_kth(i).key == keys[i - 1]
+    assert tree.find_kth(len(keys) + 1) is None
+    for key in (-1, 0, 50, 99, 100):
+        assert tree.bisect_left(key) == bisect.bisect_left(keys, key)
+        assert tree.bisect_right(key) == bisect.bisect_right(keys, key)
+    assert list(tree.items_between(20, 60, (False, True))) == [key for key in keys if 20 < key <= 60]
+    assert tree.count_between(20, 60, False) == sum(20 < key < 60 for key in keys)
+
+
+def test_multi_matches_sorted_list():
+    rng = random.Random(0)
+    tree = RedBlackTree()
+    expected = []
+    for step in range(3000):
+        key = rng.randrange(100)
+        if rng.random() < 0.6:
+            tree.insert(key, step)
+            bisect.insort(expected, key)
+        else:
+            found = tree.delete_val(key)
+            assert found == (key in expected)
+            if found:
+                expected.remove(key)
+        tree.validate()
+        assert (tree.find(key) is not tree.NIL) == (key in expected)
+        if step % 100 == 0:
+            check_order(tree, expected)
+    check_order(tree, expected)
+
+
+def test_map_matches_dict():
+    rng = random.Random(1)
+    tree = RedBlackTree(duplicates=MAP)
+    expected = {}
+    for step in range(3000):
+        key = rng.randrange(100)
+        action = rng.random()
+        if action < 0.4:
+            tree.insert(key, step)
+            expected[key] = step
+        elif action < 0.6:
+            tree[key] = -step
+            expected[key] = -step
+        else:
+            tree.discard(key)
+            expected.pop(key, None)
+        tree.validate()
+        assert tree.get(key) == expected.get(key)
+    assert list(tree.items()) == sorted(expected.items())
+    assert list(tree.values()) == [expected[key] for key in sorted(expected)]
+    check_order(tree, sorted(expected))
+
+
+def test_count_matches_counter():
+    rng = random.Random(2)
+    tree = RedBlackTree(duplicates=COUNT)
+    expected = Counter()
+    for step in range(3000):
+        key = rng.randrange(100)
+        if rng.random() < 0.6:
+            tree.insert(key)
+            expected[key] += 1
+        else:
+            assert tree.delete_val(key) == (expected[key] > 0)
+            expected[key] -= 1
+            expected += Counter()  # Drops the keys whose count fell to 0
+        tree.validate()
+        node = tree.find(key)
+        assert (0 if node is tree.NIL else node.count) == expected[key]
+    check_order(tree, sorted(expected.elements()))
+    assert Counter(iter(tree)) == expected
+
+
+@pytest.mark.parametrize('duplicates', [MULTI, MAP, COUNT])
+def test_from_iterable_matches_inserts(duplicates):
+    rng = random.Random(duplicates)
+    keys = [rng.randrange(500) for _ in range(2000)]
+    built = RedBlackTree.from_iterable(keys, duplicates=duplicates)
+    inserted = RedBlackTree(duplicates=duplicates)
+    for key in keys:
+        inserted.insert(key)
+    built.validate()
+    assert list(built) == list(inserted)
+
+
+def test_key_function():
+    tree = RedBlackTree(duplicates=MAP, key=str.lower)
+    for word in ['pear', 'Apple', 'fig', 'APPLE']:
+        tree.insert(word, len(word))
+    tree.validate()
+    assert list(tree.items()) == [('Apple', 5), ('fig', 3), ('pear', 4)]
+    assert tree['apple'] == 5
+
+
+def test_trees_compare_by_identity():
+    a = RedBlackTree.from_iterable([1, 1])
+    b = RedBlackTree.from_iterable([1])
+    assert a != b
+    assert a == a
+    assert len({a, b}) == 2
@@ -0,0 +1,112 @@
+# Tests of RedBlackTree.split, join and the set operations against sorted lists, Counters and dicts,
+# validating every resulting tree.
+
+import random
+from collections import Counter
+
+import pytest
+
+from red_black_tree import COUNT, MAP, MULTI, RedBlackTree
+
+
+def random_keys(rng, n, key_range):
+    return [rng.randrange(key_range) for _ in range(n)]
+
+
+def build(keys, **options):
+    """ A tree built by inserting the keys one by one, so that its shape is not the one of from_sorted """
+    tree = RedBlackTree(**options)
+    for key in keys:
+        tree.insert(key, -key)
+    return tree
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_split(seed):
+    rng = random.Random(seed)
+    keys = random_keys(rng, rng.randrange(200), 50)
+    pivot = rng.randrange(-5, 55)
+    tree = build(keys)
+    left, right = tree.split(pivot)
+    left.validate()
+    right.validate()
+    assert list(left) == sorted(key for key in keys if key < pivot)
+    assert list(right) == sorted(key for key in keys if key >= pivot)
+    assert len(tree) == 0
+    # The halves share their sentinel, and joining them back takes them as they are
+    joined = RedBlackTree.join(left, pivot, right)
+    joined.validate()
+    assert list(joined) == sorted(keys + [pivot])
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_join_of_separate_trees(seed):
+    rng = random.Random(seed)
+    small, large = sorted(rng.sample(range(1, 500), 2))
+    left = build(random_keys(rng, rng.randrange(small), 100))
+    right = build([100 + key for key in random_keys(rng, rng.randrange(large), 100)])
+    left_keys, right_keys = list(left), list(right)
+    joined = RedBlackTree.join(left, 100, right)
+    joined.validate()
+    assert list(joined) == left_keys + [100] + right_keys
+    assert len(left) == len(right) == 0
+    # The emptied trees stay usable
+    left.insert(1)
+    left.validate()
+    assert list(left) == [1]
+
+
+def test_join_rejects_unordered_keys():
+    with pytest.raises(ValueError):
+        RedBlackTree.join(build([1, 5]), 3, build([4]))
+    with pytest.raises(ValueError):
+        RedBlackTree.join(build([1], duplicates=MAP), 1, build([2], duplicates=MAP))
+
+
+@pytest.mark.parametrize('duplicates', [MULTI, COUNT])
+@pytest.mark.parametrize('seed', range(20))
+def test_operations_with_duplicates(seed, duplicates):
+    # Every occurrence of a key comes from one tree: other for the union, this tree for the intersection
+    rng = random.Random(seed)
+    a_keys = random_keys(rng, rng.randrange(150), 40)
+    b_keys = random_keys(rng, rng.randrange(150), 40)
+    a, b = Counter(a_keys), Counter(b_keys)
+    expected = {
+        'union': a - Counter(dict.fromkeys(b, len(a_keys))) + b,
+        'intersection': Counter({key: count for key, count in a.items() if key in b}),
+        'difference': Counter({key: count for key, count in a.items() if key not in b}),
+    }
+    for operation, counts in expected.items():
+        result = getattr(build(a_keys, duplicates=duplicates), operation)(build(b_keys, duplicates=duplicates))
+        result.validate()
+        assert list(result) == sorted(counts.elements()), operation
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_map_operations(seed):
+    rng = random.Random(seed)
+    a = {key: f'a{key}' for key in random_keys(rng, rng.randrange(150), 200)}
+    b = {key: f'b{key}' for key in random_keys(rng, rng.randrange(150), 200)}
+
+    def tree(items):
+        result = RedBlackTree(duplicates=MAP)
+        for key, value in items.items():
+            result[key] = value
+        return result
+
+    expected = {
+        'union': {**a, **b},
+        'intersection': {key: value for key, value in a.items() if key in b},
+        'difference': {key: value for key, value in a.items() if key not in b},
+    }
+    for operation, items in expected.items():
+        first, second = tree(a), tree(b)
+        result = getattr(first, operation)(second)
+        result.validate()
+        assert list(result.items()) == sorted(items.items()), operation
+        assert len(first) == len(second) == 0
+        # The result keeps working after its inputs are reused
+        first[-1] = 'first'
+        result[-2] = 'result'
+        result.validate()
+        first.validate()